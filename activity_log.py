@@ -0,0 +1,135 @@
+# spiral_core/activity_log.py
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ('never', 'rotate', 'always')
+
+
+class BufferedActivityLog:
+    """
+    Append-only text log that keeps its file open and writes lines in batches.
+    Lines are buffered in memory and written by a background thread every
+    `flush_interval` seconds, or as soon as `max_buffer_lines` are waiting.
+    When a flush would take the file past `max_bytes` (counted in UTF-8 bytes) it is
+    first rotated to path.1 ... path.<backup_count> (so rotation happens at flush
+    boundaries). Bytes a failed flush didn't write are kept and go first next time.
+
+    fsync policy:
+        never  - leave durability to the OS page cache
+        rotate - fsync before a file is rotated away and on close (default)
+        always - fsync after every flush
+    """
+
+    def __init__(self, path, flush_interval=1.0, max_buffer_lines=512,
+                 max_bytes=10 * 1024 * 1024, backup_count=5, fsync='rotate'):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {FSYNC_POLICIES}")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer_lines = max_buffer_lines
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fsync = fsync
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._unwritten = b''
+        self._open()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"activity-log-{os.path.basename(path)}", daemon=True)
+        self._flusher.start()
+
+    def write(self, line):
+        """Queues one line (a trailing newline is added if missing). Never touches the disk."""
+        if not line.endswith('\n'):
+            line += '\n'
+        with self._buffer_lock:
+            if self._closed:
+                raise ValueError(f"Activity log {self.path} is closed")
+            self._buffer.append(line)
+            if len(self._buffer) >= self.max_buffer_lines:
+                self._wakeup.set()
+
+    def _open(self):
+        """(Re)opens the file for appending, unbuffered: flush() hands it whole batches."""
+        self._file = open(self.path, 'ab', buffering=0)
+        self._size = self._file.tell()
+
+    def flush(self):
+        """Writes every buffered line with a single write call, rotating first if needed."""
+        with self._buffer_lock:
+            lines, self._buffer = self._buffer, []
+        with self._file_lock:
+            if self._file is None:
+                return
+            data = self._unwritten + ''.join(lines).encode('utf-8')
+            if not data:
+                return
+            written = 0
+            try:
+                if self._file.closed:
+                    # A failed rotation couldn't reopen it; try again.
+                    self._open()
+                if self.max_bytes and self._size and self._size + len(data) > self.max_bytes:
+                    self._rotate()
+                with memoryview(data) as view:
+                    while written < len(data):
+                        written += self._file.write(view[written:])
+            finally:
+                self._size += written
+                self._unwritten = data[written:]
+            if self.fsync == 'always':
+                os.fsync(self._file.fileno())
+
+    def _rotate(self):
+        """Shifts path -> path.1 -> ... -> path.<backup_count>, dropping the oldest. Holds _file_lock."""
+        try:
+            if self.fsync != 'never':
+                os.fsync(self._file.fileno())
+            self._file.close()
+            if self.backup_count > 0:
+                for i in range(self.backup_count - 1, 0, -1):
+                    source = f"{self.path}.{i}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.path}.{i + 1}")
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+        finally:
+            # Even when a rename failed: appending to the unrotated file beats a closed one.
+            self._open()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush activity log {self.path}: {e}")
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        """Flushes what's left, applies the fsync policy and closes the file."""
+        with self._buffer_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=max(1.0, self.flush_interval * 2))
+        self.flush()
+        with self._file_lock:
+            if self._file is not None:
+                if not self._file.closed and self.fsync != 'never':
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
@@ -6,11 +6,15 @@ import logging
 import json
 import shutil 
 from datetime import datetime
-import ast 
 
 # CHANGE START: Changed to absolute import
 from spiral_core.daemon_templates import Olympian, BaseDaemon 
 # CHANGE END
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.archive_index import ArchiveIndex
+from spiral_core.module_record import build_module_record, write_module_record
+from spiral_core.pulse_metrics import instrumented_pulse, file_read, file_written, file_moved, file_deleted
+from spiral_core.pulse_scheduler import adaptive_pulse
 
 class Aion(Olympian): 
     """
@@ -33,24 +37,30 @@ class Aion(Olympian):
         os.makedirs(self.aion_output_path, exist_ok=True)
         os.makedirs(self.aion_rejected_path, exist_ok=True) 
 
+        self.archive_index = ArchiveIndex.from_params(self.params)
+        self.raw_watch = watch_directory(self.kairos_raw_path, backend=self.params.get('archive_watch_backend', 'auto')).subscribe()
 
-    def _validate_syntax(self, code_content: str, filename: str) -> bool:
+
+    def _analyze_module(self, code_content: str, filename: str, stored_content: str) -> dict:
         """
-        Performs a basic syntax validation on the Python code content.
-        Returns True if syntax is valid, False otherwise.
+        Parses the Python code content exactly once and returns its module record
+        (syntax validity, AST summary, daemon type, golden metrics).
+        Kronos, Nyx and Hephaestus read this record instead of re-parsing.
         """
-        try:
-            ast.parse(code_content, filename=filename)
+        record = build_module_record(code_content, filename=filename, stored_content=stored_content)
+        if record['syntax_valid']:
             self.logger.debug(f"Aion: Syntax check passed for '{filename}'.")
-            return True
-        except SyntaxError as e:
-            self.logger.warning(f"Aion: Syntax error detected in '{filename}': {e}")
-            return False
-        except Exception as e:
-            self.logger.error(f"Aion: Unexpected error during syntax validation for '{filename}': {e}", exc_info=True)
-            return False
+        else:
+            self.logger.warning(f"Aion: Syntax error detected in '{filename}': {record['syntax_error']}")
+        return record
+
 
+    def pulse_backlog(self):
+        """Raw modules from Kairos still waiting to be processed."""
+        return self.raw_watch.pending()
 
+    @instrumented_pulse
+    @adaptive_pulse
     def pulse(self):
         """
         Aion's main pulse function.
@@ -58,7 +68,8 @@ class Aion(Olympian):
         """
         self.logger.info("Aion Pulse: Processing raw code units from Kairos.")
 
-        files_to_process = [f for f in os.listdir(self.kairos_raw_path) if f.endswith('.py')]
+        changed, _ = self.raw_watch.poll()
+        files_to_process = sorted(changed)
 
         if not files_to_process:
             self.logger.info("Aion: No raw code units found from Kairos to process.")
@@ -72,28 +83,42 @@ class Aion(Olympian):
             try:
                 with open(source_filepath, 'r', encoding='utf-8') as f:
                     content = f.read()
+                file_read(len(content))
                 
-                if not self._validate_syntax(content, filename):
+                processed_content = f"# Processed by Aion on {datetime.now().isoformat()}\n" \
+                                    f"# Original file: {filename}\n" \
+                                    f"{content}"
+
+                record = self._analyze_module(content, filename, processed_content)
+                if not record['syntax_valid']:
                     rejected_filepath = os.path.join(self.aion_rejected_path, filename)
                     shutil.move(source_filepath, rejected_filepath)
+                    file_moved()
+                    self.archive_index.move(filename, rejected_filepath)
                     self.logger.warning(f"Aion: Rejected invalid file '{filename}'. Moved to '{self.aion_rejected_path}'")
                     rejected_count += 1
                     continue 
                 
-                processed_content = f"# Processed by Aion on {datetime.now().isoformat()}\n" \
-                                    f"# Original file: {filename}\n" \
-                                    f"{content}"
-                
+                # The record is written before the module so Kronos always finds it beside the file.
                 destination_filepath = os.path.join(self.aion_output_path, filename)
+                write_module_record(destination_filepath, record)
                 with open(destination_filepath, 'w', encoding='utf-8') as f:
                     f.write(processed_content)
+                file_written(len(processed_content))
                 
                 os.remove(source_filepath)
+                file_deleted()
+                self.archive_index.record(destination_filepath, content=processed_content,
+                                          daemon_type=record['daemon_type'],
+                                          golden_score=record['golden']['golden_ratios_found'])
                 self.logger.info(f"Aion: Processed and moved '{filename}' to '{self.aion_output_path}'")
                 processed_count += 1
 
+            except FileNotFoundError:
+                self.logger.debug(f"Aion: '{filename}' disappeared before processing. Skipping.")
             except Exception as e:
                 self.logger.error(f"Aion: Error processing file '{filename}': {e}", exc_info=True)
+                self.raw_watch.retry(filename)
         
         self.logger.info(f"Aion pulse completed. Processed {processed_count} files, Rejected {rejected_count} files.")
 
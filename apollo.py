@@ -5,12 +5,32 @@ import json
 import time
 import logging
 from datetime import datetime
-import subprocess 
-import psutil 
 import sys 
 
 # Changed to absolute import
 from spiral_core.daemon_templates import Olympian, BaseDaemon
+from spiral_core.result_aggregator import ResultAggregator
+from spiral_core.genesis_loader import GenesisLoader
+from spiral_core.param_segment import ParamSegment
+from spiral_core.spiral_rng import fresh_master_seed
+from spiral_core.pulse_metrics import instrumented_pulse
+from spiral_core.supervisor_io import Supervisor
+from spiral_core.shard import ShardConfig, ShardReporter
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.segment_store import PackedArchive
+
+# (script, name) of every supervised daemon, in start order.
+DAEMON_SCRIPTS = (
+    ('kairos.py', 'Kairos'),
+    ('aion.py', 'Aion'),
+    ('kronos.py', 'Kronos'),
+    ('nyx.py', 'Nyx'),
+    ('erebus.py', 'Erebus'),
+    ('tartarus.py', 'Tartarus'),
+    ('hephaestus.py', 'Hephaestus'),
+    ('lethe.py', 'Lethe'),
+)
+RUNTIME_NAME = 'Runtime'
 
 class Apollo(Olympian): 
     """
@@ -19,7 +39,23 @@ class Apollo(Olympian):
     """
     def __init__(self):
         super().__init__("apollo") 
-        self.active_daemons = {} 
+        # Off when the daemons are hosted elsewhere (e.g. in-process by the simulation).
+        self.supervise_daemons = self.params.get('apollo_supervise_daemons', True)
+        # 'pooled': the daemons in apollo_pooled_daemons share one spiral_runtime process and
+        # only the rest (Hephaestus, which runs untrusted code) get a process of their own.
+        # 'subprocess': one process per daemon.
+        self.supervisor_mode = self.params.get('apollo_supervisor_mode', 'pooled')
+        self.pooled_daemons = [name.lower() for name in self.params.get('apollo_pooled_daemons', [])]
+        if self.supervisor_mode != 'pooled':
+            self.pooled_daemons = []
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        self.child_env = os.environ.copy()
+        self.child_env['PYTHONPATH'] = project_root + os.pathsep + self.child_env.get('PYTHONPATH', '')
+        # Pumps child output, restarts crashed daemons with backoff and samples CPU/RSS.
+        self.supervisor = None
+        if self.supervise_daemons:
+            self.supervisor = Supervisor.from_params(self.params, env=self.child_env, on_line=self._on_child_output)
+        self.supervisor_stats_path = self.params.get('apollo_supervisor_stats_path', 'apollo_supervisor_stats.json')
         self.logger.info("Apollo Daemon initialized as the primary orchestrator.")
         
         # Ensure necessary directories exist on startup, using paths from params
@@ -31,6 +67,7 @@ class Apollo(Olympian):
         self.hephaestus_forge_path = self.params.get('hephaestus_forge_path', 'hephaestus_forge/')
         self.hephaestus_experiment_results_path = self.params.get('hephaestus_experiment_results_path', 'hephaestus_experiment_results/')
         self.aion_rejected_output_path = self.params.get('aion_rejected_output_path', 'aion_rejected_output/') 
+        self.lethe_chaos_logs_path = self.params.get('lethe_chaos_logs_path', 'lethe_chaos_logs/')
         
         # NEW: Path for successfully tested modules
         self.hephaestus_successful_modules_archive_path = self.params.get('hephaestus_successful_modules_archive_path', 'hephaestus_successful_modules_archive/')
@@ -48,146 +85,215 @@ class Apollo(Olympian):
         os.makedirs(self.hephaestus_successful_modules_archive_path, exist_ok=True)
         os.makedirs(self.lethe_chaos_logs_path, exist_ok=True)
 
+        # Parameter writes are staged during a pulse and flushed atomically once at its end.
+        self.genesis_loader = GenesisLoader()
+        self.genesis_loader.follow(self)
+
+        # Every daemon derives its random streams from one master seed. Pin it before the
+        # daemons start so the whole run can be replayed by reusing the logged value.
+        if self.params.get('master_seed') is None:
+            self._stage_param('master_seed', fresh_master_seed())
+            self.genesis_loader.flush()
+        self.logger.info(f"Apollo: Run master_seed is {self.params['master_seed']}.")
+
+        # The current_* knobs are also published to shared memory for the chaos daemons.
+        self.param_segment = None
+        try:
+            self.param_segment = ParamSegment.create_or_attach(self.params.get('param_segment_name', 'spiral_params'))
+            self.param_segment.write(self.params)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Apollo: Shared parameter segment unavailable ({e}). Daemons will read genesis_params.json instead.")
+
+        # Rolling view of experiment results and chaos events, fed by directory watches.
+        self.result_aggregator = ResultAggregator.from_params(self.params)
+
+        # In a sharded spiral, this Apollo reports its node's progress to the leader every pulse.
+        self.shard = ShardConfig.from_params(self.params)
+        self.shard_reporter = None
+        if self.shard.leader_socket:
+            self.shard_reporter = ShardReporter(self.shard.leader_socket, self.shard.index,
+                                                timeout=self.params.get('shard_report_timeout_seconds', 0.5))
+            # Modules leave the pipeline into Kronos's typed archives or Aion's rejects.
+            watch_backend = self.params.get('archive_watch_backend', 'auto')
+            self.pipeline_exits = [
+                watch_directory(path, backend=watch_backend).subscribe()
+                for path in (os.path.join(self.mnemo_archive_path, 'olympian/'),
+                             os.path.join(self.mnemo_archive_path, 'chthonic/'),
+                             self.aion_rejected_output_path)
+            ]
+            # With the packed backend, Kronos's typed archives are the pack: count its growth.
+            self.packed_archive = PackedArchive.from_params(self.params)
+            self.packed_modules_seen = len(self.packed_archive) if self.packed_archive is not None else 0
+            self.modules_through = 0
+
+
+    def _stage_param(self, key, value):
+        self.params[key] = value
+        self.genesis_loader.stage({key: value})
 
     def is_daemon_running(self, daemon_name):
         """Checks if a daemon process is currently running."""
-        if daemon_name in self.active_daemons and self.active_daemons[daemon_name].poll() is None:
-            try:
-                psutil.Process(self.active_daemons[daemon_name].pid)
-                return True
-            except psutil.NoSuchProcess:
-                return False
-        return False
+        return self.supervisor is not None and self.supervisor.is_running(daemon_name)
+
+    def _on_child_output(self, daemon_name, stream_name, line):
+        """Called from the supervisor's pump thread for every line a child writes."""
+        if stream_name == 'stderr':
+            self.logger.error(f"{daemon_name}: {line}")
+        else:
+            self.logger.debug(f"{daemon_name}: {line}")
+
+    def _spawn(self, daemon_name, args):
+        """Starts `python3 -u <args>` under the supervisor, with the project root on PYTHONPATH."""
+        try:
+            process = self.supervisor.start(daemon_name, ['python3', '-u', *args])
+        except FileNotFoundError:
+            self.logger.error(f"Failed to start {daemon_name}: python3 command not found. Ensure Python is in PATH.")
+            return False
+        except Exception as e:
+            self.logger.error(f"Failed to start {daemon_name} daemon: {e}", exc_info=True)
+            return False
+        if process is None:
+            return False
+        self.logger.info(f"{daemon_name} daemon started with PID: {process.pid}. PYTHONPATH set to: {self.child_env['PYTHONPATH']}")
+        return True
 
     def start_daemon(self, daemon_script_name, daemon_name):
         """
         Starts a daemon script as a subprocess if not already running.
         Assumes daemon scripts are in the same directory as Apollo (spiral_core/).
-        Crucially, sets PYTHONPATH to include the project root for absolute imports.
         """
-        if not self.is_daemon_running(daemon_name):
-            daemon_script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), daemon_script_name)
-            
-            if not os.path.exists(daemon_script_path):
-                self.logger.warning(f"Daemon script {daemon_script_name} not found at {daemon_script_path}. Cannot start {daemon_name}.")
-                return False
-
-            try:
-                self.logger.info(f"Starting {daemon_name} daemon from {daemon_script_path}...")
-                
-                project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-                
-                env = os.environ.copy() 
-                env['PYTHONPATH'] = project_root + os.pathsep + env.get('PYTHONPATH', '')
-
-                process = subprocess.Popen(['python3', '-u', daemon_script_path], 
-                                           stdout=subprocess.PIPE, 
-                                           stderr=subprocess.PIPE,
-                                           text=True,
-                                           env=env) 
-                self.active_daemons[daemon_name] = process
-                self.logger.info(f"{daemon_name} daemon started with PID: {process.pid}. PYTHONPATH set to: {env['PYTHONPATH']}")
-                return True
-            except FileNotFoundError:
-                self.logger.error(f"Failed to start {daemon_name}: python3 command not found. Ensure Python is in PATH.")
-            except Exception as e:
-                self.logger.error(f"Failed to start {daemon_name} daemon: {e}", exc_info=True)
-        return False
+        if not self.supervisor.may_start(daemon_name):
+            return False
+        daemon_script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), daemon_script_name)
+        if not os.path.exists(daemon_script_path):
+            self.logger.warning(f"Daemon script {daemon_script_name} not found at {daemon_script_path}. Cannot start {daemon_name}.")
+            return False
+        self.logger.info(f"Starting {daemon_name} daemon from {daemon_script_path}...")
+        return self._spawn(daemon_name, [daemon_script_path])
+
+    def start_runtime(self, daemon_names):
+        """Starts one spiral_runtime process hosting all of `daemon_names`, if not already running."""
+        if not daemon_names or not self.supervisor.may_start(RUNTIME_NAME):
+            return False
+        self.logger.info(f"Starting the pooled runtime for {', '.join(daemon_names)}...")
+        return self._spawn(RUNTIME_NAME, ['-m', 'spiral_core.spiral_runtime', *daemon_names])
 
     def manage_daemon_status(self):
-        """Checks status of managed daemons and logs if they've stopped."""
-        for daemon_name, process in list(self.active_daemons.items()):
-            if process.poll() is not None: 
-                stdout, stderr = process.communicate()
-                if stdout:
-                    self.logger.debug(f"{daemon_name} stdout:\n{stdout}")
-                if stderr:
-                    self.logger.error(f"{daemon_name} stderr:\n{stderr}")
-                self.logger.warning(f"{daemon_name} daemon has terminated (Exit Code: {process.returncode}).")
-                del self.active_daemons[daemon_name] 
+        """Checks status of managed daemons, logs those that stopped and samples the rest."""
+        stats = None
+        for daemon_name, exit_code, crashed in self.supervisor.reap():
+            if crashed:
+                stats = stats or self.supervisor.stats()
+                self.logger.warning(f"{daemon_name} daemon crashed (Exit Code: {exit_code}). "
+                                    f"Restarting in {stats[daemon_name]['next_start_in_seconds']:.1f}s.")
+            else:
+                self.logger.warning(f"{daemon_name} daemon has terminated (Exit Code: {exit_code}).")
+        self.supervisor.sample()
 
+    def write_supervisor_stats(self):
+        """Atomically replaces the supervisor stats file with per-daemon uptime, restarts and CPU/RSS."""
+        if not self.supervisor_stats_path:
+            return
+        tmp_path = f"{self.supervisor_stats_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.supervisor.stats(), f, indent=4)
+            os.replace(tmp_path, self.supervisor_stats_path)
+        except OSError as e:
+            self.logger.warning(f"Apollo: Could not write supervisor stats to {self.supervisor_stats_path}: {e}")
+
+    def analyze_results(self):
+        """
+        Ingests the experiment results and chaos logs written since the last pulse and
+        tunes Kairos's complexity bias from the windowed outcome rates.
+        The adjustment is the old per-result rule (-0.05 per failure, +0.01 per success)
+        averaged over the window, so it costs the same however many results exist.
+        """
+        try:
+            new_results, new_chaos = self.result_aggregator.ingest()
+        except Exception as e:
+            self.logger.error(f"Apollo: Error ingesting Hephaestus results or Lethe chaos logs: {e}", exc_info=True)
+            return
+
+        if new_chaos:
+            latest_chaos = self.result_aggregator.latest_chaos
+            self.logger.info(f"Apollo: Noted {new_chaos} Lethe chaos injections, latest {latest_chaos.get('chaos_type', 'N/A')} into {latest_chaos.get('target_sandbox', 'N/A')}")
+
+        if not new_results:
+            self.logger.info(f"Apollo: No new Hephaestus experiment results in {self.hephaestus_experiment_results_path}.")
+            return
+
+        rates = self.result_aggregator.rates()
+        failure_rate = rates['syntax_error'] + rates['runtime_error']
+        self.logger.info(f"Apollo: Ingested {new_results} Hephaestus results. Window of {rates['samples']}: "
+                         f"success {rates['success']:.2f}, syntax_error {rates['syntax_error']:.2f}, runtime_error {rates['runtime_error']:.2f}")
+        for daemon_type, window in self.result_aggregator.daemon_types.items():
+            self.logger.debug(f"Apollo: {daemon_type} modules: {window.rates()}")
+
+        adjustment = 0.01 * rates['success'] - 0.05 * failure_rate
+        bias = self.params.get('current_complexity_bias', 0.5)
+        if adjustment < 0:
+            self.logger.warning(f"Apollo: Experiment failure rate {failure_rate:.2f}. Reducing Kairos's complexity bias.")
+            self._stage_param('current_complexity_bias', max(0.1, bias + adjustment))
+        elif adjustment > 0:
+            self._stage_param('current_complexity_bias', min(0.9, bias + adjustment))
+        self.logger.info(f"Apollo: complexity_bias tuned to {self.params['current_complexity_bias']:.2f}")
+
+    def report_to_leader(self, generation):
+        """Sends this node's cumulative counters to the shard leader."""
+        for watch in self.pipeline_exits:
+            changed, _ = watch.poll()
+            self.modules_through += len(changed)
+        if self.packed_archive is not None:
+            self.packed_archive.refresh()
+            self.modules_through += max(0, len(self.packed_archive) - self.packed_modules_seen)
+            self.packed_modules_seen = len(self.packed_archive)
+        summary = self.result_aggregator.summary()
+        cluster = self.shard_reporter.report({
+            'generation': generation,
+            'complexity_bias': self.params.get('current_complexity_bias', 0.5),
+            'modules_through': self.modules_through,
+            'results_ingested': summary['results_ingested'],
+            'success_rate': summary['overall'].get('success', 0.0),
+        })
+        if cluster is not None:
+            self.logger.debug(f"Apollo: Cluster of {cluster['shards']} shards at {cluster['modules_per_second']:.1f} modules/s.")
+
+    @instrumented_pulse
     def pulse(self):
         """
         Apollo's main pulse function.
         Orchestrates other daemons, and performs strategic learning/analysis.
         """
+        self.genesis_loader.refresh()
         current_generation = self.params.get("current_generation", 0)
         max_generations = self.params.get("max_generations", float('inf'))
 
         self.logger.info(f"Apollo Pulse: Orchestrating Generation {current_generation}")
 
-        self.manage_daemon_status() 
+        if self.supervise_daemons:
+            self.manage_daemon_status() 
 
-        self.start_daemon('kairos.py', 'Kairos')
-        self.start_daemon('aion.py', 'Aion')
-        self.start_daemon('kronos.py', 'Kronos')
-        self.start_daemon('nyx.py', 'Nyx')
-        self.start_daemon('erebus.py', 'Erebus')
-        self.start_daemon('tartarus.py', 'Tartarus')
-        self.start_daemon('hephaestus.py', 'Hephaestus')
-        self.start_daemon('lethe.py', 'Lethe')
+            self.start_runtime(self.pooled_daemons)
+            for daemon_script_name, daemon_name in DAEMON_SCRIPTS:
+                if daemon_name.lower() not in self.pooled_daemons:
+                    self.start_daemon(daemon_script_name, daemon_name)
+            self.write_supervisor_stats()
 
-        self.params['current_generation'] = current_generation + 1
-        self.params['current_complexity_bias'] = min(1.0, self.params.get('current_complexity_bias', 0.5) + 0.01)
+        self._stage_param('current_generation', current_generation + 1)
+        self._stage_param('current_complexity_bias', min(1.0, self.params.get('current_complexity_bias', 0.5) + 0.01))
         
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        genesis_params_path = os.path.join(script_dir, '..', 'genesis_params.json')
-        try:
-            with open(genesis_params_path, 'w') as f:
-                json.dump(self.params, f, indent=4)
-            self.logger.info(f"Updated genesis_params.json: current_generation={self.params['current_generation']}, complexity_bias={self.params['current_complexity_bias']:.2f}")
-        except Exception as e:
-            self.logger.error(f"Apollo: Failed to save updated genesis_params.json: {e}")
-
-
         self.logger.info("Apollo: Initiating learning and strategy analysis...")
-        
-        if os.path.exists(self.hephaestus_experiment_results_path):
-            results_files = [f for f in os.listdir(self.hephaestus_experiment_results_path) if f.endswith('.json')]
-            if results_files:
-                latest_result_file = os.path.join(self.hephaestus_experiment_results_path, sorted(results_files)[-1])
-                try:
-                    with open(latest_result_file, 'r') as f:
-                        result_content = json.load(f)
-                        self.logger.info(f"Apollo: Analyzed latest Hephaestus result for {result_content.get('tested_file', 'N/A')}. Status: {result_content.get('status', 'N/A')}")
-                        
-                        if result_content.get('status') in ["runtime_error", "syntax_error"]:
-                            self.logger.warning("Apollo: Detected experiment failure. Considering adjustment of Kairos's complexity bias or targeting specific code patterns.")
-                            self.params['current_complexity_bias'] = max(0.1, self.params.get('current_complexity_bias', 0.5) - 0.05)
-                            with open(genesis_params_path, 'w') as f:
-                                json.dump(self.params, f, indent=4)
-                            self.logger.info(f"Updated genesis_params.json: complexity_bias reduced to {self.params['current_complexity_bias']:.2f}")
-                        elif result_content.get('status') == "success":
-                            self.logger.info("Apollo: Experiment successful. Considering increasing complexity bias or promoting successful patterns.")
-                            self.params['current_complexity_bias'] = min(0.9, self.params.get('current_complexity_bias', 0.5) + 0.01)
-                            with open(genesis_params_path, 'w') as f:
-                                json.dump(self.params, f, indent=4)
-                            self.logger.info(f"Updated genesis_params.json: complexity_bias increased to {self.params['current_complexity_bias']:.2f}")
-
-                except json.JSONDecodeError:
-                    self.logger.error(f"Apollo: Error decoding JSON from Hephaestus result file {latest_result_file}.")
-                except Exception as e:
-                    self.logger.error(f"Apollo: Error reading or analyzing Hephaestus result file {latest_result_file}: {e}", exc_info=True)
-            else:
-                self.logger.info(f"Apollo: No Hephaestus experiment results found in {self.hephaestus_experiment_results_path}.")
-        else:
-            self.logger.info(f"Apollo: Hephaestus experiment results path does not exist: {self.hephaestus_experiment_results_path}.")
-
-        if os.path.exists(self.lethe_chaos_logs_path):
-            chaos_log_files = [f for f in os.listdir(self.lethe_chaos_logs_path) if f.endswith('.json')]
-            if chaos_log_files:
-                latest_chaos_log = os.path.join(self.lethe_chaos_logs_path, sorted(chaos_log_files)[-1])
-                try:
-                    with open(latest_chaos_log, 'r') as f:
-                        chaos_data = json.load(f)
-                        self.logger.info(f"Apollo: Noted Lethe's chaos injection: {chaos_data.get('chaos_type', 'N/A')} into {chaos_data.get('target_sandbox', 'N/A')}")
-                except Exception as e:
-                    self.logger.error(f"Apollo: Error reading Lethe chaos log file {latest_chaos_log}: {e}")
-            else:
-                self.logger.info(f"Apollo: No Lethe chaos logs found in {self.lethe_chaos_logs_path}.")
-        else:
-            self.logger.info(f"Apollo: Lethe chaos logs path does not exist: {self.lethe_chaos_logs_path}.")
+        self.analyze_results()
+        if self.shard_reporter is not None:
+            self.report_to_leader(current_generation + 1)
 
+        if self.param_segment is not None:
+            self.param_segment.write(self.params)
+        if self.genesis_loader.flush():
+            self.logger.info(f"Updated genesis_params.json: current_generation={self.params['current_generation']}, complexity_bias={self.params['current_complexity_bias']:.2f}")
+        else:
+            self.logger.error("Apollo: Failed to save updated genesis_params.json; changes stay staged for the next pulse.")
 
         self.logger.info(f"Apollo Pulse completed for Generation {current_generation}")
 
@@ -0,0 +1,191 @@
+# spiral_core/archive_index.py
+
+import os
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    location TEXT NOT NULL,
+    daemon_type TEXT,
+    size INTEGER,
+    mtime REAL,
+    content_hash TEXT,
+    generation INTEGER,
+    golden_score REAL,
+    test_status TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_modules_location ON modules(location);
+CREATE INDEX IF NOT EXISTS idx_modules_location_type ON modules(location, daemon_type);
+CREATE INDEX IF NOT EXISTS idx_modules_location_mtime ON modules(location, mtime);
+"""
+
+COLUMNS = ('name', 'path', 'location', 'daemon_type', 'size', 'mtime', 'content_hash',
+           'generation', 'golden_score', 'test_status', 'updated_at')
+
+
+def content_hash(content):
+    """SHA-256 hex digest of a module's text (or bytes)."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def _location(path):
+    return os.path.normpath(os.path.dirname(os.path.abspath(path)))
+
+
+class ArchiveIndex:
+    """
+    Persistent SQLite index of every module the Spiral has forged, keyed by file name
+    (Kairos names are unique), and tracking which directory currently holds it.
+    Daemons update it as they move files, so candidate selection, age checks and
+    daemon-type lookups become indexed queries instead of directory scans.
+    """
+
+    def __init__(self, db_path='mnemo_archive_index.sqlite3'):
+        self.db_path = db_path
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        logger.info(f"ArchiveIndex opened at {db_path}")
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(params.get('archive_index_path', 'mnemo_archive_index.sqlite3'))
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            return self._conn.execute(sql, args)
+
+    def record(self, path, content=None, daemon_type=None, generation=None, golden_score=None):
+        """
+        Inserts or refreshes the entry for the module at `path`. Size and mtime come from
+        the file; fields passed as None keep their previously indexed value.
+        """
+        name = os.path.basename(path)
+        try:
+            st = os.stat(path)
+            size, mtime = st.st_size, st.st_mtime
+        except FileNotFoundError:
+            size, mtime = None, None
+        digest = content_hash(content) if content is not None else None
+        self._execute(
+            """
+            INSERT INTO modules (name, path, location, daemon_type, size, mtime, content_hash,
+                                 generation, golden_score, test_status, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                path = excluded.path,
+                location = excluded.location,
+                daemon_type = COALESCE(excluded.daemon_type, modules.daemon_type),
+                size = excluded.size,
+                mtime = excluded.mtime,
+                content_hash = COALESCE(excluded.content_hash, modules.content_hash),
+                generation = COALESCE(excluded.generation, modules.generation),
+                golden_score = COALESCE(excluded.golden_score, modules.golden_score),
+                updated_at = excluded.updated_at
+            """,
+            (name, path, _location(path), daemon_type, size, mtime, digest,
+             generation, golden_score, time.time()))
+
+    def move(self, name, new_path, daemon_type=None):
+        """Records that `name` now lives at `new_path`; other metadata is carried over."""
+        try:
+            mtime = os.path.getmtime(new_path)
+        except FileNotFoundError:
+            mtime = None
+        cursor = self._execute(
+            """
+            UPDATE modules SET path = ?, location = ?, mtime = COALESCE(?, mtime),
+                               daemon_type = COALESCE(?, daemon_type), updated_at = ?
+            WHERE name = ?
+            """,
+            (new_path, _location(new_path), mtime, daemon_type, time.time(), name))
+        if cursor.rowcount == 0:
+            self.record(new_path, daemon_type=daemon_type)
+
+    def remove(self, name):
+        self._execute("DELETE FROM modules WHERE name = ?", (name,))
+
+    def remove_many(self, names):
+        """Removes several entries in one transaction."""
+        names = list(names)
+        if not names:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("DELETE FROM modules WHERE name = ?", ((name,) for name in names))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def set_test_status(self, name, status):
+        self._execute("UPDATE modules SET test_status = ?, updated_at = ? WHERE name = ?",
+                      (status, time.time(), name))
+
+    def get(self, name):
+        """Returns the indexed entry for `name` as a dict, or None."""
+        row = self._execute("SELECT * FROM modules WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def count(self, directory):
+        return self._execute("SELECT COUNT(*) FROM modules WHERE location = ?",
+                             (_location(os.path.join(directory, '_')),)).fetchone()[0]
+
+    def random_module(self, directory, rng=random):
+        """
+        Picks a uniformly random module indexed under `directory`: a random offset into
+        its entries, walked along the location index rather than sorting the table.
+        (Rowids are no key for this: moved rows keep theirs, so locations interleave and
+        a random rowid would favour modules after big gaps.) Returns None if there are none.
+        """
+        location = _location(os.path.join(directory, '_'))
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM modules WHERE location = ?",
+                                       (location,)).fetchone()[0]
+            if not count:
+                return None
+            row = self._conn.execute(
+                "SELECT * FROM modules WHERE location = ? ORDER BY rowid LIMIT 1 OFFSET ?",
+                (location, rng.randrange(count))).fetchone()
+        return dict(row) if row else None
+
+    def modules_of_type(self, directory, daemon_type, limit=None):
+        location = _location(os.path.join(directory, '_'))
+        sql = "SELECT * FROM modules WHERE location = ? AND daemon_type = ?"
+        args = [location, daemon_type]
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return [dict(row) for row in self._execute(sql, args).fetchall()]
+
+    def older_than(self, directory, max_mtime, limit=None):
+        """Modules under `directory` whose indexed mtime is older than `max_mtime`."""
+        location = _location(os.path.join(directory, '_'))
+        sql = "SELECT * FROM modules WHERE location = ? AND mtime < ? ORDER BY mtime"
+        args = [location, max_mtime]
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return [dict(row) for row in self._execute(sql, args).fetchall()]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,315 @@
+# spiral_core/archive_watcher.py
+
+import os
+import sys
+import errno
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+# A file only counts as "changed" once its writer has closed it (or it was renamed in),
+# so consumers never pick up a half-written module from Kairos or Aion.
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _InotifyBackend:
+    """Linux inotify backend. An idle poll costs a single non-blocking read()."""
+
+    def __init__(self, path):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self.path = path
+        self.wd = -1
+        self._add_watch()
+
+    def _add_watch(self):
+        self.wd = self._libc.inotify_add_watch(self.fd, os.fsencode(self.path), WATCH_MASK)
+        if self.wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch failed for {self.path}: {os.strerror(err)}")
+
+    def read_events(self):
+        """
+        Returns (changed_names, removed_names, needs_rescan) for everything queued
+        since the last call.
+        """
+        changed, removed = [], []
+        needs_rescan = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            if not buf:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buf):
+                _wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(buf[offset:offset + name_len].rstrip(b'\0'))
+                offset += name_len
+
+                if mask & IN_Q_OVERFLOW:
+                    needs_rescan = True
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    # The watched directory itself went away; re-establish the watch.
+                    needs_rescan = True
+                    try:
+                        os.makedirs(self.path, exist_ok=True)
+                        self._add_watch()
+                    except OSError as e:
+                        logger.error(f"Watcher: Could not re-watch {self.path}: {e}")
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    changed.append(name)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    removed.append(name)
+        return changed, removed, needs_rescan
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class _PollingBackend:
+    """Portable fallback: diffs successive os.scandir snapshots of the directory."""
+
+    def __init__(self, path):
+        self.path = path
+        self._snapshot = {}
+
+    def scan(self, suffix):
+        current = {}
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if entry.name.endswith(suffix) and entry.is_file():
+                        try:
+                            st = entry.stat()
+                            current[entry.name] = (st.st_mtime_ns, st.st_size)
+                        except FileNotFoundError:
+                            continue
+        except FileNotFoundError:
+            os.makedirs(self.path, exist_ok=True)
+        return current
+
+    def read_events(self, suffix):
+        current = self.scan(suffix)
+        previous = self._snapshot
+        changed = [name for name, sig in current.items() if previous.get(name) != sig]
+        removed = [name for name in previous if name not in current]
+        self._snapshot = current
+        return changed, removed, False
+
+    def close(self):
+        self._snapshot = {}
+
+
+class WatchSubscription:
+    """
+    One consumer's view of a DirectoryWatcher. Each subscription accumulates its own
+    added/changed and removed names, so several daemons in one process can share a watcher.
+    """
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self._changed = set(watcher.files)
+        self._removed = set()
+
+    def _notify(self, changed, removed):
+        for name in removed:
+            self._changed.discard(name)
+            self._removed.add(name)
+        for name in changed:
+            self._removed.discard(name)
+            self._changed.add(name)
+
+    def poll(self):
+        """
+        Returns (changed, removed) sets of file names since the previous poll.
+        Files present when the subscription was created are reported as changed once.
+        """
+        self.watcher.refresh()
+        changed, removed = self._changed, self._removed
+        self._changed, self._removed = set(), set()
+        return changed, removed
+
+    def retry(self, name):
+        """Re-queues a name so it is reported again on the next poll (e.g. after an error)."""
+        self._changed.add(name)
+
+    def pending(self):
+        """Number of changed names waiting for the next poll, without consuming them."""
+        self.watcher.refresh()
+        return len(self._changed)
+
+    def close(self):
+        self.watcher.unsubscribe(self)
+
+
+class DirectoryWatcher:
+    """
+    Keeps an in-memory picture of one directory (file name -> mtime) up to date from
+    change notifications, so daemons no longer os.listdir their input on every pulse.
+    Uses inotify on Linux and falls back to snapshot polling elsewhere.
+    """
+
+    def __init__(self, path, suffix='.py', backend='auto'):
+        self.path = path
+        self.suffix = suffix
+        self.files = {}
+        self._subscriptions = []
+        self._lock = threading.RLock()
+        os.makedirs(self.path, exist_ok=True)
+
+        self._backend = None
+        if backend in ('auto', 'inotify') and sys.platform.startswith('linux'):
+            try:
+                self._backend = _InotifyBackend(path)
+            except (OSError, AttributeError) as e:
+                if backend == 'inotify':
+                    raise
+                logger.warning(f"Watcher: inotify unavailable for {path} ({e}). Falling back to polling.")
+        if self._backend is None:
+            self._backend = _PollingBackend(path)
+        self.backend_name = 'inotify' if isinstance(self._backend, _InotifyBackend) else 'polling'
+
+        self._rescan()
+        logger.info(f"Watcher: Watching {path} for '*{suffix}' using {self.backend_name} ({len(self.files)} files).")
+
+    def _stat_mtime(self, name):
+        try:
+            return os.stat(os.path.join(self.path, name)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _rescan(self):
+        """Rebuilds the full picture from disk. Only needed at startup and after a queue overflow."""
+        if isinstance(self._backend, _PollingBackend):
+            snapshot = self._backend.scan(self.suffix)
+            self._backend._snapshot = snapshot
+            current = {name: sig[0] / 1e9 for name, sig in snapshot.items()}
+        else:
+            current = {}
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if entry.name.endswith(self.suffix) and entry.is_file():
+                        try:
+                            current[entry.name] = entry.stat().st_mtime
+                        except FileNotFoundError:
+                            continue
+        changed = [name for name, mtime in current.items() if self.files.get(name) != mtime]
+        removed = [name for name in self.files if name not in current]
+        self.files = current
+        return changed, removed
+
+    def refresh(self):
+        """Applies pending change notifications to the in-memory picture and fans them out."""
+        with self._lock:
+            if isinstance(self._backend, _PollingBackend):
+                raw_changed, raw_removed, needs_rescan = self._backend.read_events(self.suffix)
+            else:
+                raw_changed, raw_removed, needs_rescan = self._backend.read_events()
+
+            if needs_rescan:
+                logger.warning(f"Watcher: Event queue overflow or watch loss on {self.path}. Rescanning.")
+                changed, removed = self._rescan()
+            else:
+                changed, removed = [], []
+                for name in raw_removed:
+                    if name.endswith(self.suffix) and self.files.pop(name, None) is not None:
+                        removed.append(name)
+                for name in raw_changed:
+                    if not name.endswith(self.suffix):
+                        continue
+                    mtime = self._stat_mtime(name)
+                    if mtime is None:
+                        if self.files.pop(name, None) is not None:
+                            removed.append(name)
+                        continue
+                    self.files[name] = mtime
+                    changed.append(name)
+
+            if changed or removed:
+                for subscription in self._subscriptions:
+                    subscription._notify(changed, removed)
+
+    def snapshot(self):
+        """Returns a copy of the current file name -> mtime mapping."""
+        self.refresh()
+        with self._lock:
+            return dict(self.files)
+
+    def subscribe(self):
+        with self._lock:
+            self.refresh()
+            subscription = WatchSubscription(self)
+            self._subscriptions.append(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def close(self):
+        with self._lock:
+            self._backend.close()
+            self._subscriptions = []
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def watch_directory(path, suffix='.py', backend='auto'):
+    """
+    Returns the process-wide DirectoryWatcher for `path`, creating it on first use.
+    Daemons sharing a process (or several subscriptions in one daemon) share one watch.
+    """
+    key = (os.path.realpath(path), suffix)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is None:
+            watcher = DirectoryWatcher(path, suffix=suffix, backend=backend)
+            _watchers[key] = watcher
+        return watcher
+
+
+def close_watchers():
+    """Closes and forgets every process-wide watcher, e.g. before their directories are removed."""
+    with _watchers_lock:
+        for watcher in _watchers.values():
+            watcher.close()
+        _watchers.clear()
@@ -0,0 +1,107 @@
+# spiral_core/benchmarks/bench_messages.py
+"""
+Encode/decode cost of spiral_messages records against pickling the equivalent dicts.
+
+    python -m spiral_core.benchmarks.bench_messages --number 20000 --json messages.json
+
+Messages measured, each in both forms:
+
+    payload_1k     Payload with 1 KB of generated code (Apollo -> Mnemo)
+    payload_100k   Payload with 100 KB of generated code
+    batch_64       SegmentBatch of 64 entries (Mnemo -> Lethe)
+    feedback       Feedback (Lethe -> Mnemo -> Apollo)
+
+Reported: ns per encode and per decode (best of --repeat timeit runs) and encoded bytes.
+The pickle decode does no validation; the spiral_messages decode checks every field.
+"""
+
+import json
+import pickle
+import timeit
+import argparse
+import platform
+
+from spiral_core.spiral_messages import Payload, SegmentBatch, SegmentEntry, Feedback, encode, decode
+from common_utils import (
+    DATA_TYPE_KEY, DATA_CONTENT_KEY, DATA_PULSE_KEY, LETHE_STATUS_MESSAGE_KEY, LETHE_ERROR_MESSAGE_KEY
+)
+from spiral_core.mnemo import BATCH_DATA_TYPE
+from spiral_core.benchmarks.bench_pipeline import git_commit
+
+
+def _code(size):
+    line = "value = compute(value) + 1\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def _entries():
+    return [SegmentEntry("python_script", "/archive/python_script/segment_000001.seg", i * 1024, 1024, "olympian")
+            for i in range(64)]
+
+
+def messages():
+    """(name, record, equivalent legacy dict) for every measured message."""
+    entries = _entries()
+    return [
+        ('payload_1k', Payload("python_script", _code(1024), "olympian"),
+         {DATA_TYPE_KEY: "python_script", DATA_CONTENT_KEY: _code(1024), DATA_PULSE_KEY: "olympian"}),
+        ('payload_100k', Payload("python_script", _code(100 * 1024), "olympian"),
+         {DATA_TYPE_KEY: "python_script", DATA_CONTENT_KEY: _code(100 * 1024), DATA_PULSE_KEY: "olympian"}),
+        ('batch_64', SegmentBatch(entries),
+         {DATA_TYPE_KEY: BATCH_DATA_TYPE, DATA_CONTENT_KEY: [
+             {DATA_TYPE_KEY: e.data_type, DATA_PULSE_KEY: e.pulse, "segment": e.segment, "offset": e.offset, "length": e.length}
+             for e in entries]}),
+        ('feedback', Feedback("Lethe", "rejected", "SyntaxError: invalid syntax"),
+         {"source": "Lethe", LETHE_STATUS_MESSAGE_KEY: "rejected", LETHE_ERROR_MESSAGE_KEY: "SyntaxError: invalid syntax"}),
+    ]
+
+
+def _ns(stmt, number, repeat):
+    return round(min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e9, 1)
+
+
+def measure(name, record, legacy, number, repeat):
+    encoded = encode(record)
+    pickled = pickle.dumps(legacy, protocol=pickle.HIGHEST_PROTOCOL)
+    if decode(encoded).__class__ is not record.__class__:
+        raise RuntimeError(f"{name}: round trip changed the message type")
+    return {
+        'message': name,
+        'binary_bytes': len(encoded),
+        'pickle_bytes': len(pickled),
+        'binary_encode_ns': _ns(lambda: encode(record), number, repeat),
+        'binary_decode_ns': _ns(lambda: decode(encoded), number, repeat),
+        'pickle_encode_ns': _ns(lambda: pickle.dumps(legacy, protocol=pickle.HIGHEST_PROTOCOL), number, repeat),
+        'pickle_decode_ns': _ns(lambda: pickle.loads(pickled), number, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=20000, help="Calls per timeit run")
+    parser.add_argument('--repeat', type=int, default=5, help="timeit runs; the best is reported")
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {
+        'benchmark': 'messages',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': [],
+    }
+    print(f"{'message':<14}{'bytes':>16}{'encode ns':>22}{'decode ns':>22}")
+    print(f"{'':<14}{'binary/pickle':>16}{'binary/pickle':>22}{'binary/pickle':>22}")
+    for name, record, legacy in messages():
+        run = measure(name, record, legacy, args.number, args.repeat)
+        results['runs'].append(run)
+        print(f"{name:<14}{run['binary_bytes']:>8}/{run['pickle_bytes']:<7}"
+              f"{run['binary_encode_ns']:>11.0f}/{run['pickle_encode_ns']:<10.0f}"
+              f"{run['binary_decode_ns']:>11.0f}/{run['pickle_decode_ns']:<10.0f}")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
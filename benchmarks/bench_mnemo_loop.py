@@ -0,0 +1,137 @@
+# spiral_core/benchmarks/bench_mnemo_loop.py
+"""
+Messages per second and idle relay latency through Mnemo, before and after the
+blocking, batched event loop.
+
+    python -m spiral_core.benchmarks.bench_mnemo_loop --messages 5000
+
+"before" replays the old loop (empty()/get() once per queue, then sleep 0.1 s) with
+dict messages; "after" is Mnemo.run with binary messages, in the save mode given by
+--save-mode. Each run pushes
+python_script payloads from Apollo's side and times how long it takes for every
+payload to be relayed to Lethe's queue (one message each, or batch messages).
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import statistics
+import multiprocessing
+
+from common_utils import DATA_TYPE_KEY, DATA_CONTENT_KEY, DATA_PULSE_KEY
+from spiral_core.mnemo import Mnemo, SAVE_MODE_FILE, SAVE_MODE_SEGMENT, BATCH_DATA_TYPE, WIRE_DICT, WIRE_BINARY
+from spiral_core.spiral_messages import Payload, SegmentBatch, encode, decode
+
+
+class LegacyMnemo(Mnemo):
+    """Mnemo with the pre-multiplexing loop, one file per payload and dict messages, for comparison."""
+
+    def __init__(self, *args, save_mode=SAVE_MODE_FILE, wire_format=WIRE_DICT):
+        super().__init__(*args, save_mode=SAVE_MODE_FILE, wire_format=WIRE_DICT)
+
+    def run(self, cpu_affinity, running_event):
+        while running_event.is_set():
+            if not self.apollo_to_mnemo_q.empty():
+                self._save_and_relay(self._receive(self.apollo_to_mnemo_q.get(), "Apollo"))
+            if not self.kronos_log_q.empty():
+                self._log_activity(f"Received from Kronos: {self.kronos_log_q.get()}")
+            if not self.mnemo_log_q.empty():
+                self._log_activity(f"Received from Lethe: {self.mnemo_log_q.get()}")
+            time.sleep(0.1)
+
+
+def _mnemo_main(mnemo_class, queues, script_dirs, save_mode, cpu, running_event):
+    mnemo = mnemo_class(*queues, script_dirs, save_mode=save_mode, wire_format=WIRE_BINARY)
+    mnemo.run(cpu, running_event)
+
+
+def payload(index, legacy=False):
+    if legacy:
+        return {DATA_TYPE_KEY: "python_script", DATA_CONTENT_KEY: f"print({index})\n", DATA_PULSE_KEY: "benchmark"}
+    return encode(Payload("python_script", f"print({index})\n", "benchmark"))
+
+
+def relayed_payloads(message):
+    if isinstance(message, bytes):
+        message = decode(message)
+        return len(message) if isinstance(message, SegmentBatch) else 1
+    if message.get(DATA_TYPE_KEY) == BATCH_DATA_TYPE:
+        return len(message[DATA_CONTENT_KEY])
+    return 1
+
+
+def measure(mnemo_class, messages, latency_samples, cpu, save_mode=SAVE_MODE_FILE):
+    workdir = tempfile.mkdtemp(prefix="bench_mnemo_")
+    script_dirs = {"active_scripts": os.path.join(workdir, "active_scripts"),
+                   "active_seo_keywords": os.path.join(workdir, "active_seo_keywords")}
+    for path in script_dirs.values():
+        os.makedirs(path, exist_ok=True)
+
+    apollo_to_mnemo_q, mnemo_to_lethe_q = multiprocessing.Queue(), multiprocessing.Queue()
+    queues = (apollo_to_mnemo_q, mnemo_to_lethe_q, multiprocessing.Queue(), multiprocessing.Queue(), multiprocessing.Queue())
+    running_event = multiprocessing.Event()
+    running_event.set()
+    process = multiprocessing.Process(target=_mnemo_main, args=(mnemo_class, queues, script_dirs, save_mode, cpu, running_event))
+    process.start()
+    try:
+        # Idle latency: one message at a time into an otherwise quiet loop.
+        latencies = []
+        for i in range(latency_samples):
+            time.sleep(0.05)
+            start = time.perf_counter()
+            apollo_to_mnemo_q.put(payload(i, legacy=mnemo_class is LegacyMnemo))
+            mnemo_to_lethe_q.get(timeout=30)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+        # Throughput: a burst, timed until the last relay arrives.
+        start = time.perf_counter()
+        for i in range(messages):
+            apollo_to_mnemo_q.put(payload(i, legacy=mnemo_class is LegacyMnemo))
+        relayed = 0
+        while relayed < messages:
+            relayed += relayed_payloads(mnemo_to_lethe_q.get(timeout=max(60, messages)))
+        elapsed = time.perf_counter() - start
+    finally:
+        running_event.clear()
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'messages_per_second': round(messages / elapsed, 1),
+        'idle_latency_ms_median': round(statistics.median(latencies), 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--legacy-messages', type=int, default=30,
+                        help="Burst size for the old loop, which manages about 10 messages/s")
+    parser.add_argument('--latency-samples', type=int, default=10)
+    parser.add_argument('--save-mode', choices=(SAVE_MODE_SEGMENT, SAVE_MODE_FILE), default=SAVE_MODE_SEGMENT)
+    parser.add_argument('--cpu', type=int, default=0, help="CPU Mnemo pins itself to")
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    before = measure(LegacyMnemo, args.legacy_messages, args.latency_samples, args.cpu)
+    after = measure(Mnemo, args.messages, args.latency_samples, args.cpu, args.save_mode)
+    results = {
+        'benchmark': 'mnemo_loop',
+        'before': dict(before, messages=args.legacy_messages),
+        'after': dict(after, messages=args.messages, save_mode=args.save_mode),
+        'speedup': round(after['messages_per_second'] / before['messages_per_second'], 1),
+    }
+    print(f"before: {before['messages_per_second']:10.1f} messages/s  idle latency {before['idle_latency_ms_median']} ms")
+    print(f"after:  {after['messages_per_second']:10.1f} messages/s  idle latency {after['idle_latency_ms_median']} ms  ({results['speedup']}x)")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# spiral_core/benchmarks/bench_module_record.py
+"""
+Throughput of the Aion -> Kronos -> Moirai -> Nyx analysis path, before and after
+Aion's single-parse module record.
+
+    python -m spiral_core.benchmarks.bench_module_record --modules 2000
+
+"before" replays what each daemon used to do per module: Aion's ast.parse, Kronos's
+type regex, GoldenAnalyzer's double parse once per Moirai sister, and Nyx's six regexes.
+"after" builds the record once and has Kronos, Nyx and Hephaestus read it from its JSON
+sidecar; Moirai doesn't get records, and its sisters share one golden analysis.
+"""
+
+import re
+import ast
+import json
+import time
+import random
+import argparse
+
+from spiral_core.golden_fate import GoldenAnalyzer
+from spiral_core.module_record import build_module_record
+
+NYX_INDICATORS = [r"\bfor\s+\w+\s+in\b", r"\bclass\s+\w+:", r"\bimport\s+\w+", r"hephaestus", r"lethe", r"apollo"]
+
+
+def make_module(rng, index):
+    base = rng.choice(["Olympian", "Chthonic"])
+    functions = []
+    for f in range(rng.randint(2, 6)):
+        args = ", ".join(f"a{i}" for i in range(rng.randint(1, 3)))
+        body = "\n".join(f"        x{i} = {rng.randint(1, 99)} * {i}" for i in range(rng.randint(1, 6)))
+        functions.append(f"""    def step_{f}(self, {args}):
+        total = 0
+        for value in range({rng.randint(2, 9)}):
+            if value % 2 == 0:
+                total += value
+{body}
+        return total
+""")
+    return f"""import time
+import random
+from spiral_core.daemon_templates import {base}
+
+class Module{index}({base}):
+    \"\"\"Benchmark module {index}\"\"\"
+    def __init__(self):
+        super().__init__("module_{index}")
+
+{chr(10).join(functions)}
+"""
+
+
+def run_before(modules):
+    analyzer = GoldenAnalyzer()
+    for code in modules:
+        ast.parse(code)                                    # Aion._validate_syntax
+        re.search(r"class\s+\w+\(Olympian\):", code)       # Kronos._determine_daemon_type
+        re.search(r"class\s+\w+\(Chthonic\):", code)
+        for _ in range(3):                                 # clotho, lachesis, atropos
+            analyzer._check_syntax(code)
+            analyzer.analyze_thread(code)
+        for pattern in NYX_INDICATORS:                     # Nyx.should_obscure_file
+            re.search(pattern, code)
+
+
+def run_after(modules):
+    analyzer = GoldenAnalyzer()
+    for code in modules:
+        sidecar = json.dumps(build_module_record(code))    # Aion writes the record once
+        for _ in range(3):                                 # Kronos, Nyx, Hephaestus read it
+            json.loads(sidecar)
+        analyzer.analyze_thread(code)                      # Moirai._analysis_for, once for all sisters
+
+
+def measure(fn, modules, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(modules)
+        best = min(best, time.perf_counter() - start)
+    return len(modules) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1618)
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    modules = [make_module(rng, i) for i in range(args.modules)]
+
+    before = measure(run_before, modules, args.repeat)
+    after = measure(run_after, modules, args.repeat)
+    results = {
+        'benchmark': 'module_record',
+        'modules': args.modules,
+        'before_modules_per_second': round(before, 1),
+        'after_modules_per_second': round(after, 1),
+        'speedup': round(after / before, 2),
+    }
+    print(f"before: {before:10.1f} modules/s")
+    print(f"after:  {after:10.1f} modules/s  ({results['speedup']}x)")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+# spiral_core/benchmarks/bench_pipeline.py
+"""
+End-to-end pipeline throughput at several archive sizes.
+
+    python -m spiral_core.benchmarks.bench_pipeline --sizes 1000,100000,1000000 --json pipeline.json
+
+For each size, the Mnemo archive is pre-filled with that many modules (and the Lethe
+graveyard with a tenth as many, already past the decay window). Kairos's raw output is
+pre-filled with --inputs valid modules, so Aion accepts them and Kronos consolidates them
+into the archive; the modules Kairos forges during the run go through Aion as well.
+Erebus, Nyx and Tartarus churn the archive meanwhile. Everything runs in the headless
+simulation for --duration virtual seconds.
+
+Reported per size:
+- modules/s through the path (modules Aion processed per real second), with how many it
+  accepted and rejected, how many Kronos consolidated, and the archive churn
+- per-pulse latency percentiles per daemon
+- peak RSS
+
+Each size runs in its own spawned process, so peak RSS is per size. The JSON carries the
+git commit, to compare runs across commits. The exit status is 1 if a size failed or
+Kronos consolidated nothing, since the numbers then don't cover the whole path.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import multiprocessing
+import queue as queue_module
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then not reported.
+    resource = None
+
+from spiral_core.simulation import Simulation
+
+PIPELINE_DAEMONS = ('kairos', 'aion', 'kronos', 'erebus', 'nyx', 'tartarus')
+PERCENTILES = (50, 90, 99)
+# Seconds between checks that the child measuring a size is still alive.
+CHILD_POLL_SECONDS = 1.0
+
+MODULE_TEMPLATE = '''# Benchmark module {index}
+from spiral_core.daemon_templates import {base}
+
+class Bench{index}({base}):
+    def pulse(self):
+        for x in range({index} % 7 + 1):
+            self.logger.info(x)
+'''
+
+
+def populate(directory, count, prefix, mtime=None):
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        path = os.path.join(directory, f"{prefix}_{i:07d}.py")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(MODULE_TEMPLATE.format(index=i, base="Olympian" if i % 2 else "Chthonic"))
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+
+def count_files(*directories):
+    total = 0
+    for directory in directories:
+        try:
+            with os.scandir(directory) as it:
+                total += sum(1 for entry in it if entry.name.endswith('.py'))
+        except FileNotFoundError:
+            pass
+    return total
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {f"p{p}_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000.0, 3)
+              for p in PERCENTILES}
+    result['max_ms'] = round(ordered[-1] * 1000.0, 3)
+    result['mean_ms'] = round(sum(ordered) / len(ordered) * 1000.0, 3)
+    return result
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS, KiB elsewhere
+
+
+def measure(size, duration, seed, inputs, params=None):
+    params = dict({'master_seed': seed}, **(params or {}))
+    simulation = Simulation(params=params, daemons=PIPELINE_DAEMONS)
+    try:
+        setup_start = time.perf_counter()
+        # The simulation owns the working directory; fill it before the daemons start watching.
+        simulation.prepare()
+        p = simulation.params
+        populate(p.get('mnemo_archive_path', 'mnemo_archive/'), size, 'archived')
+        populate(p.get('lethe_graveyard_path', 'lethe_graveyard/'), size // 10, 'forgotten',
+                 mtime=time.time() - 2 * p.get('current_tartarus_decay_window_seconds', 3600.0))
+        populate(p.get('kairos_raw_output_path', 'kairos_raw_output/'), inputs, 'input')
+        populate_seconds = time.perf_counter() - setup_start
+        simulation.start()
+        startup_seconds = time.perf_counter() - setup_start - populate_seconds
+
+        summary = simulation.run(duration=duration)
+
+        kairos = simulation.daemons['kairos']
+        forged = kairos.creation_cycle
+        processed = forged + inputs - count_files(kairos.kairos_raw_output_path)
+        rejected = count_files(simulation.daemons['aion'].aion_rejected_path)
+        kronos = simulation.daemons['kronos']
+        consolidated = count_files(kronos.olympian_archive_path, kronos.chthonic_archive_path)
+        if kronos.packed_archive is not None:
+            consolidated += len(kronos.packed_archive.names())
+        archive_left = count_files(p.get('mnemo_archive_path', 'mnemo_archive/'))
+
+        return {
+            'size': size,
+            'virtual_seconds': summary['virtual_seconds'],
+            'real_seconds': summary['real_seconds'],
+            'populate_seconds': round(populate_seconds, 3),
+            'startup_seconds': round(startup_seconds, 3),
+            'modules_forged': forged,
+            'modules_input': inputs,
+            'modules_processed': processed,
+            'modules_accepted': processed - rejected,
+            'modules_rejected': rejected,
+            'modules_consolidated': consolidated,
+            'modules_per_second': round(processed / summary['real_seconds'], 1) if summary['real_seconds'] else None,
+            'archive_churn': size - archive_left,
+            'pulses': summary['pulses'],
+            'pulse_errors': summary['pulse_errors'],
+            'pulse_latency': {name: percentiles(samples) for name, samples in simulation.pulse_seconds.items()},
+            'peak_rss_kb': peak_rss_kb(),
+        }
+    finally:
+        simulation.close()
+
+
+def _measure_child(queue, size, duration, seed, inputs, params=None):
+    # Daemons log (and Aion warns) per module; that I/O would swamp the pulse latencies.
+    logging.disable(logging.WARNING)
+    try:
+        queue.put(measure(size, duration, seed, inputs, params))
+    except BaseException as e:
+        queue.put({'size': size, 'error': repr(e)})
+        raise
+
+
+def measure_isolated(size, duration, seed, inputs):
+    """
+    Runs measure() in a fresh interpreter, so peak RSS reflects this size alone.
+    A child that dies without reporting (OOM killer, segfault) yields an error entry.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure_child, args=(queue, size, duration, seed, inputs))
+    process.start()
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=CHILD_POLL_SECONDS)
+        except queue_module.Empty:
+            if process.is_alive():
+                continue
+            # It may have exited right after its last put; drain that before giving up.
+            try:
+                result = queue.get(timeout=CHILD_POLL_SECONDS)
+            except queue_module.Empty:
+                result = {'size': size, 'error': f"measuring process exited with code {process.exitcode} "
+                                                 f"without reporting"}
+    process.join()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,100000', help="Comma-separated archive sizes, e.g. 1000,100000,1000000")
+    parser.add_argument('--duration', type=float, default=120.0, help="Virtual seconds to simulate per size")
+    parser.add_argument('--seed', type=int, default=1, help="master_seed, so runs are comparable across commits")
+    parser.add_argument('--inputs', type=int, default=1000, help="Valid modules pre-filled into Kairos's raw output")
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {
+        'benchmark': 'pipeline',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'duration_virtual_seconds': args.duration,
+        'seed': args.seed,
+        'inputs': args.inputs,
+        'runs': [],
+    }
+    failed = False
+    for size in (int(s) for s in args.sizes.split(',')):
+        run = measure_isolated(size, args.duration, args.seed, args.inputs)
+        results['runs'].append(run)
+        if 'error' in run:
+            print(f"size {size:>9,}: failed: {run['error']}")
+            failed = True
+            continue
+        print(f"size {size:>9,}: {run['modules_per_second']:10.1f} modules/s  "
+              f"({run['modules_processed']} processed: {run['modules_accepted']} accepted, "
+              f"{run['modules_rejected']} rejected; {run['modules_consolidated']} consolidated, "
+              f"churn {run['archive_churn']})  peak RSS {run['peak_rss_kb']} KiB")
+        if run['modules_consolidated'] == 0:
+            print(f"size {size:>9,}: warning: Kronos consolidated nothing, so this run measured "
+                  f"only part of the path", file=sys.stderr)
+            failed = True
+        for name, latency in run['pulse_latency'].items():
+            if latency:
+                print(f"    {name:<9} p50 {latency['p50_ms']:9.3f} ms  p90 {latency['p90_ms']:9.3f} ms  "
+                      f"p99 {latency['p99_ms']:9.3f} ms  max {latency['max_ms']:9.3f} ms")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
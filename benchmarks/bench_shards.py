@@ -0,0 +1,97 @@
+# spiral_core/benchmarks/bench_shards.py
+"""
+Aggregate pipeline throughput as the spiral is split into shards.
+
+    python -m spiral_core.benchmarks.bench_shards --shards 1,2,4 --size 100000 --json shards.json
+
+For each shard count N, N headless simulations run at once, one per process, each being
+the node of shard i: its Kairos only forges names of its slice and its archive is
+pre-filled with size / N modules. Every node simulates the same --duration virtual
+seconds, so N shards do N times the work of one. Reported per N: the nodes' summed
+modules/s, the wall time of the slowest node, and the scaling efficiency against one
+shard (1.0 = linear). Efficiency is only meaningful with at least N free cores.
+"""
+
+import os
+import json
+import argparse
+import platform
+import multiprocessing
+from time import perf_counter
+
+from spiral_core.spiral_rng import derive_seed
+from spiral_core.benchmarks.bench_pipeline import _measure_child, git_commit
+
+
+def measure_shards(shard_count, size, duration, seed):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    processes = [
+        ctx.Process(target=_measure_child, args=(queue, size // shard_count, duration, seed, {
+            'shard_index': shard_index,
+            'shard_count': shard_count,
+            'master_seed': derive_seed(seed, 'shard', shard_index),
+        }))
+        for shard_index in range(shard_count)
+    ]
+    started = perf_counter()
+    for process in processes:
+        process.start()
+    runs = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    wall_seconds = perf_counter() - started
+
+    errors = [run['error'] for run in runs if 'error' in run]
+    if errors:
+        return {'shards': shard_count, 'error': errors[0]}
+    return {
+        'shards': shard_count,
+        'modules_processed': sum(run['modules_processed'] for run in runs),
+        'modules_per_second': round(sum(run['modules_per_second'] or 0.0 for run in runs), 1),
+        'slowest_node_seconds': max(run['real_seconds'] for run in runs),
+        'wall_seconds': round(wall_seconds, 3),
+        'peak_rss_kb': [run['peak_rss_kb'] for run in runs],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shards', default='1,2,4', help="Comma-separated shard counts")
+    parser.add_argument('--size', type=int, default=10000, help="Archive size, split across the shards")
+    parser.add_argument('--duration', type=float, default=120.0, help="Virtual seconds every node simulates")
+    parser.add_argument('--seed', type=int, default=1, help="Cluster master_seed; each node derives its own")
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {
+        'benchmark': 'shards',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'size': args.size,
+        'duration_virtual_seconds': args.duration,
+        'seed': args.seed,
+        'runs': [],
+    }
+    baseline = None
+    for shard_count in (int(s) for s in args.shards.split(',')):
+        run = measure_shards(shard_count, args.size, args.duration, args.seed)
+        results['runs'].append(run)
+        if 'error' in run:
+            print(f"{shard_count:3d} shards: failed: {run['error']}")
+            continue
+        if baseline is None:
+            baseline = run['modules_per_second'] / shard_count
+        run['scaling_efficiency'] = round(run['modules_per_second'] / (baseline * shard_count), 3) if baseline else None
+        print(f"{shard_count:3d} shards: {run['modules_per_second']:10.1f} modules/s  "
+              f"({run['modules_processed']} processed, slowest node {run['slowest_node_seconds']:.2f} s)  "
+              f"efficiency {run['scaling_efficiency']}")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
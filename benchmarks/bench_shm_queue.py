@@ -0,0 +1,108 @@
+# spiral_core/benchmarks/bench_shm_queue.py
+"""
+ShmRingQueue against multiprocessing.Queue, one producer process to one consumer.
+
+    python -m spiral_core.benchmarks.bench_shm_queue --sizes 1024,102400 --messages 20000 --json queue.json
+
+For each message size the producer (a spawned process) sends --messages payloads of
+that many bytes and the consumer takes them all. Transports:
+
+    mp_queue     multiprocessing.Queue put()/get()
+    shm          ShmRingQueue put()/get()
+    shm_batched  ShmRingQueue put_many()/get_many() in batches of --batch
+
+Reported: messages/s and MB/s, timed on the consumer from the producer's start signal
+to the last message.
+"""
+
+import os
+import json
+import argparse
+import platform
+import multiprocessing
+from time import perf_counter
+
+from spiral_core.shm_queue import ShmRingQueue
+from spiral_core.benchmarks.bench_pipeline import git_commit
+
+TRANSPORTS = ('mp_queue', 'shm', 'shm_batched')
+
+
+def _produce(queue, ready, size, messages, batch):
+    payload = os.urandom(size)
+    ready.wait()
+    if batch > 1:
+        for start in range(0, messages, batch):
+            queue.put_many([payload] * min(batch, messages - start))
+    else:
+        for _ in range(messages):
+            queue.put(payload)
+
+
+def measure(transport, size, messages, batch, slots, blob_capacity):
+    ctx = multiprocessing.get_context('spawn')
+    ready = ctx.Event()
+    shm_queue = None
+    if transport == 'mp_queue':
+        queue = ctx.Queue(maxsize=slots)
+    else:
+        shm_queue = queue = ShmRingQueue.create(f"spiral_bench_queue_{os.getpid()}", slots=slots,
+                                                slot_size=2048, blob_capacity=blob_capacity)
+    batch = batch if transport == 'shm_batched' else 1
+    producer = ctx.Process(target=_produce, args=(queue, ready, size, messages, batch))
+    try:
+        producer.start()
+        received = 0
+        start = perf_counter()
+        ready.set()
+        while received < messages:
+            if batch > 1:
+                received += len(queue.get_many(batch))
+            else:
+                queue.get()
+                received += 1
+        seconds = perf_counter() - start
+        producer.join()
+    finally:
+        if shm_queue is not None:
+            shm_queue.close()
+            shm_queue.unlink()
+    return {
+        'transport': transport,
+        'size': size,
+        'messages': messages,
+        'seconds': round(seconds, 4),
+        'messages_per_second': round(messages / seconds, 1),
+        'mb_per_second': round(messages * size / seconds / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1024,102400', help="Comma-separated message sizes in bytes")
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=64, help="Batch size for shm_batched")
+    parser.add_argument('--slots', type=int, default=1024, help="Queue capacity in messages")
+    parser.add_argument('--blob-capacity', type=int, default=256 * 1024 * 1024)
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {
+        'benchmark': 'shm_queue',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': [],
+    }
+    for size in (int(s) for s in args.sizes.split(',')):
+        for transport in TRANSPORTS:
+            run = measure(transport, size, args.messages, args.batch, args.slots, args.blob_capacity)
+            results['runs'].append(run)
+            print(f"{size:>8} B  {transport:<12}{run['messages_per_second']:12.1f} msg/s  {run['mb_per_second']:9.1f} MB/s")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
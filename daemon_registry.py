@@ -0,0 +1,41 @@
+# spiral_core/daemon_registry.py
+"""
+The spiral's daemons and what they may hold open, shared by everything that hosts
+them: the pooled runtime (spiral_runtime) and the headless simulation.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (name, module, class) in the order they are started; ties on the clock pulse in this order.
+DAEMONS = (
+    ('apollo', 'spiral_core.apollo', 'Apollo'),
+    ('kairos', 'spiral_core.kairos', 'Kairos'),
+    ('aion', 'spiral_core.aion', 'Aion'),
+    ('kronos', 'spiral_core.kronos', 'Kronos'),
+    ('erebus', 'spiral_core.erebus', 'Erebus'),
+    ('nyx', 'spiral_core.nyx', 'Nyx'),
+    ('tartarus', 'spiral_core.tartarus', 'Tartarus'),
+    ('lethe', 'spiral_core.lethe', 'Lethe'),
+    ('hephaestus', 'spiral_core.hephaestus', 'Hephaestus'),
+)
+
+# Pulse interval of a daemon whose <name>_pulse_interval param is missing.
+DEFAULT_PULSE_INTERVAL = 1.0
+
+# What a hosted daemon may hold open; closed (or shut down) when its host stops.
+DAEMON_RESOURCES = ('forge_pool', 'result_cache', 'archive_index', 'packed_archive', 'param_reader', 'param_segment')
+
+
+def close_daemon_resources(name, daemon, host):
+    """Shuts down or closes every DAEMON_RESOURCES attribute `daemon` holds, logging failures as `host`."""
+    for attribute in DAEMON_RESOURCES:
+        resource = getattr(daemon, attribute, None)
+        closer = getattr(resource, 'shutdown', None) or getattr(resource, 'close', None)
+        if closer is None:
+            continue
+        try:
+            closer()
+        except Exception as e:
+            logger.warning(f"{host}: Closing {name}'s {attribute} failed: {e}")
@@ -1,15 +1,29 @@
 # spiral_core/erebus.py
 
 import os
+import math
 import time
-import random
 import logging
 import json 
 import shutil 
 from datetime import datetime
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the per-pulse draw falls back to geometric skipping.
+    np = None
+
 # Changed to absolute import
 from spiral_core.daemon_templates import Chthonic, BaseDaemon 
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.archive_index import ArchiveIndex
+from spiral_core.module_record import invalidate_module_record, remove_module
+from spiral_core.forge_cache import ForgeResultCache
+from spiral_core.genesis_loader import GenesisLoader
+from spiral_core.param_segment import ParamSegmentReader
+from spiral_core.spiral_rng import SpiralRNG
+from spiral_core.pulse_scheduler import adaptive_pulse
+from spiral_core.pulse_metrics import instrumented_pulse, file_written
 
 class Erebus(Chthonic): 
     """
@@ -26,55 +40,89 @@ class Erebus(Chthonic):
         self.mnemo_archive_path = self.params.get('mnemo_archive_path', 'mnemo_archive/')
         
         os.makedirs(self.mnemo_archive_path, exist_ok=True)
+        self.archive_index = ArchiveIndex.from_params(self.params)
+        self.archive_watcher = watch_directory(self.mnemo_archive_path, backend=self.params.get('archive_watch_backend', 'auto'))
+        self.result_cache = ForgeResultCache.from_params(self.params)
 
         self.chaos_intensity = self.params.get('current_erebus_chaos_intensity', 0.001)
         self.deletion_chance = self.params.get('current_erebus_deletion_chance', 0.01)
 
+        # Apollo rescales the current_* parameters.
+        self.genesis_loader = GenesisLoader()
+        self.genesis_loader.follow(self)
+        self.param_reader = ParamSegmentReader.from_params(self.params)
+        # Seeded per generation from master_seed, so a run's chaos can be replayed exactly.
+        self.rng = SpiralRNG.from_params(self.params, "erebus")
+
+
+    def _on_params_changed(self, params, changed):
+        self.chaos_intensity = self.params.get('current_erebus_chaos_intensity', self.chaos_intensity)
+        self.deletion_chance = self.params.get('current_erebus_deletion_chance', self.deletion_chance)
 
     def _corrupt_file(self, filepath: str):
-        """Simulates file corruption by altering a small part of its content."""
+        """
+        Simulates file corruption by overwriting a short run of bytes in place.
+        Only the changed bytes are written (os.pwrite); the rest of the file is never read.
+        """
         try:
-            # Robustness: Check if file exists before opening
-            if not os.path.exists(filepath):
-                self.logger.debug(f"Erebus: File disappeared before corruption attempt: {os.path.basename(filepath)}. Skipping.")
-                return False
-
-            with open(filepath, 'r+', encoding='utf-8') as f:
-                content = f.read()
-                if not content:
-                    self.logger.debug(f"Erebus: Skipping corruption of empty file {os.path.basename(filepath)}.")
-                    return False
-
-                pos = random.randint(0, max(0, len(content) - 1))
-                chaos_char = random.choice(['#', '@', '$', '%', '&', '*', '!', '?', 'X'])
-                
-                corruption_length = random.randint(1, min(5, len(content) - pos))
-                corrupted_segment = chaos_char * corruption_length
-                
-                new_content = list(content)
-                new_content[pos:pos+corruption_length] = list(corrupted_segment)
-                new_content = "".join(new_content)
-
-                f.seek(0)
-                f.write(new_content)
-                f.truncate()
-                self.logger.info(f"Erebus: Corrupted file {os.path.basename(filepath)} at position {pos}.")
-                return True
+            fd = os.open(filepath, os.O_RDWR)
         except FileNotFoundError:
-            self.logger.warning(f"Erebus: File disappeared during corruption attempt: {os.path.basename(filepath)}. Skipping.")
+            self.logger.debug(f"Erebus: File disappeared before corruption attempt: {os.path.basename(filepath)}. Skipping.")
             return False
+        except Exception as e:
+            self.logger.error(f"Erebus: Failed to open {os.path.basename(filepath)} for corruption: {e}", exc_info=True)
+            return False
+
+        try:
+            size = os.fstat(fd).st_size
+            if not size:
+                self.logger.debug(f"Erebus: Skipping corruption of empty file {os.path.basename(filepath)}.")
+                return False
+
+            pos = self.rng.randint(0, size - 1)
+            chaos_char = self.rng.choice(['#', '@', '$', '%', '&', '*', '!', '?', 'X'])
+            corruption_length = self.rng.randint(1, min(5, size - pos))
+            pos, corruption_length = self._align_to_characters(fd, pos, corruption_length, size)
+
+            os.pwrite(fd, chaos_char.encode('ascii') * corruption_length, pos)
+            file_written(corruption_length)
         except Exception as e:
             self.logger.error(f"Erebus: Failed to corrupt file {os.path.basename(filepath)}: {e}", exc_info=True)
             return False
+        finally:
+            os.close(fd)
+
+        # Aion's record describes the old bytes; drop it so readers fall back to the file.
+        invalidate_module_record(filepath)
+        # Likewise Hephaestus's cached outcomes for this file no longer apply.
+        if self.result_cache is not None:
+            self.result_cache.invalidate_file(os.path.basename(filepath))
+        self.logger.info(f"Erebus: Corrupted file {os.path.basename(filepath)} at position {pos}.")
+        return True
+
+    def _align_to_characters(self, fd, pos, length, size):
+        """
+        Widens the byte range [pos, pos + length) so it starts and ends on UTF-8 character
+        boundaries, keeping the file decodable. Reads at most a few bytes around the range.
+        """
+        window_start = max(0, pos - 3)
+        window = os.pread(fd, min(size, pos + length + 3) - window_start, window_start)
+        is_continuation = lambda i: 0 <= i - window_start < len(window) and (window[i - window_start] & 0xC0) == 0x80
+        end = pos + length
+        while pos > window_start and is_continuation(pos):
+            pos -= 1
+        while end < size and is_continuation(end):
+            end += 1
+        return pos, end - pos
 
     def _delete_file(self, filepath: str):
-        """Simulates file deletion."""
+        """Simulates file deletion. The caller drops the index entry (pulse batches them)."""
         try:
             # Robustness: Check if file exists before deleting
             if not os.path.exists(filepath):
                 self.logger.debug(f"Erebus: File disappeared before deletion attempt: {os.path.basename(filepath)}. Skipping.")
                 return False
-            os.remove(filepath)
+            remove_module(filepath)
             self.logger.info(f"Erebus: Deleted file {os.path.basename(filepath)}.")
             return True
         except FileNotFoundError:
@@ -84,38 +132,80 @@ class Erebus(Chthonic):
             self.logger.error(f"Erebus: Failed to delete file {os.path.basename(filepath)}: {e}", exc_info=True)
             return False
 
+    def _draw_targets(self, file_count):
+        """
+        Decides the whole pulse at once: returns (indices to delete, indices to corrupt)
+        into the archive listing, with the same per-file probabilities as drawing one
+        random number per file.
+        With NumPy this is one vectorized draw. Without it, the gaps between hits are drawn
+        from the geometric distribution, so the cost scales with the number of hits rather
+        than the number of files.
+        """
+        deletion_chance = max(0.0, self.deletion_chance)
+        hit_chance = min(1.0, deletion_chance + max(0.0, self.chaos_intensity))
+        if hit_chance <= 0.0 or file_count == 0:
+            return [], []
+
+        np_rng = self.rng.numpy_generator() if np is not None else None
+        if np_rng is not None:
+            draws = np_rng.random(file_count)
+            to_delete = np.flatnonzero(draws < deletion_chance)
+            to_corrupt = np.flatnonzero((draws >= deletion_chance) & (draws < hit_chance))
+            return to_delete.tolist(), to_corrupt.tolist()
+
+        to_delete, to_corrupt = [], []
+        delete_share = deletion_chance / hit_chance
+        log_miss = math.log(1.0 - hit_chance) if hit_chance < 1.0 else None
+        index = -1
+        while True:
+            if log_miss is None:
+                index += 1
+            else:
+                index += 1 + int(math.log(1.0 - self.rng.random()) / log_miss)
+            if index >= file_count:
+                break
+            (to_delete if self.rng.random() < delete_share else to_corrupt).append(index)
+        return to_delete, to_corrupt
+
+    def pulse_backlog(self):
+        """Idle (0) while the archive is empty; otherwise the base interval (None) applies."""
+        return None if self.archive_watcher.files else 0
+
+    @instrumented_pulse
+    @adaptive_pulse
     def pulse(self):
         """
         Erebus's main pulse function.
         Introduces random corruption or deletion into files in the Mnemo Archive.
         """
         self.logger.info("Erebus Pulse: Injecting chaos into Mnemo Archive.")
+        self.param_reader.sync(self.genesis_loader)
+        self.rng.advance(self.params.get('current_generation', 0))
 
-        # Get a list of files. This list might become stale due to race conditions.
-        files_in_archive = [f for f in os.listdir(self.mnemo_archive_path) if f.endswith('.py')]
+        # The watcher's picture might become stale due to race conditions.
+        # Sorted, so the same draws hit the same files when a run is replayed.
+        files_in_archive = sorted(self.archive_watcher.snapshot())
 
         if not files_in_archive:
             self.logger.info("Erebus: No Python files found in Mnemo Archive to inject chaos into.")
             return
 
-        affected_count = 0
-        for filename in files_in_archive:
-            filepath = os.path.join(self.mnemo_archive_path, filename)
-            
-            # Each operation on the file needs to check if it still exists
-            # The _corrupt_file and _delete_file methods now handle FileNotFoundError internally
-            action_choice = random.random()
-            
-            if action_choice < self.deletion_chance:
-                if self._delete_file(filepath):
-                    affected_count += 1
-            elif action_choice < (self.deletion_chance + self.chaos_intensity): 
-                if self._corrupt_file(filepath):
-                    affected_count += 1
-            else:
-                self.logger.debug(f"Erebus: Skipping {os.path.basename(filepath)} for this pulse.")
-        
-        self.logger.info(f"Erebus pulse completed. Affected {affected_count} files.")
+        to_delete, to_corrupt = self._draw_targets(len(files_in_archive))
+
+        # _corrupt_file and _delete_file handle files that vanished since the snapshot.
+        deleted = []
+        for i in to_delete:
+            if self._delete_file(os.path.join(self.mnemo_archive_path, files_in_archive[i])):
+                deleted.append(files_in_archive[i])
+        self.archive_index.remove_many(deleted)
+
+        corrupted_count = 0
+        for i in to_corrupt:
+            if self._corrupt_file(os.path.join(self.mnemo_archive_path, files_in_archive[i])):
+                corrupted_count += 1
+
+        affected_count = len(deleted) + corrupted_count
+        self.logger.info(f"Erebus pulse completed. Affected {affected_count} files ({len(deleted)} deleted, {corrupted_count} corrupted) out of {len(files_in_archive)}.")
 
 
 if __name__ == '__main__':
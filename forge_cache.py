@@ -0,0 +1,149 @@
+# spiral_core/forge_cache.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stdout TEXT,
+    stderr TEXT,
+    error_message TEXT,
+    created_at REAL,
+    hits INTEGER DEFAULT 0,
+    used_at REAL
+);
+CREATE TABLE IF NOT EXISTS file_keys (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (name, key)
+);
+CREATE INDEX IF NOT EXISTS idx_file_keys_key ON file_keys(key);
+"""
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_results_used_at ON results(used_at);
+"""
+
+# Only outcomes determined by the code itself are cached; limits and crashes depend on the host.
+CACHEABLE_STATUSES = ("success", "syntax_error", "runtime_error")
+
+
+class ForgeResultCache:
+    """
+    Content-addressed cache of Hephaestus experiment outcomes.
+    Entries are keyed by a hash of the module's source plus the sandbox globals profile,
+    so re-testing unchanged code returns the stored status and output without running it.
+    Each entry also remembers which archive files produced it, so Erebus can drop it
+    the moment it corrupts one of them.
+    With max_entries set, the least recently used entries are evicted once puts take
+    the cache past it (checked every max_entries // 16 puts, so it may briefly hold
+    that many more).
+    """
+
+    def __init__(self, db_path='hephaestus_result_cache.sqlite3', max_entries=None):
+        self.db_path = db_path
+        self.max_entries = max_entries or None
+        self._evict_every = max(1, (self.max_entries or 0) // 16)
+        self._puts_since_evict = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+        if 'used_at' not in columns:
+            # A cache from before eviction: its entries count as used when they were created.
+            self._conn.execute("ALTER TABLE results ADD COLUMN used_at REAL")
+            self._conn.execute("UPDATE results SET used_at = created_at")
+        self._conn.executescript(INDEXES)
+        logger.info(f"ForgeResultCache opened at {db_path}")
+
+    @classmethod
+    def from_params(cls, params):
+        """Returns the cache configured in genesis params, or None when it is disabled."""
+        if not params.get('hephaestus_result_cache_enabled', True):
+            return None
+        return cls(params.get('hephaestus_result_cache_path', 'hephaestus_result_cache.sqlite3'),
+                   max_entries=params.get('hephaestus_result_cache_max_entries', 10000))
+
+    @staticmethod
+    def key_for(code_content, profile):
+        digest = hashlib.sha256()
+        digest.update(profile.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(code_content.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key, tested_file=None):
+        """Returns a copy of the cached report for `key`, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, stdout, stderr, error_message FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET hits = hits + 1, used_at = ? WHERE key = ?", (time.time(), key))
+            if tested_file is not None:
+                self._conn.execute("INSERT OR IGNORE INTO file_keys (name, key) VALUES (?, ?)", (tested_file, key))
+        status, stdout, stderr, error_message = row
+        return {"status": status, "stdout": stdout, "stderr": stderr, "error_message": error_message}
+
+    def put(self, key, tested_file, report):
+        if report.get('status') not in CACHEABLE_STATUSES:
+            return False
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO results (key, status, stdout, stderr, error_message, created_at, hits, used_at)
+                VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+                """,
+                (key, report['status'], report.get('stdout', ''), report.get('stderr', ''),
+                 report.get('error_message', ''), now, now))
+            self._conn.execute("INSERT OR IGNORE INTO file_keys (name, key) VALUES (?, ?)", (tested_file, key))
+            self._puts_since_evict += 1
+            if self.max_entries is not None and self._puts_since_evict >= self._evict_every:
+                self._puts_since_evict = 0
+                self._evict_locked()
+        return True
+
+    def _evict_locked(self):
+        """Drops the least recently used entries beyond max_entries. Holds _lock."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            victims = [(key,) for (key,) in self._conn.execute(
+                "SELECT key FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?", (self.max_entries,))]
+            if victims:
+                self._conn.executemany("DELETE FROM results WHERE key = ?", victims)
+                self._conn.executemany("DELETE FROM file_keys WHERE key = ?", victims)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        if victims:
+            logger.debug(f"ForgeResultCache evicted {len(victims)} least recently used entries.")
+        return len(victims)
+
+    def invalidate_file(self, name):
+        """Drops every cached result produced by the file called `name`."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM file_keys WHERE name = ?)", (name,))
+                self._conn.execute("DELETE FROM file_keys WHERE name = ?", (name,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
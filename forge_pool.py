@@ -0,0 +1,474 @@
+# spiral_core/forge_pool.py
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import signal
+import atexit
+import bisect
+import logging
+import threading
+import traceback
+import contextlib
+import collections
+import multiprocessing
+from multiprocessing.connection import wait
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; CPU limits are then wall-time only.
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class CpuLimitExceeded(BaseException):
+    """
+    Raised inside a worker when an experiment exhausts its CPU budget.
+    Derives from BaseException so generated code's `except Exception` cannot swallow it.
+    """
+
+
+def sandbox_globals():
+    """The globals every experiment starts from, matching Hephaestus's in-process sandbox."""
+    return {
+        '__builtins__': __builtins__,
+        'os': os,
+        'sys': sys,
+        'random': random,
+        'time': time,
+        'json': json,
+    }
+
+
+def sandbox_profile():
+    """
+    Describes what an experiment can see besides its own source: the sandbox globals
+    and the interpreter version. Part of the result-cache key, so cached outcomes are
+    never reused across a change to either.
+    """
+    names = ",".join(sorted(name for name in sandbox_globals() if name != '__builtins__'))
+    return f"python{sys.version_info[0]}.{sys.version_info[1]}|globals:{names}"
+
+
+def run_in_sandbox(code_content, sandbox_path, seed=None):
+    """
+    Executes code with cwd set to `sandbox_path` and stdout/stderr captured.
+    Returns the execution report (status, stdout, stderr, error_message).
+    Mutates process-wide state (cwd, sys.stdout), so only one call may run per process.
+    With a `seed` (Hephaestus passes the experiment id) the random module the code sees
+    is reseeded first, so a replayed experiment makes the same draws.
+    """
+    if seed is not None:
+        random.seed(seed)
+    exec_globals = sandbox_globals()
+    exec_locals = {}
+    redirected_output = io.StringIO()
+    redirected_error = io.StringIO()
+
+    execution_result = "unknown"
+    error_message = ""
+    original_cwd = os.getcwd()
+    try:
+        with contextlib.redirect_stdout(redirected_output), contextlib.redirect_stderr(redirected_error):
+            try:
+                os.chdir(sandbox_path)
+                exec(code_content, exec_globals, exec_locals)
+                execution_result = "success"
+            except SyntaxError as e:
+                execution_result = "syntax_error"
+                error_message = f"Syntax Error: {e}"
+            except (Exception, SystemExit) as e:
+                execution_result = "runtime_error"
+                error_message = f"Runtime Error: {traceback.format_exc()}"
+    finally:
+        os.chdir(original_cwd)
+
+    return {
+        "status": execution_result,
+        "stdout": redirected_output.getvalue(),
+        "stderr": redirected_error.getvalue(),
+        "error_message": error_message
+    }
+
+
+def _raise_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def _set_cpu_budget(cpu_seconds):
+    """Lowers RLIMIT_CPU's soft limit to this process's usage so far plus `cpu_seconds`."""
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _install_cpu_limit_handler():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, 'SIGXCPU'):
+        signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+
+
+def _run_experiment(code_content, sandbox_path, cpu_seconds, seed=None):
+    try:
+        _set_cpu_budget(cpu_seconds)
+        report = run_in_sandbox(code_content, sandbox_path, seed)
+    except CpuLimitExceeded:
+        report = {
+            "status": "cpu_limit_exceeded",
+            "stdout": "",
+            "stderr": "",
+            "error_message": f"Experiment exceeded its CPU budget of {cpu_seconds}s."
+        }
+    report['worker_pid'] = os.getpid()
+    return report
+
+
+def _worker_main(conn, cpu_seconds):
+    """
+    Pool worker loop: receives (experiment_id, code, sandbox_path) and sends back
+    (started_at, report). started_at is CLOCK_MONOTONIC, which is system-wide on Linux.
+    """
+    _install_cpu_limit_handler()
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        started_at = time.monotonic()
+        experiment_id, code_content, sandbox_path = task
+        report = _run_experiment(code_content, sandbox_path, cpu_seconds, experiment_id)
+        try:
+            conn.send((started_at, report))
+        except (BrokenPipeError, OSError):
+            break
+
+
+def _forked_experiment(conn, experiment_id, code_content, sandbox_path, cpu_seconds):
+    """Entry point of a single experiment forked from the warm fork-server template."""
+    started_at = time.monotonic()
+    _install_cpu_limit_handler()
+    report = _run_experiment(code_content, sandbox_path, cpu_seconds, experiment_id)
+    try:
+        conn.send((started_at, report))
+    finally:
+        conn.close()
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of experiment startup latency, in milliseconds."""
+
+    BOUNDS_MS = (0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms):
+        index = bisect.bisect_left(self.BOUNDS_MS, latency_ms)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def snapshot(self):
+        buckets = {f"<={bound}ms": n for bound, n in zip(self.BOUNDS_MS, self.counts)}
+        buckets[f">{self.BOUNDS_MS[-1]}ms"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets
+        }
+
+
+def _stop_process(process, conn, kill):
+    """Ends a retired worker process (killing it first if `kill`) and closes its pipe."""
+    try:
+        if kill and process.is_alive():
+            process.kill()
+        process.join(timeout=1)
+    finally:
+        conn.close()
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.task = None          # (experiment_id, metadata) while busy
+        self.started_at = None    # when the experiment was handed to this worker
+
+
+class ForgePool:
+    """
+    Pre-forked worker processes for Hephaestus experiments.
+    Each worker owns its cwd and stdout, so N experiments run at once; submissions wait
+    in a bounded queue, and each experiment is held to a CPU and a wall-time limit.
+    A dispatcher thread hands queued work to idle workers as soon as they free up,
+    so throughput does not depend on how often Hephaestus pulses. It sleeps on a
+    condition while nothing is running, and kills, joins and replaces workers without
+    holding the lock submit() and collect() take.
+    """
+
+    def __init__(self, workers, queue_size=None, cpu_seconds=5.0, wall_seconds=10.0):
+        self.worker_count = max(1, int(workers))
+        self.queue_size = self.worker_count * 2 if queue_size is None else int(queue_size)
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self.startup_latency = LatencyHistogram()
+        self._backlog = collections.deque()
+        self._finished = []
+        self._workers = []
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)  # notified when an experiment starts
+        self._running = True
+        self._ctx = self._make_context()
+        for _ in range(self.worker_count):
+            self._workers.append(self._spawn_worker())
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="forge-pool-dispatcher", daemon=True)
+        self._dispatcher.start()
+        atexit.register(self.shutdown)
+        logger.info(f"{type(self).__name__} started {self.worker_count} workers (queue {self.queue_size}, "
+                    f"cpu {self.cpu_seconds}s, wall {self.wall_seconds}s).")
+
+    def _make_context(self):
+        return multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+
+    def _spawn_worker(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child_conn, self.cpu_seconds),
+                                    name="hephaestus-forge-worker", daemon=True)
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _start(self, worker, experiment_id, code_content, sandbox_path):
+        worker.conn.send((experiment_id, code_content, sandbox_path))
+
+    def _retire(self, worker, failed):
+        """
+        Called holding _lock after a worker's experiment ended. A failed worker is taken
+        out of service; returns its (process, conn, kill) for _cleanup(), else None.
+        """
+        if not failed:
+            return None
+        self._workers.remove(worker)
+        return worker.process, worker.conn, True
+
+    def _cleanup(self, retired):
+        """Called without _lock: stops the retired workers, then forks their replacements."""
+        for process, conn, kill in retired:
+            _stop_process(process, conn, kill)
+        replacements = [self._spawn_worker() for _ in retired]
+        with self._lock:
+            if self._running:
+                self._workers.extend(replacements)
+                self._dispatch()
+                return
+        for worker in replacements:
+            _stop_process(worker.process, worker.conn, kill=True)
+
+    def in_flight(self):
+        with self._lock:
+            return self._in_flight()
+
+    def _in_flight(self):
+        return len(self._backlog) + sum(1 for w in self._workers if w.task is not None)
+
+    def free_capacity(self):
+        """How many more experiments can be submitted right now."""
+        with self._lock:
+            return max(0, self.worker_count + self.queue_size - self._in_flight())
+
+    def submit(self, experiment_id, code_content, sandbox_path, metadata=None):
+        """Queues an experiment. Returns False, without queueing, when the pool is saturated."""
+        with self._lock:
+            if self.worker_count + self.queue_size - self._in_flight() <= 0:
+                return False
+            self._backlog.append((experiment_id, code_content, sandbox_path, metadata))
+            self._dispatch()
+            self._work.notify()
+            return True
+
+    def _dispatch(self):
+        for worker in self._workers:
+            if not self._backlog:
+                break
+            if worker.task is None:
+                experiment_id, code_content, sandbox_path, metadata = self._backlog.popleft()
+                worker.task = (experiment_id, metadata)
+                worker.started_at = time.monotonic()
+                self._start(worker, experiment_id, code_content, sandbox_path)
+
+    def _finish(self, worker, report, child_started_at=None):
+        experiment_id, metadata = worker.task
+        if child_started_at is not None:
+            latency_ms = max(0.0, (child_started_at - worker.started_at) * 1000.0)
+            self.startup_latency.record(latency_ms)
+            report['startup_latency_ms'] = round(latency_ms, 3)
+        report['wall_seconds'] = round(time.monotonic() - worker.started_at, 6)
+        report['startup_latency_histogram'] = self.startup_latency.snapshot()
+        worker.task = None
+        worker.started_at = None
+        return experiment_id, report, metadata
+
+    def collect(self):
+        """
+        Returns [(experiment_id, report, metadata)] for every experiment that finished,
+        timed out or lost its worker since the last call.
+        """
+        with self._lock:
+            finished, self._finished = self._finished, []
+        return finished
+
+    def _dispatch_loop(self):
+        while True:
+            with self._work:
+                busy = [w.conn for w in self._workers if w.task is not None]
+                while self._running and not busy:
+                    self._work.wait()
+                    busy = [w.conn for w in self._workers if w.task is not None]
+                if not self._running:
+                    return
+            wait(busy, timeout=0.05)
+            with self._lock:
+                if not self._running:
+                    return
+                finished, retired, crashed = self._reap()
+                self._finished.extend(finished)
+            if retired:
+                self._cleanup(retired)
+            if crashed:
+                # Joined by _cleanup(), so the exit code is known now.
+                for (_, report, _), process in crashed:
+                    report['error_message'] = f"Forge worker exited with code {process.exitcode}."
+                with self._lock:
+                    self._finished.extend(entry for entry, _ in crashed)
+
+    def _reap(self):
+        """
+        Receives finished reports, enforces wall-time limits and refills idle workers.
+        Returns (finished, retired, crashed): the retired workers go to _cleanup() after
+        the lock, and crashed holds (finished entry, process) for workers that died.
+        """
+        finished = []
+        retired = []
+        crashed = []
+
+        def release(worker, failed):
+            stopped = self._retire(worker, failed)
+            if stopped is not None:
+                retired.append(stopped)
+
+        busy = {w.conn: w for w in self._workers if w.task is not None}
+        if busy:
+            for conn in wait(list(busy), timeout=0):
+                worker = busy[conn]
+                try:
+                    child_started_at, report = conn.recv()
+                    finished.append(self._finish(worker, report, child_started_at))
+                    release(worker, failed=False)
+                except (EOFError, OSError):
+                    report = {"status": "worker_crashed", "stdout": "", "stderr": "", "error_message": None}
+                    crashed.append((self._finish(worker, report), worker.process))
+                    release(worker, failed=True)
+
+        now = time.monotonic()
+        for worker in list(self._workers):
+            if worker.task is not None and self.wall_seconds and now - worker.started_at > self.wall_seconds:
+                report = {"status": "wall_time_exceeded", "stdout": "", "stderr": "",
+                          "error_message": f"Experiment exceeded its wall-time limit of {self.wall_seconds}s."}
+                finished.append(self._finish(worker, report))
+                release(worker, failed=True)
+
+        self._dispatch()
+        return finished, retired, crashed
+
+    def shutdown(self):
+        with self._work:
+            self._running = False
+            self._work.notify_all()
+        if self._dispatcher.is_alive() and self._dispatcher is not threading.current_thread():
+            self._dispatcher.join(timeout=1)
+        for worker in self._workers:
+            if worker.conn is None:
+                continue
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.kill()
+            worker.conn.close()
+        self._workers = []
+        self._backlog.clear()
+
+
+# Modules every generated experiment imports; the fork-server template imports them once.
+FORKSERVER_PRELOAD = [
+    '__main__',  # lets forked children skip re-importing the daemon's main module
+    'spiral_core.daemon_templates',
+    'spiral_core.forge_pool',
+    'logging', 'time', 'os', 'random', 'json', 'math', 'subprocess',
+]
+
+
+class ForkServerForge(ForgePool):
+    """
+    Runs every experiment in a fresh process forked from a warm fork-server template
+    that has already imported spiral_core and the common stdlib modules, so startup is a
+    copy-on-write fork instead of an interpreter launch. Up to `workers` experiments run
+    at once; the rest wait in the same bounded queue as ForgePool.
+    """
+
+    def __init__(self, workers, queue_size=None, cpu_seconds=5.0, wall_seconds=10.0, preload=None):
+        self.preload = list(FORKSERVER_PRELOAD if preload is None else preload)
+        super().__init__(workers, queue_size=queue_size, cpu_seconds=cpu_seconds, wall_seconds=wall_seconds)
+
+    def _make_context(self):
+        ctx = multiprocessing.get_context('forkserver')
+        # Import errors in the preload list are ignored by the fork server.
+        ctx.set_forkserver_preload(self.preload)
+        return ctx
+
+    def _spawn_worker(self):
+        # Slots only; a process is forked per experiment in _start.
+        return _Worker(None, None)
+
+    def _start(self, worker, experiment_id, code_content, sandbox_path):
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(target=_forked_experiment,
+                                    args=(child_conn, experiment_id, code_content, sandbox_path, self.cpu_seconds),
+                                    name=f"hephaestus-experiment-{experiment_id}", daemon=True)
+        process.start()
+        child_conn.close()
+        worker.process = process
+        worker.conn = parent_conn
+
+    def _retire(self, worker, failed):
+        # The slot is free again at once; its process is joined (or killed) by _cleanup().
+        stopped = worker.process, worker.conn, failed
+        worker.process = None
+        worker.conn = None
+        return stopped
+
+    def _cleanup(self, retired):
+        for process, conn, kill in retired:
+            _stop_process(process, conn, kill)
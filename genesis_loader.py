@@ -2,65 +2,220 @@
 import json
 import os
 import logging
+import tempfile
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Points every loader in the process (and its child daemons) at another params file,
+# e.g. a simulation's private copy.
+GENESIS_PARAMS_ENV = 'SPIRAL_GENESIS_PARAMS'
+
 class GenesisLoader:
     """
     Handles loading and managing parameters from genesis_params.json.
     This acts as the central source of truth for all configurable parameters
     of the Spiral Engine, including fixed pulse intervals and dynamic thresholds.
+
+    Reads are cached and only re-parse the file when its stat signature (mtime, size,
+    inode) changes. Writes are staged, coalesced and flushed atomically (temp file plus
+    rename), so a reader never sees a half-written file. Subscribers are called with
+    (params, changed_keys) whenever a reload or flush changes values.
     """
     def __init__(self, file_path='genesis_params.json'):
+        self.file_path = self._resolve_path(file_path)
+        self.params = {}
+        self.version = 0
+        self._signature = None
+        self._pending = {}
+        self._pending_changed = set()
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._load_params()
+        logger.info(f"GenesisLoader initialized, loading params from: {self.file_path}")
+
+    @staticmethod
+    def _resolve_path(file_path):
+        if os.environ.get(GENESIS_PARAMS_ENV):
+            return os.path.abspath(os.environ[GENESIS_PARAMS_ENV])
         # Determine the project root dynamically
         # This assumes genesis_params.json is in the directory above spiral_core
         current_dir = os.path.dirname(os.path.abspath(__file__))
         project_root = os.path.dirname(current_dir) # Go up one level from spiral_core
+        return os.path.join(project_root, file_path)
 
-        self.file_path = os.path.join(project_root, file_path)
-        self.params = {}
-        self._load_params()
-        logger.info(f"GenesisLoader initialized, loading params from: {self.file_path}")
+    @classmethod
+    def read_params(cls, file_path='genesis_params.json'):
+        """
+        The parameters in the file, read once, for code that only needs a snapshot.
+        Unlike a loader it never creates the file: a missing file gives {}.
+        """
+        try:
+            with open(cls._resolve_path(file_path), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
 
     def _load_params(self):
-        """Loads parameters from the JSON file."""
-        if not os.path.exists(self.file_path):
-            logger.error(f"Genesis parameters file not found at: {self.file_path}")
-            # Create a default if it doesn't exist to prevent errors,
-            # though the user should ideally create it manually based on README.
-            self.params = self._get_default_params()
-            self._save_params() # Save the default params
-            logger.warning("Created default genesis_params.json. Please review and customize it.")
-        else:
+        """
+        Loads parameters from the JSON file if it changed since the last load.
+        Returns the set of keys whose values changed.
+        """
+        with self._lock:
+            signature = self._stat_signature()
+            if signature is None:
+                logger.error(f"Genesis parameters file not found at: {self.file_path}")
+                # Create a default if it doesn't exist to prevent errors,
+                # though the user should ideally create it manually based on README.
+                self.params = self._get_default_params()
+                self._save_params() # Save the default params
+                logger.warning("Created default genesis_params.json. Please review and customize it.")
+                return set(self.params)
+            if signature == self._signature:
+                return set()
             try:
                 with open(self.file_path, 'r') as f:
-                    self.params = json.load(f)
+                    loaded = json.load(f)
             except json.JSONDecodeError as e:
-                logger.critical(f"Error decoding genesis_params.json: {e}")
-                raise
+                if not self.params:
+                    logger.critical(f"Error decoding genesis_params.json: {e}")
+                    raise
+                # Writes are atomic, so this is a hand edit in progress; keep the last good params.
+                logger.error(f"Error decoding genesis_params.json, keeping previously loaded parameters: {e}")
+                return set()
             except Exception as e:
                 logger.critical(f"An unexpected error occurred loading genesis_params.json: {e}")
                 raise
 
+            # Staged-but-unflushed updates stay in effect over what's on disk.
+            loaded.update(self._pending)
+            changed = {key for key in set(loaded) | set(self.params) if loaded.get(key) != self.params.get(key)}
+            self.params = loaded
+            self._signature = signature
+            if changed:
+                self.version += 1
+            return changed
+
     def _save_params(self):
-        """Saves current parameters back to the JSON file."""
+        """Atomically replaces the JSON file with the current parameters."""
+        directory = os.path.dirname(self.file_path) or '.'
         try:
-            with open(self.file_path, 'w') as f:
-                json.dump(self.params, f, indent=4)
+            fd, tmp_path = tempfile.mkstemp(prefix='.genesis_params.', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self.params, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.file_path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+            self._signature = self._stat_signature()
+            self.version += 1
+            return True
         except Exception as e:
             logger.error(f"Error saving genesis_params.json: {e}")
+            return False
+
+    def _notify(self, changed, params=None):
+        if not changed:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(self.params if params is None else params, changed)
+            except Exception as e:
+                logger.error(f"Genesis parameter subscriber {callback!r} failed: {e}", exc_info=True)
+
+    def refresh(self):
+        """
+        Reloads the file if another process changed it (one stat call otherwise)
+        and notifies subscribers. Returns the set of changed keys.
+        """
+        changed = self._load_params()
+        self._notify(changed)
+        return changed
 
     def get_params(self):
-        """Returns the currently loaded parameters. Refreshes from file to get latest."""
-        self._load_params() # Always reload to get the latest from disk
+        """Returns the currently loaded parameters, reloaded only if the file changed on disk."""
+        self.refresh()
         return self.params
 
+    def stage(self, new_params):
+        """
+        Applies updates to the in-memory parameters and queues them for the next flush().
+        Several stages in one pulse cost a single write.
+        """
+        with self._lock:
+            self._pending_changed.update(key for key, value in new_params.items() if self.params.get(key) != value)
+            self.params.update(new_params)
+            self._pending.update(new_params)
+
+    def flush(self):
+        """
+        Writes staged updates, merged over the latest file contents, in one atomic replace.
+        Returns True if anything was written.
+        """
+        with self._lock:
+            if not self._pending:
+                return False
+            changed = self._load_params() | self._pending_changed
+            pending = self._pending
+            if not self._save_params():
+                return False
+            self._pending, self._pending_changed = {}, set()
+        self._notify(changed)
+        logger.debug(f"Genesis parameters flushed: {sorted(pending)}")
+        return True
+
     def update_params(self, new_params):
         """Updates parameters with a dictionary and saves them."""
-        self.params.update(new_params)
-        self._save_params()
+        self.stage(new_params)
+        self.flush()
         logger.debug("Genesis parameters updated and saved.")
 
+    def subscribe(self, callback):
+        """Registers callback(params, changed_keys), called when parameters change."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def follow(self, daemon):
+        """
+        Subscribes `daemon`, so Apollo's changes reach it without a restart: changed values
+        are copied into daemon.params, then daemon._on_params_changed(params, changed) runs
+        if the daemon defines one (for attributes derived from params).
+        """
+        def on_change(params, changed):
+            daemon.params.update({key: params[key] for key in changed if key in params})
+            hook = getattr(daemon, '_on_params_changed', None)
+            if hook is not None:
+                hook(params, changed)
+        return self.subscribe(on_change)
+
+    def overlay(self, values):
+        """
+        Hands values published outside the file (Apollo's shared parameter segment) to the
+        subscribers as changes. The loader's own params keep what the file says.
+        """
+        self._notify(set(values), values)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
     def _get_default_params(self):
         """Returns a basic set of default parameters for initial creation."""
         # This should match the structure provided in the README
@@ -76,6 +231,53 @@ class GenesisLoader:
             "lethe_graveyard_path": "lethe_graveyard/",
             "tartarus_abyss_path": "tartarus_abyss/",
             "log_dir": "logs/",
+            "archive_watch_backend": "auto",
+            "archive_index_path": "mnemo_archive_index.sqlite3",
+            "hephaestus_pool_workers": 0,
+            "hephaestus_pool_queue_size": 8,
+            "hephaestus_experiment_cpu_seconds": 5.0,
+            "hephaestus_experiment_wall_seconds": 10.0,
+            "hephaestus_result_cache_enabled": True,
+            "hephaestus_result_cache_path": "hephaestus_result_cache.sqlite3",
+            "hephaestus_result_cache_max_entries": 10000,
+            "apollo_results_window": 200,
+            "apollo_generations_tracked": 16,
+            "param_segment_name": "spiral_params",
+            "mnemo_archive_backend": "files",
+            "mnemo_save_mode": "file",
+            "mnemo_wire_format": "dict",
+            "mnemo_pack_max_bytes": 67108864,
+            "mnemo_pack_compact_ratio": 0.5,
+            "hephaestus_materialized_max_files": 256,
+            "hephaestus_test_typed_modules": False,
+            "nyx_score_cache_size": 65536,
+            "master_seed": None,
+            "apollo_supervise_daemons": True,
+            "pulse_metrics_enabled": True,
+            "pulse_metrics_capacity": 1024,
+            "pulse_metrics_prefix": "spiral_metrics",
+            "adaptive_pulse_enabled": True,
+            "pulse_interval_min_factor": 0.382,
+            "pulse_interval_max_factor": 4.236,
+            "adaptive_pulse_target_backlog": 32,
+            "adaptive_pulse_max_duty": 0.5,
+            "backpressure_high_watermark": 500,
+            "backpressure_max_backlog": 5000,
+            "apollo_supervisor_mode": "pooled",
+            "apollo_pooled_daemons": ["kairos", "aion", "kronos", "nyx", "erebus", "tartarus", "lethe"],
+            "apollo_supervisor_stats_path": "apollo_supervisor_stats.json",
+            "supervisor_output_lines": 500,
+            "supervisor_resource_samples": 120,
+            "supervisor_initial_backoff_seconds": 1.0,
+            "supervisor_max_backoff_seconds": 60.0,
+            "supervisor_backoff_factor": 2.0,
+            "supervisor_crash_loop_restarts": 5,
+            "supervisor_crash_loop_window_seconds": 300.0,
+            "supervisor_stable_seconds": 30.0,
+            "shard_index": 0,
+            "shard_count": 1,
+            "shard_leader_socket": None,
+            "shard_report_timeout_seconds": 0.5,
 
             "apollo_pulse_interval": 2.618,
             "kairos_pulse_interval": 0.618,
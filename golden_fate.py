@@ -73,16 +73,22 @@ class GoldenAnalyzer:
         """
         Complete analysis of a code thread for the Fates' judgment
         """
-        if not self._check_syntax(code):
+        try:
+            tree = ast.parse(code)
+        except:
             return {
                 'worthy': False,
                 'message': "The thread is syntactically tangled",
                 'golden_ratios_found': 0,
                 'proportions': {}
             }
-            
+        return self.analyze_tree(tree, code)
+
+    def analyze_tree(self, tree: ast.AST, code: str) -> Dict[str, any]:
+        """
+        Same judgment as analyze_thread, for callers that already hold the parsed tree
+        """
         try:
-            tree = ast.parse(code)
             total_golden_ratios = 0
             function_metrics = []
             
@@ -3,16 +3,22 @@
 import os
 import json
 import time
-import random
 import logging
 from datetime import datetime
-import sys
-import io
-import traceback
 
 # CHANGE START: Changed to absolute import
 from spiral_core.daemon_templates import Olympian, BaseDaemon
 # CHANGE END
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.archive_index import ArchiveIndex
+from spiral_core.module_record import load_module_record
+from spiral_core.forge_pool import ForgePool, ForkServerForge, run_in_sandbox, sandbox_profile
+from spiral_core.forge_cache import ForgeResultCache
+from spiral_core.segment_store import PackedArchive
+from spiral_core.genesis_loader import GenesisLoader
+from spiral_core.param_segment import ParamSegmentReader
+from spiral_core.spiral_rng import SpiralRNG
+from spiral_core.pulse_metrics import instrumented_pulse, file_read, file_written
 
 class Hephaestus(Olympian): # Hephaestus inherits from Olympian
     """
@@ -33,135 +39,303 @@ class Hephaestus(Olympian): # Hephaestus inherits from Olympian
         os.makedirs(self.hephaestus_experiment_results_path, exist_ok=True)
         os.makedirs(self.mnemo_archive_path, exist_ok=True)
 
+        self.archive_index = ArchiveIndex.from_params(self.params)
+        self.archive_watcher = watch_directory(self.mnemo_archive_path, backend=self.params.get('archive_watch_backend', 'auto'))
+
+        # Candidates come from the archive root (general modules), plus Kronos's typed modules
+        # when hephaestus_test_typed_modules is set; the population is the same for both backends.
+        self.test_typed_modules = self.params.get('hephaestus_test_typed_modules', False)
+        self.typed_archive_paths = (os.path.join(self.mnemo_archive_path, 'olympian/'),
+                                    os.path.join(self.mnemo_archive_path, 'chthonic/'))
+
+        # Packed modules are written out as real files only when picked for an experiment.
+        self.packed_archive = PackedArchive.from_params(self.params)
+        self.materialized_path = os.path.join(self.hephaestus_forge_path, 'materialized/')
+
+        # Outcomes of code we've already run, keyed by source + sandbox profile (None when disabled).
+        self.result_cache = ForgeResultCache.from_params(self.params)
+        self.sandbox_profile = sandbox_profile()
+
+        # Candidate picks and experiment ids come from a stream seeded per generation;
+        # Apollo's shared segment tells us when the generation moves on.
+        self.genesis_loader = GenesisLoader()
+        self.genesis_loader.follow(self)
+        self.param_reader = ParamSegmentReader.from_params(self.params)
+        self.rng = SpiralRNG.from_params(self.params, "hephaestus")
+
+        # Execution mode:
+        #   inline     - one experiment per pulse, in this process
+        #   pool       - N pre-forked workers, each with its own cwd and output capture
+        #   forkserver - each experiment forked from a warm, pre-imported template process
+        pool_workers = self.params.get('hephaestus_pool_workers', 0)
+        self.execution_mode = self.params.get('hephaestus_execution_mode', 'pool' if pool_workers else 'inline')
+        self.forge_pool = None
+        if self.execution_mode in ('pool', 'forkserver'):
+            pool_class = ForkServerForge if self.execution_mode == 'forkserver' else ForgePool
+            self.forge_pool = pool_class(
+                pool_workers or os.cpu_count() or 1,
+                queue_size=self.params.get('hephaestus_pool_queue_size'),
+                cpu_seconds=self.params.get('hephaestus_experiment_cpu_seconds', 5.0),
+                wall_seconds=self.params.get('hephaestus_experiment_wall_seconds', 10.0))
+        elif self.execution_mode != 'inline':
+            self.logger.warning(f"Hephaestus: Unknown execution mode '{self.execution_mode}'. Running experiments inline.")
+
 
     def execute_code_in_sandbox(self, code_content, experiment_id, sandbox_path):
         """
-        Executes Python code in a simulated sandbox environment.
+        Executes Python code in a simulated sandbox environment, in this process.
         Captures stdout, stderr, and returns execution status.
         """
         self.logger.info(f"Hephaestus: Executing code for experiment {experiment_id} in sandbox: {sandbox_path}")
-        
-        # Create a fresh, isolated environment for execution
-        exec_globals = {
-            '__builtins__': __builtins__, # Provide standard builtins
-            'os': os, # Basic OS functions like creating dirs, for generated code
-            'sys': sys,
-            'random': random,
-            'time': time,
-            'json': json,
-            # Potentially other safe modules the generated code might need
-        }
-        exec_locals = {} # Local namespace for the executed code
+        report = run_in_sandbox(code_content, sandbox_path, seed=experiment_id)
+        if report['status'] == "syntax_error":
+            self.logger.error(f"Hephaestus: Syntax Error in experiment {experiment_id}: {report['error_message']}")
+        elif report['status'] == "runtime_error":
+            self.logger.error(f"Hephaestus: Runtime Error in experiment {experiment_id}: {report['error_message'].strip().splitlines()[-1]}")
+        return report
 
-        # Redirect stdout and stderr to capture output
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        redirected_output = io.StringIO()
-        redirected_error = io.StringIO()
-        sys.stdout = redirected_output
-        sys.stderr = redirected_error
+    def _select_indexed(self, directory):
+        """
+        Indexed random pick under `directory`; entries whose file has since vanished are
+        pruned. Returns None if none turned up.
+        """
+        for _ in range(3):
+            entry = self.archive_index.random_module(directory, rng=self.rng)
+            if entry is None:
+                break
+            if os.path.exists(entry['path']):
+                return entry['path']
+            self.archive_index.remove(entry['name'])
+        return None
 
-        execution_result = "unknown"
-        error_message = ""
-        captured_stdout = ""
-        captured_stderr = ""
+    def _select_typed(self):
+        """
+        Picks one of Kronos's typed modules with probability typed / (typed + general),
+        from olympian/ and chthonic/ or, with the packed backend, from the pack (the pick is
+        materialized). Returns None to pick from the archive root instead.
+        """
+        loose = self.archive_index.count(self.mnemo_archive_path)
+        if self.packed_archive is None:
+            counts = [(directory, self.archive_index.count(directory)) for directory in self.typed_archive_paths]
+            typed = sum(count for _, count in counts)
+            if not typed or self.rng.random() * (typed + loose) >= typed:
+                return None
+            pick = self.rng.randrange(typed)
+            for directory, count in counts:
+                if pick < count:
+                    return self._select_indexed(directory)
+                pick -= count
+            return None
 
+        self.packed_archive.refresh()
+        typed = len(self.packed_archive)
+        if not typed or self.rng.random() * (typed + loose) >= typed:
+            return None
+        name = self.packed_archive.random_name(self.rng)
+        if name is None:
+            return None
         try:
-            # Change current working directory to the sandbox for the execution duration
-            original_cwd = os.getcwd()
-            os.chdir(sandbox_path)
-            
-            exec(code_content, exec_globals, exec_locals)
-            execution_result = "success"
-        except SyntaxError as e:
-            execution_result = "syntax_error"
-            error_message = f"Syntax Error: {e}"
-            self.logger.error(f"Hephaestus: Syntax Error in experiment {experiment_id}: {e}")
-        except Exception as e:
-            execution_result = "runtime_error"
-            error_message = f"Runtime Error: {traceback.format_exc()}" # Get full traceback
-            self.logger.error(f"Hephaestus: Runtime Error in experiment {experiment_id}: {e}")
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-            captured_stdout = redirected_output.getvalue()
-            captured_stderr = redirected_error.getvalue()
-            
-            # Change back to original working directory
-            os.chdir(original_cwd)
-
-        return {
-            "status": execution_result,
-            "stdout": captured_stdout,
-            "stderr": captured_stderr,
-            "error_message": error_message
-        }
+            path = self.packed_archive.materialize(name, self.materialized_path)
+        except (KeyError, FileNotFoundError):
+            # Deleted, or its pack compacted away by Kronos, since the pick.
+            self.logger.debug(f"Hephaestus: Packed module '{name}' went away before it was materialized.")
+            return None
+        self.packed_archive.prune_materialized(
+            self.materialized_path, self.params.get('hephaestus_materialized_max_files', 256))
+        return path
 
-    def pulse(self):
+    def _select_candidate(self):
         """
-        Hephaestus's main pulse function.
-        Identifies a code unit, runs it, and logs results.
+        Picks a module from Mnemo's archive to experiment with: a general module from the
+        archive root, or with hephaestus_test_typed_modules also a typed one, whichever
+        archive backend Kronos uses. Uses an indexed random lookup, and the watcher's
+        in-memory listing is the fallback for files the index hasn't seen.
         """
-        self.logger.info("Hephaestus: Forge pulse initiated.")
+        if self.test_typed_modules:
+            path = self._select_typed()
+            if path is not None:
+                return path
 
-        # Find a Python file to experiment with from Mnemo's archive
-        candidate_files = [f for f in os.listdir(self.mnemo_archive_path) if f.endswith('.py')]
-        
+        path = self._select_indexed(self.mnemo_archive_path)
+        if path is not None:
+            return path
+
+        candidate_files = sorted(self.archive_watcher.snapshot())
         if not candidate_files:
-            self.logger.info("Hephaestus: No Python files found in Mnemo archive to experiment with.")
+            return None
+        return os.path.join(self.mnemo_archive_path, self.rng.choice(candidate_files))
+
+    def _lookup_cached_result(self, experiment_id, file_to_test, code_content):
+        """
+        Returns (cache_key, report). The report is the stored outcome of these exact bytes
+        under this sandbox profile, or None when the code has to be run.
+        """
+        if self.result_cache is None:
+            return None, None
+        cache_key = ForgeResultCache.key_for(code_content, self.sandbox_profile)
+        cached_report = self.result_cache.get(cache_key, os.path.basename(file_to_test))
+        if cached_report is not None:
+            cached_report['cached'] = True
+            self.logger.info(f"Hephaestus: Experiment {experiment_id} reuses the cached result for {os.path.basename(file_to_test)}.")
+        return cache_key, cached_report
+
+    def _cache_result(self, cache_key, file_to_test, execution_report):
+        if self.result_cache is None or cache_key is None:
             return
+        try:
+            self.result_cache.put(cache_key, os.path.basename(file_to_test), execution_report)
+        except Exception as e:
+            self.logger.warning(f"Hephaestus: Could not cache result for {os.path.basename(file_to_test)}: {e}")
 
-        # Pick a random file for now, or implement a selection strategy later
-        file_to_test = os.path.join(self.mnemo_archive_path, random.choice(candidate_files))
-        
-        experiment_id = os.urandom(4).hex()
+    def _prepare_experiment(self):
+        """
+        Selects a module and creates its dedicated sandbox directory.
+        Returns (experiment_id, file_to_test, sandbox_path), or None if the archive is empty.
+        """
+        file_to_test = self._select_candidate()
+        if file_to_test is None:
+            return None
+
+        experiment_id = self.rng.unused_token_hex(self._experiment_id_taken)
         self.logger.info(f"Hephaestus: Preparing experiment {experiment_id} with file: {os.path.basename(file_to_test)}")
 
-        # Create a dedicated sandbox directory for this experiment
         current_forge_sandbox = os.path.join(self.hephaestus_forge_path, f"experiment_{experiment_id}")
         os.makedirs(current_forge_sandbox, exist_ok=True)
+        return experiment_id, file_to_test, current_forge_sandbox
+
+    def _experiment_id_taken(self, experiment_id):
+        """Whether an experiment (maybe from before a restart) already has this id's sandbox or result."""
+        return any(os.path.exists(path) for path in (
+            os.path.join(self.hephaestus_forge_path, f"experiment_{experiment_id}"),
+            os.path.join(self.hephaestus_experiment_results_path, f"experiment_{experiment_id}_result.json"),
+            os.path.join(self.hephaestus_experiment_results_path, f"experiment_{experiment_id}_error.json")))
+
+    def _save_report(self, experiment_id, file_to_test, sandbox_path, code_content, execution_report):
+        """Adds metadata to an execution report and saves it for Apollo."""
+        result_filename = f"experiment_{experiment_id}_result.json"
+        result_file_path = os.path.join(self.hephaestus_experiment_results_path, result_filename)
+
+        execution_report['timestamp'] = datetime.now().isoformat()
+        execution_report['tested_file'] = os.path.basename(file_to_test)
+        execution_report['sandbox_path'] = sandbox_path
+        # The module's own generation (as Kairos indexed it) lets Apollo aggregate per generation.
+        entry = self.archive_index.get(os.path.basename(file_to_test))
+        if entry is not None and entry.get('generation') is not None:
+            execution_report['generation'] = entry['generation']
+        else:
+            execution_report['generation'] = self.params.get('current_generation', 0)
+
+        # Aion's record (when it still matches these bytes) saves re-parsing for metadata.
+        record = load_module_record(file_to_test, content=code_content)
+        if record is not None:
+            execution_report['daemon_type'] = record['daemon_type']
+            execution_report['golden_ratios_found'] = record['golden']['golden_ratios_found']
+        elif entry is not None and entry.get('daemon_type'):
+            execution_report['daemon_type'] = entry['daemon_type']
+
+        with open(result_file_path, 'w', encoding='utf-8') as f:
+            json.dump(execution_report, f, indent=4)
+            file_written(f.tell())
+        self.archive_index.set_test_status(os.path.basename(file_to_test), execution_report['status'])
+
+        self.logger.info(f"Hephaestus: Experiment {experiment_id} finished. Status: {execution_report['status']}. Results saved to {result_file_path}")
+
+    def _save_error_report(self, experiment_id, file_to_test, error):
+        """Logs a basic error report if something went wrong outside the experiment itself."""
+        self.logger.error(f"Hephaestus: Error during experiment {experiment_id} for file {os.path.basename(file_to_test)}: {error}", exc_info=True)
+        error_report = {
+            "status": "hephaestus_internal_error",
+            "tested_file": os.path.basename(file_to_test),
+            "error_message": str(error),
+            "timestamp": datetime.now().isoformat()
+        }
+        result_filename = f"experiment_{experiment_id}_error.json"
+        result_file_path = os.path.join(self.hephaestus_experiment_results_path, result_filename)
+        with open(result_file_path, 'w', encoding='utf-8') as f:
+            json.dump(error_report, f, indent=4)
+            file_written(f.tell())
+
+    def _inline_pulse(self):
+        """Runs one experiment synchronously in this process."""
+        prepared = self._prepare_experiment()
+        if prepared is None:
+            self.logger.info("Hephaestus: No Python files found in Mnemo archive to experiment with.")
+            return
+        experiment_id, file_to_test, current_forge_sandbox = prepared
 
         try:
             with open(file_to_test, 'r', encoding='utf-8') as f:
                 code_content = f.read()
+            file_read(len(code_content))
 
-            # Execute the code
-            execution_report = self.execute_code_in_sandbox(code_content, experiment_id, current_forge_sandbox)
-            
-            # Save experiment results for Apollo
-            result_filename = f"experiment_{experiment_id}_result.json"
-            result_file_path = os.path.join(self.hephaestus_experiment_results_path, result_filename)
-            
-            # Add metadata to the report
-            execution_report['timestamp'] = datetime.now().isoformat()
-            execution_report['tested_file'] = os.path.basename(file_to_test)
-            execution_report['sandbox_path'] = current_forge_sandbox
-
-            with open(result_file_path, 'w', encoding='utf-8') as f:
-                json.dump(execution_report, f, indent=4)
-            
-            self.logger.info(f"Hephaestus: Experiment {experiment_id} finished. Status: {execution_report['status']}. Results saved to {result_file_path}")
-
+            cache_key, execution_report = self._lookup_cached_result(experiment_id, file_to_test, code_content)
+            if execution_report is None:
+                execution_report = self.execute_code_in_sandbox(code_content, experiment_id, current_forge_sandbox)
+                self._cache_result(cache_key, file_to_test, execution_report)
+            self._save_report(experiment_id, file_to_test, current_forge_sandbox, code_content, execution_report)
         except Exception as e:
-            self.logger.error(f"Hephaestus: Error during experiment {experiment_id} for file {os.path.basename(file_to_test)}: {e}", exc_info=True)
-            # Log a basic error report if something went wrong before execution
-            error_report = {
-                "status": "hephaestus_internal_error",
-                "tested_file": os.path.basename(file_to_test),
-                "error_message": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
-            result_filename = f"experiment_{experiment_id}_error.json"
-            result_file_path = os.path.join(self.hephaestus_experiment_results_path, result_filename)
-            with open(result_file_path, 'w', encoding='utf-8') as f:
-                json.dump(error_report, f, indent=4)
-
-        finally:
-            # Clean up the sandbox directory (optional, or Apollo can do it)
-            # For now, we'll leave it for inspection if needed.
-            pass
+            self._save_error_report(experiment_id, file_to_test, e)
+
+    def _pool_pulse(self):
+        """
+        Saves every experiment the worker pool finished since the last pulse, then tops
+        the pool back up to its capacity with new experiments. Candidates whose result is
+        already cached are reported straight away and don't take a pool slot.
+        """
+        for experiment_id, execution_report, metadata in self.forge_pool.collect():
+            file_to_test, sandbox_path, code_content, cache_key = metadata
+            try:
+                self._cache_result(cache_key, file_to_test, execution_report)
+                self._save_report(experiment_id, file_to_test, sandbox_path, code_content, execution_report)
+            except Exception as e:
+                self._save_error_report(experiment_id, file_to_test, e)
+
+        submitted = 0
+        cache_hits = 0
+        # Cache hits don't consume capacity, so bound the candidates looked at per pulse.
+        budget = self.forge_pool.free_capacity()
+        while budget > 0 and self.forge_pool.free_capacity() > 0:
+            budget -= 1
+            prepared = self._prepare_experiment()
+            if prepared is None:
+                break
+            experiment_id, file_to_test, current_forge_sandbox = prepared
+            try:
+                with open(file_to_test, 'r', encoding='utf-8') as f:
+                    code_content = f.read()
+                file_read(len(code_content))
+                cache_key, cached_report = self._lookup_cached_result(experiment_id, file_to_test, code_content)
+                if cached_report is not None:
+                    self._save_report(experiment_id, file_to_test, current_forge_sandbox, code_content, cached_report)
+                    cache_hits += 1
+                    continue
+                self.forge_pool.submit(experiment_id, code_content, current_forge_sandbox,
+                                       metadata=(file_to_test, current_forge_sandbox, code_content, cache_key))
+                submitted += 1
+            except Exception as e:
+                self._save_error_report(experiment_id, file_to_test, e)
+
+        self.logger.info(f"Hephaestus: Submitted {submitted} experiments to the forge pool ({self.forge_pool.in_flight()} in flight, {cache_hits} served from cache).")
+        latency = self.forge_pool.startup_latency.snapshot()
+        if latency['count']:
+            self.logger.debug(f"Hephaestus: Experiment startup latency mean {latency['mean_ms']}ms, max {latency['max_ms']}ms over {latency['count']} experiments.")
+
+    @instrumented_pulse
+    def pulse(self):
+        """
+        Hephaestus's main pulse function.
+        Identifies code units, runs them (inline or on the worker pool), and logs results.
+        """
+        self.logger.info("Hephaestus: Forge pulse initiated.")
+        self.param_reader.sync(self.genesis_loader)
+        self.rng.advance(self.params.get('current_generation', 0))
+
+        if self.forge_pool is not None:
+            self._pool_pulse()
+        else:
+            self._inline_pulse()
 
+        # Sandbox directories are left for inspection (and for Lethe's chaos injection).
         self.logger.info("Hephaestus: Forge pulse completed.")
 
 if __name__ == '__main__':
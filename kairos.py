@@ -2,7 +2,6 @@
 
 import os
 import time
-import random
 import logging
 import keyword
 import builtins
@@ -12,6 +11,13 @@ from datetime import datetime
 
 # Changed to absolute import
 from spiral_core.daemon_templates import Olympian, Chthonic 
+from spiral_core.archive_index import ArchiveIndex
+from spiral_core.genesis_loader import GenesisLoader
+from spiral_core.spiral_rng import SpiralRNG
+from spiral_core.pulse_metrics import instrumented_pulse, file_written
+from spiral_core.pulse_scheduler import adaptive_pulse
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.shard import ShardConfig
 
 class Kairos(Olympian): 
     """
@@ -28,6 +34,26 @@ class Kairos(Olympian):
         self.mnemo_archive_path = self.params.get('mnemo_archive_path', 'mnemo_archive/')
         os.makedirs(self.kairos_raw_output_path, exist_ok=True)
         os.makedirs(self.mnemo_archive_path, exist_ok=True)
+        self.archive_index = ArchiveIndex.from_params(self.params)
+
+        # Backpressure: modules forged but not yet through Aion and Kronos. Past the high
+        # watermark the pulse interval stretches; past the hard limit Kairos stops forging.
+        watch_backend = self.params.get('archive_watch_backend', 'auto')
+        self.downstream_watchers = [
+            watch_directory(self.kairos_raw_output_path, backend=watch_backend),
+            watch_directory(self.params.get('aion_output_path', 'aion_output/'), backend=watch_backend),
+        ]
+        self.backpressure_max_backlog = self.params.get('backpressure_max_backlog', 5000)
+
+        # In a sharded spiral this node only forges names in its own slice.
+        self.shard = ShardConfig.from_params(self.params)
+
+        # Apollo advances current_generation.
+        self.genesis_loader = GenesisLoader()
+        self.genesis_loader.follow(self)
+
+        # Every generated name, template choice and constant comes from this seeded stream.
+        self.rng = SpiralRNG.from_params(self.params, "kairos")
 
         self.logger.info("Kairos awakened with Python's essence, ready to forge new modules.")
 
@@ -44,12 +70,28 @@ class Kairos(Olympian):
             ]
         }
 
+    def pulse_pressure(self):
+        """Modules waiting downstream: in Aion's input plus in Kronos's."""
+        pending = 0
+        for watcher in self.downstream_watchers:
+            watcher.refresh()
+            pending += len(watcher.files)
+        return pending
+
+    @instrumented_pulse
+    @adaptive_pulse
     def pulse(self):
         """
         Kairos's main pulse function.
         On each pulse, it attempts to forge a new Olympian or Chthonic module.
         """
+        self.genesis_loader.refresh()
         current_generation = self.params.get("current_generation", 0)
+        self.rng.advance(current_generation)
+        downstream = self.pulse_pressure()
+        if downstream >= self.backpressure_max_backlog:
+            self.logger.info(f"Kairos: Holding back; {downstream} forged modules are still waiting downstream.")
+            return
         self.logger.info(f"Kairos Pulse: Forging new module for Generation {current_generation}")
         
         if self.creation_cycle % 2 == 0:
@@ -61,13 +103,20 @@ class Kairos(Olympian):
         self.logger.info(f"Kairos pulse completed. Forged {self.creation_cycle} modules so far.")
 
 
+    def _module_name(self, prefix: str) -> str:
+        """A fresh '<prefix>_<6 random chars>' name owned by this node's shard."""
+        while True:
+            daemon_name_suffix = ''.join(self.rng.choices(string.ascii_lowercase + string.digits, k=6))
+            daemon_name = f"{prefix}_{daemon_name_suffix}"
+            if self.shard.owns(daemon_name):
+                return daemon_name
+
     def _forge_olympian(self):
         """
         Creates an order-bound (Olympian) module with structured Python logic.
         These modules will inherit from the Olympian base class.
         """
-        daemon_name_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-        daemon_name = f"olympian_{daemon_name_suffix}"
+        daemon_name = self._module_name("olympian")
         
         template = f'''# Generated by Kairos Daemon (Generation {self.params.get("current_generation", 0)})
 # Forged Olympian Module: {daemon_name.capitalize()}
@@ -96,8 +145,7 @@ class {daemon_name.capitalize()}(Olympian):
         Creates a chaos-bound (Chthonic) module with dynamic Python logic.
         These modules will inherit from the Chthonic base class.
         """
-        daemon_name_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-        daemon_name = f"chthonic_{daemon_name_suffix}"
+        daemon_name = self._module_name("chthonic")
         
         template = f'''# Generated by Kairos Daemon (Generation {self.params.get("current_generation", 0)})
 # Forged Chthonic Module: {daemon_name.capitalize()}
@@ -112,7 +160,7 @@ class {daemon_name.capitalize()}(Chthonic):
     def __init__(self):
         super().__init__("{daemon_name}")
         self.logger.info(f"Initialized {{self.name.capitalize()}} with pulse interval {{self.pulse_interval}}s")
-        self.chaos_intensity = {random.uniform(0.1, 0.7):.2f} 
+        self.chaos_intensity = {self.rng.uniform(0.1, 0.7):.2f} 
         {self._inject_attributes("chthonic")}
 
     def pulse(self): 
@@ -164,7 +212,7 @@ class {daemon_name.capitalize()}(Chthonic):
         average = _analyze_data(data_set)
         self.logger.info(f"Analyzed data set: {{data_set}}, Average: {{average:.2f}}")'''
         ]
-        return random.choice(logic_options)
+        return self.rng.choice(logic_options)
 
     def _inject_chaotic_logic(self) -> str:
         """Generates dynamic Python code for Chthonic modules, ensuring executability."""
@@ -200,7 +248,7 @@ class {daemon_name.capitalize()}(Chthonic):
         else:
             self.logger.info("Odd dynamic value detected.")'''
         ]
-        return random.choice(logic_options)
+        return self.rng.choice(logic_options)
 
     def _write_module(self, name: str, template: str, daemon_type: str):
         """
@@ -214,6 +262,9 @@ class {daemon_name.capitalize()}(Chthonic):
         try:
             with open(output_path, 'w') as f:
                 f.write(template)
+            file_written(len(template))
+            self.archive_index.record(output_path, content=template, daemon_type=daemon_type.lower(),
+                                      generation=self.params.get("current_generation", 0))
             self.logger.info(f"Forged {daemon_type} module: {output_path}")
 
         except Exception as e:
@@ -11,6 +11,12 @@ import re
 # CHANGE START: Changed to absolute import
 from spiral_core.daemon_templates import Olympian, BaseDaemon 
 # CHANGE END
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.archive_index import ArchiveIndex
+from spiral_core.module_record import load_module_record, move_module, remove_module
+from spiral_core.segment_store import PackedArchive
+from spiral_core.pulse_metrics import instrumented_pulse, file_read, file_written
+from spiral_core.pulse_scheduler import adaptive_pulse
 
 class Kronos(Olympian): 
     """
@@ -34,15 +40,33 @@ class Kronos(Olympian):
         os.makedirs(self.olympian_archive_path, exist_ok=True)
         os.makedirs(self.chthonic_archive_path, exist_ok=True)
 
+        self.archive_index = ArchiveIndex.from_params(self.params)
+        self.aion_watch = watch_directory(self.aion_output_path, backend=self.params.get('archive_watch_backend', 'auto')).subscribe()
+
+        # With mnemo_archive_backend = "packed", typed modules go into pack files instead of olympian/ and chthonic/.
+        self.packed_archive = PackedArchive.from_params(self.params)
+        self.pack_compact_ratio = self.params.get('mnemo_pack_compact_ratio', 0.5)
+
 
     def _determine_daemon_type(self, filepath: str) -> str:
         """
         Analyzes the file content to determine if it's an Olympian or Chthonic daemon.
         Defaults to 'general' if not clearly identifiable.
+        Aion's module record and then the archive index are consulted first,
+        so the file itself is only re-read for modules neither has seen.
         """
         try:
+            record = load_module_record(filepath)
+            if record is not None:
+                return record['daemon_type']
+
+            entry = self.archive_index.get(os.path.basename(filepath))
+            if entry and entry.get('daemon_type') in ("olympian", "chthonic"):
+                return entry['daemon_type']
+
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
+            file_read(len(content))
             
             if re.search(r"class\s+\w+\(Olympian\):", content):
                 return "olympian"
@@ -55,6 +79,81 @@ class Kronos(Olympian):
             return "general"
 
 
+    def _consolidate_file(self, filename, daemon_type):
+        """Moves one module from Aion's output into its typed archive directory. Returns True if moved."""
+        source_filepath = os.path.join(self.aion_output_path, filename)
+        if daemon_type == "olympian":
+            destination_dir = self.olympian_archive_path
+        elif daemon_type == "chthonic":
+            destination_dir = self.chthonic_archive_path
+        else:
+            destination_dir = self.mnemo_archive_path
+
+        destination_filepath = os.path.join(destination_dir, filename)
+
+        try:
+            move_module(source_filepath, destination_filepath)
+            self.archive_index.move(filename, destination_filepath, daemon_type=daemon_type)
+            self.logger.info(f"Kronos: Consolidated '{filename}' (Type: {daemon_type}) to '{destination_dir}'")
+            return True
+        except FileNotFoundError:
+            self.logger.debug(f"Kronos: '{filename}' disappeared before consolidation. Skipping.")
+        except Exception as e:
+            self.logger.error(f"Kronos: Error consolidating file '{filename}': {e}", exc_info=True)
+            self.aion_watch.retry(filename)
+        return False
+
+    def _consolidate_packed(self, files_to_consolidate):
+        """
+        Appends a pulse's worth of Olympian and Chthonic modules to the packed archive in
+        one batch and removes their loose files; their daemon type lives on in the archive
+        index. General modules stay loose files in the archive root, where Erebus, Nyx and
+        Tartarus work on them.
+        """
+        modules = []
+        loose_count = 0
+        for filename in files_to_consolidate:
+            source_filepath = os.path.join(self.aion_output_path, filename)
+            daemon_type = self._determine_daemon_type(source_filepath)
+            if daemon_type not in ("olympian", "chthonic"):
+                loose_count += self._consolidate_file(filename, daemon_type)
+                continue
+            try:
+                with open(source_filepath, 'r', encoding='utf-8') as f:
+                    modules.append((filename, f.read(), daemon_type))
+                file_read(len(modules[-1][1]))
+            except FileNotFoundError:
+                self.logger.debug(f"Kronos: '{filename}' disappeared before consolidation. Skipping.")
+        if not modules:
+            return loose_count
+
+        try:
+            self.packed_archive.put_many([(filename, content) for filename, content, _ in modules])
+            file_written(sum(len(content) for _, content, _ in modules))
+        except Exception as e:
+            self.logger.error(f"Kronos: Error packing {len(modules)} modules: {e}", exc_info=True)
+            for filename, _, _ in modules:
+                self.aion_watch.retry(filename)
+            return loose_count
+
+        for filename, _, daemon_type in modules:
+            try:
+                remove_module(os.path.join(self.aion_output_path, filename))
+            except FileNotFoundError:
+                pass
+            self.archive_index.move(filename, os.path.join(self.packed_archive.directory, filename), daemon_type=daemon_type)
+            self.logger.debug(f"Kronos: Packed '{filename}' (Type: {daemon_type}).")
+
+        if self.packed_archive.dead_ratio() > self.pack_compact_ratio:
+            self.packed_archive.compact()
+        return loose_count + len(modules)
+
+    def pulse_backlog(self):
+        """Processed modules from Aion still waiting to be consolidated."""
+        return self.aion_watch.pending()
+
+    @instrumented_pulse
+    @adaptive_pulse
     def pulse(self):
         """
         Kronos's main pulse function.
@@ -63,34 +162,23 @@ class Kronos(Olympian):
         """
         self.logger.info("Kronos Pulse: Consolidating and categorizing processed code units from Aion.")
 
-        files_to_consolidate = [f for f in os.listdir(self.aion_output_path) if f.endswith('.py')]
+        changed, _ = self.aion_watch.poll()
+        files_to_consolidate = sorted(changed)
 
         if not files_to_consolidate:
             self.logger.info("Kronos: No processed code units found from Aion to consolidate.")
             return
 
+        if self.packed_archive is not None:
+            consolidated_count = self._consolidate_packed(files_to_consolidate)
+            self.logger.info(f"Kronos pulse completed. Consolidated {consolidated_count} modules (typed ones packed into {self.packed_archive.directory}).")
+            return
+
         consolidated_count = 0
         for filename in files_to_consolidate:
             source_filepath = os.path.join(self.aion_output_path, filename)
-            
             daemon_type = self._determine_daemon_type(source_filepath)
-            
-            if daemon_type == "olympian":
-                destination_dir = self.olympian_archive_path
-            elif daemon_type == "chthonic":
-                destination_dir = self.chthonic_archive_path
-            else:
-                destination_dir = self.mnemo_archive_path 
-            
-            destination_filepath = os.path.join(destination_dir, filename)
-            
-            try:
-                shutil.move(source_filepath, destination_filepath)
-                self.logger.info(f"Kronos: Consolidated '{filename}' (Type: {daemon_type}) to '{destination_dir}'")
-                consolidated_count += 1
-
-            except Exception as e:
-                self.logger.error(f"Kronos: Error consolidating file '{filename}': {e}", exc_info=True)
+            consolidated_count += self._consolidate_file(filename, daemon_type)
         
         self.logger.info(f"Kronos pulse completed. Consolidated {consolidated_count} files.")
 
@@ -3,13 +3,16 @@
 import os
 import json
 import time
-import random
 import logging
 from datetime import datetime
 
 # CHANGE START: Ensuring absolute import is correct
 from spiral_core.daemon_templates import Chthonic, BaseDaemon
 # CHANGE END
+from spiral_core.genesis_loader import GenesisLoader
+from spiral_core.param_segment import ParamSegmentReader
+from spiral_core.spiral_rng import SpiralRNG
+from spiral_core.pulse_metrics import instrumented_pulse, file_written
 
 class Lethe(Chthonic): 
     """
@@ -26,16 +29,26 @@ class Lethe(Chthonic):
         os.makedirs(self.lethe_chaos_logs_path, exist_ok=True)
         os.makedirs(self.hephaestus_forge_path, exist_ok=True)
 
+        # Targets, chaos types and ids come from a stream seeded per generation;
+        # Apollo's shared segment tells us when the generation moves on.
+        self.genesis_loader = GenesisLoader()
+        self.genesis_loader.follow(self)
+        self.param_reader = ParamSegmentReader.from_params(self.params)
+        self.rng = SpiralRNG.from_params(self.params, "lethe")
 
+
+    @instrumented_pulse
     def pulse(self):
         """
         Lethe's main pulse function.
         Injects "oblivion" chaos into Hephaestus's forge.
         """
         self.logger.info("Lethe: Chaos injection pulse initiated.")
+        self.param_reader.sync(self.genesis_loader)
+        self.rng.advance(self.params.get('current_generation', 0))
 
         # Identify active Hephaestus sandbox directories
-        active_sandboxes = [d for d in os.listdir(self.hephaestus_forge_path) 
+        active_sandboxes = [d for d in sorted(os.listdir(self.hephaestus_forge_path))
                             if os.path.isdir(os.path.join(self.hephaestus_forge_path, d)) and d.startswith("experiment_")]
 
         if not active_sandboxes:
@@ -43,12 +56,13 @@ class Lethe(Chthonic):
             return
 
         # Choose a random sandbox to target
-        target_sandbox_name = random.choice(active_sandboxes)
+        target_sandbox_name = self.rng.choice(active_sandboxes)
         target_sandbox_path = os.path.join(self.hephaestus_forge_path, target_sandbox_name)
 
-        chaos_id = os.urandom(4).hex()
+        chaos_id = self.rng.unused_token_hex(lambda token: os.path.exists(
+            os.path.join(self.lethe_chaos_logs_path, f"chaos_event_{token}.json")))
         chaos_types = ["data_corruption_sim", "state_reset_sim", "memory_leak_sim", "transient_file_loss_sim"]
-        chosen_chaos_type = random.choice(chaos_types)
+        chosen_chaos_type = self.rng.choice(chaos_types)
 
         self.logger.info(f"Lethe: Injecting '{chosen_chaos_type}' chaos (ID: {chaos_id}) into sandbox: {target_sandbox_name}")
 
@@ -64,6 +78,7 @@ class Lethe(Chthonic):
             # Attempt to create the chaos marker file
             with open(chaos_marker_file, 'w', encoding='utf-8') as f:
                 json.dump(chaos_data, f, indent=4)
+                file_written(f.tell())
             self.logger.info(f"Lethe: Chaos marker created at {chaos_marker_file}")
 
             # Log the chaos event in Lethe's own logs
@@ -71,6 +86,7 @@ class Lethe(Chthonic):
             chaos_log_filepath = os.path.join(self.lethe_chaos_logs_path, chaos_log_filename)
             with open(chaos_log_filepath, 'w', encoding='utf-8') as f:
                 json.dump(chaos_data, f, indent=4)
+                file_written(f.tell())
             self.logger.info(f"Lethe: Chaos event logged to {chaos_log_filepath}")
 
         except FileNotFoundError:
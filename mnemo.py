@@ -1,7 +1,17 @@
 import multiprocessing
+import queue
 import time
 import os
 from datetime import datetime
+from multiprocessing.connection import wait
+
+from spiral_core.activity_log import BufferedActivityLog
+from spiral_core.genesis_loader import GenesisLoader
+from spiral_core.segment_store import SegmentWriter
+from spiral_core.shm_queue import wait_handle
+from spiral_core.spiral_messages import (
+    Payload, StoredPayload, SegmentBatch, SegmentEntry, Feedback, LogLine, MESSAGE_TYPES, MessageError, encode, decode
+)
 
 from common_utils import (
     setup_logging, set_cpu_affinity, # <--- Ensure set_cpu_affinity is imported
@@ -12,8 +22,30 @@ from common_utils import (
 # Setup logging for Mnemo
 logger = setup_logging("Mnemo")
 
+# How often the loop wakes up with no input, just to notice running_event being cleared.
+IDLE_WAKEUP_SECONDS = 0.5
+# Most messages taken from one queue before the others get a turn.
+MAX_BATCH_SIZE = 256
+
+# How Apollo's payloads are stored and announced to Lethe (genesis param mnemo_save_mode):
+#   file    - one file and one Lethe message per payload (default)
+#   segment - opt-in: each burst is appended to one segment file per data type, and Lethe gets a
+#             single BATCH_DATA_TYPE message whose content is a list of entries
+#             ({type, pulse, segment, offset, length}; see segment_store.read_record)
+SAVE_MODE_SEGMENT = "segment"
+SAVE_MODE_FILE = "file"
+BATCH_DATA_TYPE = "segment_batch"
+
+# What Mnemo puts on its outbound queues (genesis param mnemo_wire_format):
+#   dict   - DATA_*_KEY dicts, what Lethe and Apollo read (default)
+#   binary - opt-in: spiral_messages records, encoded (StoredPayload, SegmentBatch, Feedback)
+# Inbound, both are accepted; anything that isn't a valid message is rejected and counted.
+WIRE_BINARY = "binary"
+WIRE_DICT = "dict"
+
 class Mnemo:
-    def __init__(self, apollo_to_mnemo_q, mnemo_to_lethe_q, mnemo_log_q, kronos_log_q, lethe_to_apollo_feedback_q, script_dirs):
+    def __init__(self, apollo_to_mnemo_q, mnemo_to_lethe_q, mnemo_log_q, kronos_log_q, lethe_to_apollo_feedback_q, script_dirs,
+                 save_mode=None, wire_format=None, params=None):
         self.apollo_to_mnemo_q = apollo_to_mnemo_q
         self.mnemo_to_lethe_q = mnemo_to_lethe_q
         self.mnemo_log_q = mnemo_log_q
@@ -22,8 +54,24 @@ class Mnemo:
         self.running_event = None
         self.cpu_affinity = None
         self.script_dirs = script_dirs
+        # Genesis params are only read here, never created: a missing file means the defaults.
+        if params is None:
+            params = GenesisLoader.read_params() if save_mode is None or wire_format is None else {}
+        if save_mode is None:
+            save_mode = params.get('mnemo_save_mode', SAVE_MODE_FILE)
+        if save_mode not in (SAVE_MODE_SEGMENT, SAVE_MODE_FILE):
+            raise ValueError(f"Unknown save mode '{save_mode}'")
+        self.save_mode = save_mode
+        if wire_format is None:
+            wire_format = params.get('mnemo_wire_format', WIRE_DICT)
+        if wire_format not in (WIRE_BINARY, WIRE_DICT):
+            raise ValueError(f"Unknown wire format '{wire_format}'")
+        self.wire_format = wire_format
+        self.rejected_messages = 0
+        self.segment_writers = {}
         self.log_file_path = os.path.join(self.script_dirs["active_scripts"], "mnemo_activity_log.txt") # Updated for active_scripts
         self._ensure_log_file_exists()
+        self.activity_log = None
         logger.info("Initialized.")
 
     def _ensure_log_file_exists(self):
@@ -38,47 +86,189 @@ class Mnemo:
         self.running_event = running_event
         set_cpu_affinity(os.getpid(), self.cpu_affinity, logger) # <--- CORRECTED: Added os.getpid()
         logger.info(f"Starting on PID {os.getpid()} (assigned CPU {self.cpu_affinity}).")
+        # Opened here rather than in __init__ so the flush thread lives in the Mnemo process.
+        self.activity_log = BufferedActivityLog(self.log_file_path)
 
+        handlers = [
+            (self.apollo_to_mnemo_q, self._handle_apollo_batch),   # Content from Apollo
+            (self.kronos_log_q, self._handle_kronos_batch),        # Logs from Kronos
+            (self.mnemo_log_q, self._handle_lethe_batch),          # Logs or feedback from Lethe
+        ]
         while self.running_event.is_set():
-            # Process content from Apollo
-            if not self.apollo_to_mnemo_q.empty():
-                data = self.apollo_to_mnemo_q.get()
-                self._save_and_relay(data)
-
-            # Process logs from Kronos (for logging purposes)
-            if not self.kronos_log_q.empty():
-                log_message = self.kronos_log_q.get()
-                self._log_activity(f"Received from Kronos: {log_message}")
-
-            # Process messages from Lethe (could be logs or feedback)
-            if not self.mnemo_log_q.empty():
-                message = self.mnemo_log_q.get()
+            for inbound_q, handler in self._wait_for_input(handlers):
+                batch = self._drain(inbound_q)
+                if batch:
+                    handler(batch)
+        logger.info("Shutting down.")
+        for writer in self.segment_writers.values():
+            writer.close()
+        self.activity_log.close()
+
+    def _wait_for_input(self, handlers):
+        """
+        Blocks until at least one inbound queue has data (or IDLE_WAKEUP_SECONDS pass)
+        and returns the (queue, handler) pairs that are ready.
+        multiprocessing.Queue and ShmRingQueue both have a wait_handle(), so all queues
+        are waited on at once; anything else falls back to a short poll.
+        """
+        readers = {}
+        for inbound_q, handler in handlers:
+            reader = wait_handle(inbound_q)
+            if reader is None:
+                readers = None
+                break
+            readers[reader] = (inbound_q, handler)
+
+        if readers is None:
+            ready = [(inbound_q, handler) for inbound_q, handler in handlers if not inbound_q.empty()]
+            if not ready:
+                time.sleep(0.01)
+            return ready
+
+        return [readers[reader] for reader in wait(list(readers), timeout=IDLE_WAKEUP_SECONDS)]
+
+    def _drain(self, inbound_q):
+        """Takes up to MAX_BATCH_SIZE messages that are already waiting, without blocking."""
+        batch = []
+        while len(batch) < MAX_BATCH_SIZE:
+            try:
+                batch.append(inbound_q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _receive(self, message, source, log_queue=False):
+        """
+        The spiral_messages record for one inbound message: decoded from bytes, passed
+        through if it already is one, or converted from the legacy dict/str shapes. On a
+        log queue (log_queue=True) anything else is logged as its str(), as it always was.
+        Returns None (and counts the rejection) for anything that isn't a valid message.
+        """
+        try:
+            if isinstance(message, (bytes, bytearray, memoryview)):
+                return decode(message)
+            if isinstance(message, MESSAGE_TYPES):
+                return message
+            if isinstance(message, dict):
                 # Check if it's a structured feedback message from Lethe
-                if isinstance(message, dict) and message.get("source") == "Lethe":
-                    logger.info(f"Received feedback from Lethe: Status={message.get(LETHE_STATUS_MESSAGE_KEY)}")
-                    self.lethe_to_apollo_feedback_q.put(message) # Relay to Apollo
+                if message.get("source") == "Lethe":
+                    status, error = message.get(LETHE_STATUS_MESSAGE_KEY), message.get(LETHE_ERROR_MESSAGE_KEY)
+                    return Feedback("Lethe", None if status is None else str(status), None if error is None else str(error))
+                if DATA_TYPE_KEY in message and not log_queue:
+                    pulse = message.get(DATA_PULSE_KEY)
+                    return Payload(message[DATA_TYPE_KEY], message.get(DATA_CONTENT_KEY) or "",
+                                   None if pulse is None else str(pulse))
+            if log_queue:
+                return LogLine(source, message if isinstance(message, str) else str(message))
+            raise MessageError(f"Not a spiral message: {type(message).__name__}")
+        except MessageError as e:
+            self.rejected_messages += 1
+            logger.warning(f"Rejected a message from {source}: {e}")
+            return None
+
+    def _as_dict(self, message):
+        """The legacy DATA_*_KEY dict carrying the same content as `message`."""
+        if isinstance(message, StoredPayload):
+            return {DATA_TYPE_KEY: message.data_type, DATA_CONTENT_KEY: message.path, DATA_PULSE_KEY: message.pulse}
+        if isinstance(message, SegmentBatch):
+            return {DATA_TYPE_KEY: BATCH_DATA_TYPE, DATA_CONTENT_KEY: [
+                {DATA_TYPE_KEY: entry.data_type, DATA_PULSE_KEY: entry.pulse,
+                 "segment": entry.segment, "offset": entry.offset, "length": entry.length}
+                for entry in message.entries
+            ]}
+        if isinstance(message, Feedback):
+            return {"source": message.source, LETHE_STATUS_MESSAGE_KEY: message.status,
+                    LETHE_ERROR_MESSAGE_KEY: message.error}
+        raise MessageError(f"No dict form for {type(message).__name__}")
+
+    def _send(self, outbound_q, message):
+        outbound_q.put(encode(message) if self.wire_format == WIRE_BINARY else self._as_dict(message))
+
+    def _receive_batch(self, batch, source, expected, log_queue=False):
+        records = []
+        for message in batch:
+            record = self._receive(message, source, log_queue)
+            if record is None:
+                continue
+            if not isinstance(record, expected):
+                self.rejected_messages += 1
+                logger.warning(f"Rejected a {type(record).__name__} from {source}: not expected on this queue.")
+                continue
+            records.append(record)
+        return records
+
+    def _handle_apollo_batch(self, batch):
+        payloads = self._receive_batch(batch, "Apollo", Payload)
+        if self.save_mode == SAVE_MODE_FILE:
+            for payload in payloads:
+                self._save_and_relay(payload)
+        elif payloads:
+            self._save_and_relay_batch(payloads)
+
+    def _handle_kronos_batch(self, batch):
+        for log_line in self._receive_batch(batch, "Kronos", LogLine, log_queue=True):
+            self._log_activity(f"Received from Kronos: {log_line.text}")
+
+    def _handle_lethe_batch(self, batch):
+        for message in batch:
+            if self.wire_format == WIRE_DICT and isinstance(message, dict) and message.get("source") == "Lethe":
+                # Relayed as Lethe sent it, every key included
+                logger.info(f"Received feedback from Lethe: Status={message.get(LETHE_STATUS_MESSAGE_KEY)}")
+                self.lethe_to_apollo_feedback_q.put(message) # Relay to Apollo
+                continue
+            for record in self._receive_batch((message,), "Lethe", (Feedback, LogLine), log_queue=True):
+                if isinstance(record, Feedback):
+                    logger.info(f"Received feedback from Lethe: Status={record.status}")
+                    self._send(self.lethe_to_apollo_feedback_q, record) # Relay to Apollo
                 else:
-                    self._log_activity(f"Received from Lethe: {message}")
+                    self._log_activity(f"Received from Lethe: {record.text}")
 
-            time.sleep(0.1)
-        logger.info("Shutting down.")
+    def _target_dir(self, data_type):
+        if data_type == "python_script":
+            return self.script_dirs["active_scripts"]
+        if data_type == "seo_content":
+            return self.script_dirs["active_seo_keywords"]
+        logger.error(f"Unknown data type '{data_type}' for saving and relaying.")
+        return None
+
+    def _save_and_relay_batch(self, batch):
+        """
+        Appends a burst of payloads to per-type segment files (two writes per type)
+        and relays one SegmentBatch describing all of them to Lethe.
+        """
+        grouped = {}
+        for payload in batch:
+            if self._target_dir(payload.data_type) is not None:
+                grouped.setdefault(payload.data_type, []).append(payload)
 
-    def _save_and_relay(self, data):
-        data_type = data.get(DATA_TYPE_KEY)
-        generated_content = data.get(DATA_CONTENT_KEY)
-        original_pulse = data.get(DATA_PULSE_KEY) # Get the original pulse type
+        entries = []
+        for data_type, items in grouped.items():
+            writer = self.segment_writers.get(data_type)
+            try:
+                if writer is None:
+                    writer = self.segment_writers[data_type] = SegmentWriter(self._target_dir(data_type), prefix=data_type)
+                segment_path, locations = writer.append_batch([payload.content for payload in items])
+            except Exception as e:
+                logger.error(f"Error saving {len(items)} {data_type} payloads to a segment: {e}")
+                continue
+            for payload, (offset, length) in zip(items, locations):
+                entries.append(SegmentEntry(data_type, segment_path, offset, length, payload.pulse))
+
+        if entries:
+            self._send(self.mnemo_to_lethe_q, SegmentBatch(entries))
+            self._log_activity(f"Saved {len(entries)} payloads to segments for Lethe.")
+
+    def _save_and_relay(self, payload):
+        data_type = payload.data_type
+        generated_content = payload.content
+        original_pulse = payload.pulse # Get the original pulse type
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         file_extension = "py" if data_type == "python_script" else "txt"
         file_name = f"{data_type}_{timestamp}.{file_extension}"
 
-        target_dir = ""
-        if data_type == "python_script":
-            target_dir = self.script_dirs["active_scripts"]
-        elif data_type == "seo_content":
-            target_dir = self.script_dirs["active_seo_keywords"]
-        else:
-            logger.error(f"Unknown data type '{data_type}' for saving and relaying.")
+        target_dir = self._target_dir(data_type)
+        if target_dir is None:
             return
 
         file_path = os.path.join(target_dir, file_name)
@@ -88,13 +278,8 @@ class Mnemo:
                 f.write(generated_content)
             logger.info(f"Saved {file_name} to {file_path}")
 
-            # Prepare data to send to Lethe (now includes full path and original pulse)
-            data_for_lethe = {
-                DATA_TYPE_KEY: data_type,
-                DATA_CONTENT_KEY: file_path, # Send the full path
-                DATA_PULSE_KEY: original_pulse # Pass the original pulse
-            }
-            self.mnemo_to_lethe_q.put(data_for_lethe)
+            # Tell Lethe where the payload is (full path) and which pulse produced it
+            self._send(self.mnemo_to_lethe_q, StoredPayload(data_type, file_path, original_pulse))
             self._log_activity(f"Saved {file_name} for Lethe.")
 
         except Exception as e:
@@ -102,9 +287,10 @@ class Mnemo:
 
     def _log_activity(self, message):
         """Logs activity to the Mnemo-specific log file."""
+        if self.activity_log is None:
+            self.activity_log = BufferedActivityLog(self.log_file_path)
         try:
-            with open(self.log_file_path, 'a', encoding='utf-8') as f:
-                f.write(f"[{datetime.now().strftime('%Y-%m-%dT%H:%M:%S')}] Mnemo: {message}\n")
-            logger.info(f"Logged Mnemo activity to {self.log_file_path.split('/')[-1]}")
+            self.activity_log.write(f"[{datetime.now().strftime('%Y-%m-%dT%H:%M:%S')}] Mnemo: {message}")
+            logger.debug(f"Logged Mnemo activity to {self.log_file_path.split('/')[-1]}")
         except Exception as e:
             logger.error(f"Failed to write to Mnemo activity log file {self.log_file_path}: {e}")
@@ -0,0 +1,197 @@
+# spiral_core/module_record.py
+
+import os
+import re
+import ast
+import json
+import shutil
+import logging
+
+from spiral_core.golden_fate import GoldenAnalyzer
+from spiral_core.archive_index import content_hash
+from spiral_core import pulse_metrics
+
+logger = logging.getLogger(__name__)
+
+RECORD_SUFFIX = '.record.json'
+RECORD_VERSION = 2
+
+# Names whose mere mention makes a module harder for Nyx to obscure.
+MENTION_NAMES = ('hephaestus', 'lethe', 'apollo')
+
+# The six complexity indicators as one scanner. The keyword alternatives consume only the
+# keyword (the rest is a lookahead), so no match can swallow another indicator, e.g. the
+# "hephaestus" in "import hephaestus"; the leading class lets the engine skip to candidate
+# characters. Distinct group names seen == the old count of six separate re.search hits.
+COMPLEXITY_SCANNER = re.compile(
+    r"(?=[fcihla])(?:"
+    r"(?P<for_loop>\bfor(?=\s+\w+\s+in\b))"
+    r"|(?P<bare_class>\bclass(?=\s+\w+:))"
+    r"|(?P<import_>\bimport(?=\s+\w))"
+    r"|(?P<hephaestus>hephaestus)"
+    r"|(?P<lethe>lethe)"
+    r"|(?P<apollo>apollo))"
+)
+COMPLEXITY_INDICATOR_COUNT = len(COMPLEXITY_SCANNER.groupindex)
+
+
+def scan_resistance_score(content: str) -> int:
+    """Number of distinct complexity indicators in `content`, found in a single pass."""
+    found = set()
+    for match in COMPLEXITY_SCANNER.finditer(content):
+        found.add(match.lastgroup)
+        if len(found) == COMPLEXITY_INDICATOR_COUNT:
+            break
+    return len(found)
+
+
+_analyzer = None
+
+
+def _get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = GoldenAnalyzer()
+    return _analyzer
+
+
+def record_path(module_path):
+    """The record sidecar lives next to its module: foo.py -> foo.py.record.json"""
+    return module_path + RECORD_SUFFIX
+
+
+def summarize_tree(tree):
+    """Walks the tree once and returns the structural facts downstream daemons ask about."""
+    classes = []
+    imports = set()
+    function_count = 0
+    node_count = 0
+    has_for_loop = False
+    for node in ast.walk(tree):
+        node_count += 1
+        if isinstance(node, ast.ClassDef):
+            bases = [base.id if isinstance(base, ast.Name) else ast.unparse(base) for base in node.bases]
+            classes.append({'name': node.name, 'bases': bases})
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            function_count += 1
+        elif isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            imports.add(node.module)
+        elif isinstance(node, (ast.For, ast.AsyncFor, ast.comprehension)):
+            has_for_loop = True
+    return {
+        'classes': classes,
+        'imports': sorted(imports),
+        'function_count': function_count,
+        'node_count': node_count,
+        'has_for_loop': has_for_loop,
+        'has_bare_class': any(not cls['bases'] for cls in classes),
+    }
+
+
+def daemon_type_from_summary(summary):
+    for cls in summary.get('classes', []):
+        if 'Olympian' in cls['bases']:
+            return "olympian"
+        if 'Chthonic' in cls['bases']:
+            return "chthonic"
+    return "general"
+
+
+def build_module_record(code, filename='<module>', stored_content=None):
+    """
+    Parses `code` exactly once and returns the record every downstream daemon reads:
+    syntax validity, AST summary, daemon type and golden-ratio metrics.
+    `stored_content` is the text actually written to disk (e.g. with Aion's header),
+    whose hash lets readers detect that the file changed after the record was made.
+    """
+    record = {
+        'version': RECORD_VERSION,
+        'filename': filename,
+        'content_hash': content_hash(stored_content if stored_content is not None else code),
+        'mentions': [name for name in MENTION_NAMES if name in code],
+        # Nyx's obscurity resistance, over the stored text as Nyx would scan the file.
+        'resistance_score': scan_resistance_score(stored_content if stored_content is not None else code),
+    }
+    try:
+        tree = ast.parse(code, filename=filename)
+        summary = summarize_tree(tree)
+        golden = _get_analyzer().analyze_tree(tree, code)
+    except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+        # Besides SyntaxError: null bytes (ValueError before Python 3.11.4) and
+        # pathologically deep nesting (RecursionError, MemoryError) make a module just
+        # as unparseable.
+        record.update({
+            'syntax_valid': False,
+            'syntax_error': str(e) or type(e).__name__,
+            'ast_summary': {},
+            'daemon_type': "general",
+            'golden': {
+                'worthy': False,
+                'message': "The thread is syntactically tangled",
+                'golden_ratios_found': 0,
+                'proportions': {}
+            },
+        })
+        return record
+
+    record.update({
+        'syntax_valid': True,
+        'syntax_error': None,
+        'ast_summary': summary,
+        'daemon_type': daemon_type_from_summary(summary),
+        'golden': golden,
+    })
+    return record
+
+
+def write_module_record(module_path, record):
+    with open(record_path(module_path), 'w', encoding='utf-8') as f:
+        json.dump(record, f)
+
+
+def load_module_record(module_path, content=None):
+    """
+    Returns the record stored next to `module_path`, or None if there is none.
+    When the module's current `content` is given, a record made for different bytes
+    (e.g. before Erebus corrupted the file) is treated as missing.
+    """
+    try:
+        with open(record_path(module_path), 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if record.get('version') != RECORD_VERSION:
+        return None
+    if content is not None and record.get('content_hash') != content_hash(content):
+        return None
+    return record
+
+
+def invalidate_module_record(module_path):
+    try:
+        os.remove(record_path(module_path))
+    except FileNotFoundError:
+        pass
+
+
+def move_module(source_path, destination_path):
+    """
+    Moves a module together with its record. The record goes first, so a watcher that
+    sees the module arrive can always find the record beside it.
+    """
+    source_record = record_path(source_path)
+    if os.path.exists(source_record):
+        try:
+            shutil.move(source_record, record_path(destination_path))
+        except FileNotFoundError:
+            pass
+    shutil.move(source_path, destination_path)
+    pulse_metrics.file_moved()
+
+
+def remove_module(module_path):
+    os.remove(module_path)
+    pulse_metrics.file_deleted()
+    invalidate_module_record(module_path)
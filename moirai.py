@@ -112,6 +112,12 @@ class Moirai(Chthonic):
         except:
             self.dark_aspects['pattern_darkness'] = 0.5
 
+    def _analysis_for(self, thread_data):
+        """The thread's golden analysis - computed once and shared by all three sisters"""
+        if 'analysis' not in thread_data:
+            thread_data['analysis'] = self.golden_analyzer.analyze_thread(thread_data['code'])
+        return thread_data['analysis']
+
     def clotho_spins(self, thread_data):
         """Clotho, who spins the thread of life from the darkness"""
         if self.shared_eye['current_holder'] != 'clotho':
@@ -120,7 +126,7 @@ class Moirai(Chthonic):
         self.logger.info("🕸️ Clotho begins to spin in the shadows...")
         
         try:
-            analysis = self.golden_analyzer.analyze_thread(thread_data['code'])
+            analysis = self._analysis_for(thread_data)
             self.logger.info(f"Thread quality: {analysis['worthy']}")
             return analysis
         except Exception as e:
@@ -135,7 +141,7 @@ class Moirai(Chthonic):
         self.logger.info(f"📏 Lachesis: {self._random_quote('measuring')}")
         
         try:
-            analysis = self.golden_analyzer.analyze_thread(thread_data['code'])
+            analysis = self._analysis_for(thread_data)
             if analysis['worthy']:
                 self.logger.info("✨ Lachesis: The patterns align in darkness...")
             else:
@@ -153,7 +159,7 @@ class Moirai(Chthonic):
         self.logger.info("🌑 Atropos emerges from the void, shears gleaming in the darkness...")
         
         try:
-            analysis = self.golden_analyzer.analyze_thread(thread_data['code'])
+            analysis = self._analysis_for(thread_data)
             
             self._calculate_void_resonance(thread_data['code'])
             self._measure_chaos_affinity(analysis)
@@ -3,14 +3,21 @@
 import os
 import json
 import time
-import random
 import logging
 from datetime import datetime
-import re 
 import shutil 
+import collections
 
 # Changed to absolute import
 from spiral_core.daemon_templates import Chthonic, BaseDaemon 
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.archive_index import ArchiveIndex, content_hash
+from spiral_core.module_record import load_module_record, move_module, scan_resistance_score
+from spiral_core.genesis_loader import GenesisLoader
+from spiral_core.param_segment import ParamSegmentReader
+from spiral_core.spiral_rng import SpiralRNG
+from spiral_core.pulse_scheduler import adaptive_pulse
+from spiral_core.pulse_metrics import instrumented_pulse, file_read
 
 class Nyx(Chthonic): 
     """
@@ -30,52 +37,88 @@ class Nyx(Chthonic):
         os.makedirs(self.nyx_graveyard_path, exist_ok=True)
         os.makedirs(self.mnemo_archive_path, exist_ok=True)
 
+        self.archive_index = ArchiveIndex.from_params(self.params)
+        self.archive_watcher = watch_directory(self.mnemo_archive_path, backend=self.params.get('archive_watch_backend', 'auto'))
 
-    def should_obscure_file(self, filepath: str) -> bool:
+        # Apollo rescales Nyx's intensity.
+        self.genesis_loader = GenesisLoader()
+        self.genesis_loader.follow(self)
+        self.param_reader = ParamSegmentReader.from_params(self.params)
+        self.rng = SpiralRNG.from_params(self.params, "nyx")
+
+        # Resistance scores by content hash, and the content hash of each (file, mtime) seen,
+        # so an unchanged module is never re-read or re-scanned.
+        self.score_cache_size = self.params.get('nyx_score_cache_size', 65536)
+        self._score_by_hash = collections.OrderedDict()
+        self._hash_by_version = collections.OrderedDict()
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.score_cache_size:
+            cache.popitem(last=False)
+
+    def _resistance_score(self, filepath: str, mtime: float) -> int:
+        """
+        Resistance score of the module at `filepath`, from the cache when this (file, mtime)
+        or identical content was scored before, else from Aion's record or a single scan
+        (both use scan_resistance_score on the file's text).
+        """
+        version = (os.path.basename(filepath), mtime)
+        digest = self._hash_by_version.get(version)
+        if digest is not None and digest in self._score_by_hash:
+            self._score_by_hash.move_to_end(digest)
+            return self._score_by_hash[digest]
+
+        record = load_module_record(filepath)
+        if record is not None:
+            # Aion scanned the stored text when it made the record: same score, no read.
+            digest = record['content_hash']
+            score = self._score_by_hash.get(digest)
+            if score is None:
+                score = record['resistance_score']
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+            file_read(len(content))
+            digest = content_hash(content)
+            score = self._score_by_hash.get(digest)
+            if score is None:
+                score = scan_resistance_score(content)
+
+        self._remember(self._hash_by_version, version, digest)
+        self._remember(self._score_by_hash, digest, score)
+        return score
+
+    def should_obscure_file(self, filepath: str, mtime: float = None) -> bool:
         """
         Decides if a file should be obscured based on chance, age, and content complexity.
         Uses parameters loaded from genesis_params.json via BaseDaemon.
+        The random and age checks come first and touch no file (the caller may pass the
+        watcher's mtime), so only the few files that pass them are ever read.
         """
         nyx_obscurity_chance = self.params.get("nyx_obscurity_chance", 0.3)
         nyx_min_file_age_seconds = self.params.get("nyx_min_file_age_seconds", 60)
 
+        if self.rng.random() > nyx_obscurity_chance:
+            return False
+
         try:
-            # Robustness: Check if file exists before getting mtime
-            if not os.path.exists(filepath):
-                self.logger.debug(f"Nyx: File disappeared before age check: {os.path.basename(filepath)}. Skipping.")
-                return False
+            if mtime is None:
+                mtime = os.path.getmtime(filepath)
 
-            file_age = time.time() - os.path.getmtime(filepath)
+            file_age = time.time() - mtime
             if file_age < nyx_min_file_age_seconds:
-                self.logger.info(f"Skipping {os.path.basename(filepath)}: too new ({file_age:.1f}s old).")
-                return False
-
-            if random.random() > nyx_obscurity_chance:
-                self.logger.info(f"Skipping {os.path.basename(filepath)}: random chance prevented obscuring.")
+                self.logger.debug(f"Skipping {os.path.basename(filepath)}: too new ({file_age:.1f}s old).")
                 return False
 
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            complexity_indicators = [
-                r"\bfor\s+\w+\s+in\b",     
-                r"\bclass\s+\w+:",         
-                r"\bimport\s+\w+",         
-                r"hephaestus",             
-                r"lethe",                  
-                r"apollo"                  
-            ]
-
-            resistance_score = 0
-            for pattern in complexity_indicators:
-                if re.search(pattern, content):
-                    resistance_score += 1
+            resistance_score = self._resistance_score(filepath, mtime)
             
             if resistance_score > 0:
                 adjusted_obscurity_chance = nyx_obscurity_chance * (1 - (resistance_score * 0.15)) 
                 adjusted_obscurity_chance = max(0.05, adjusted_obscurity_chance) 
                 
-                if random.random() > adjusted_obscurity_chance:
+                if self.rng.random() > adjusted_obscurity_chance:
                     self.logger.info(f"Skipping {os.path.basename(filepath)}: contains complexity indicators (resistance score: {resistance_score}, adjusted chance: {adjusted_obscurity_chance:.2f}).")
                     return False
                 else:
@@ -98,7 +141,8 @@ class Nyx(Chthonic):
         new_filepath = os.path.join(graveyard_path, filename)
         try:
             os.makedirs(graveyard_path, exist_ok=True)
-            shutil.move(filepath, new_filepath) 
+            move_module(filepath, new_filepath) 
+            self.archive_index.move(filename, new_filepath)
             self.logger.info(f"Obscured (moved to graveyard): {filename}")
             return True
         except FileNotFoundError:
@@ -108,29 +152,38 @@ class Nyx(Chthonic):
             self.logger.error(f"Nyx: Failed to obscure file {filename}: {e}", exc_info=True)
             return False
 
+    def pulse_backlog(self):
+        """Idle (0) while the archive is empty; otherwise the base interval (None) applies."""
+        return None if self.archive_watcher.files else 0
+
+    @instrumented_pulse
+    @adaptive_pulse
     def pulse(self):
         """
         Nyx's main pulse function.
         Scans Mnemo's archive for code to obscure based on its heuristics.
         """
         self.logger.info("Nyx Pulse: Scanning Mnemo Archive for obscurity targets.")
+        self.param_reader.sync(self.genesis_loader)
+        self.rng.advance(self.params.get('current_generation', 0))
         
         if not os.path.exists(self.mnemo_archive_path):
             self.logger.warning(f"Mnemo archive path '{self.mnemo_archive_path}' does not exist. Nothing to obscure.")
             return
 
-        # Get a list of files. This list might become stale due to race conditions.
-        files_in_archive = [f for f in os.listdir(self.mnemo_archive_path) if f.endswith('.py')]
+        # The watcher's picture might become stale due to race conditions.
+        files_in_archive = self.archive_watcher.snapshot()
         
         obscured_count = 0
-        for filename in files_in_archive:
+        # Sorted, so a replayed run draws for the files in the same order.
+        for filename, mtime in sorted(files_in_archive.items()):
             filepath = os.path.join(self.mnemo_archive_path, filename)
             # Each operation on the file needs to check if it still exists
-            if self.should_obscure_file(filepath): 
+            if self.should_obscure_file(filepath, mtime): 
                 if self.obscure_file(filepath, self.nyx_graveyard_path):
                     obscured_count += 1
         
-        self.logger.info(f"Nyx pulse completed. Obscured {obscured_count} files.")
+        self.logger.info(f"Nyx pulse completed. Obscured {obscured_count} of {len(files_in_archive)} files.")
 
 
 if __name__ == '__main__':
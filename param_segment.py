@@ -0,0 +1,182 @@
+# spiral_core/param_segment.py
+
+import struct
+import logging
+from multiprocessing import shared_memory, resource_tracker
+
+logger = logging.getLogger(__name__)
+
+# The hot tuning knobs, in segment order. Every value is stored as a float64.
+PARAM_FIELDS = (
+    'current_generation',
+    'current_spiral_growth_factor',
+    'current_complexity_bias',
+    'current_erebus_chaos_intensity',
+    'current_erebus_deletion_chance',
+    'current_nyx_obscurity_chance',
+    'current_tartarus_decay_window_seconds',
+)
+INTEGER_FIELDS = ('current_generation',)
+
+SEGMENT_MAGIC = 0x5350495241000001  # "SPIRA" + layout version 1
+_HEADER = struct.Struct('<QQ')  # magic, sequence
+_VALUES = struct.Struct('<' + 'd' * len(PARAM_FIELDS))
+_SEQUENCE_OFFSET = 8
+_SEQUENCE = struct.Struct('<Q')
+SEGMENT_SIZE = _HEADER.size + _VALUES.size
+
+# A reader that keeps catching the writer mid-update gives up for this pulse.
+MAX_READ_SPINS = 1000
+
+
+def _untrack(shm):
+    """
+    Python 3.11's resource tracker unlinks every segment a process opened when that
+    process exits, which would tear the segment out from under the other daemons.
+    The segment outlives any one daemon, so it is removed only by an explicit unlink().
+    """
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+
+class ParamSegment:
+    """
+    Fixed-layout shared-memory block holding the current_* tuning parameters.
+    Apollo is the single writer; the chaos daemons read it lock-free each pulse.
+    Consistency comes from a sequence lock: the writer makes the sequence odd while
+    it updates the values and even again afterwards, and a reader retries whenever
+    the sequence was odd or changed while it was copying.
+    """
+
+    def __init__(self, shm):
+        self._shm = shm
+        self.name = shm.name
+
+    @classmethod
+    def create_or_attach(cls, name):
+        """Opens the named segment for writing, creating and zero-filling it if needed."""
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=SEGMENT_SIZE)
+            _HEADER.pack_into(shm.buf, 0, SEGMENT_MAGIC, 0)
+            _VALUES.pack_into(shm.buf, _HEADER.size, *([0.0] * len(PARAM_FIELDS)))
+            logger.info(f"ParamSegment: Created shared parameter segment '{name}'.")
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        segment = cls(shm)
+        segment._check_layout()
+        return segment
+
+    @classmethod
+    def attach(cls, name):
+        """Opens an existing segment for reading. Raises FileNotFoundError if it doesn't exist yet."""
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        segment = cls(shm)
+        segment._check_layout()
+        return segment
+
+    def _check_layout(self):
+        if self._shm.size < SEGMENT_SIZE:
+            raise ValueError(f"Parameter segment '{self.name}' is too small ({self._shm.size} bytes)")
+        magic, _ = _HEADER.unpack_from(self._shm.buf, 0)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"Parameter segment '{self.name}' has an unknown layout ({magic:#x})")
+
+    def sequence(self):
+        return _SEQUENCE.unpack_from(self._shm.buf, _SEQUENCE_OFFSET)[0]
+
+    def write(self, params):
+        """Publishes the PARAM_FIELDS present in `params`; other fields keep their values."""
+        buf = self._shm.buf
+        sequence = self.sequence()
+        values = list(_VALUES.unpack_from(buf, _HEADER.size))
+        for i, field in enumerate(PARAM_FIELDS):
+            if params.get(field) is not None:
+                values[i] = float(params[field])
+        _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, sequence + 1)
+        _VALUES.pack_into(buf, _HEADER.size, *values)
+        _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, sequence + 2)
+
+    def read(self):
+        """
+        Returns (sequence, values) from a consistent snapshot. A sequence of 0 means the
+        writer hasn't published anything yet. Returns (None, None) if no stable
+        snapshot could be taken.
+        """
+        buf = self._shm.buf
+        for _ in range(MAX_READ_SPINS):
+            before = _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)[0]
+            if before & 1:
+                continue
+            values = _VALUES.unpack_from(buf, _HEADER.size)
+            if _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)[0] == before:
+                params = dict(zip(PARAM_FIELDS, values))
+                for field in INTEGER_FIELDS:
+                    params[field] = int(params[field])
+                return before, params
+        return None, None
+
+    def close(self):
+        self._shm.close()
+
+    def unlink(self):
+        shared_memory.SharedMemory(name=self.name).unlink()
+
+
+class ParamSegmentReader:
+    """
+    A daemon's view of the segment. Attaches lazily (the segment appears once Apollo
+    starts) and reports values only when the writer has published something new.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.segment = None
+        self.values = {}
+        self._last_sequence = 0
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(params.get('param_segment_name', 'spiral_params'))
+
+    def poll(self):
+        """
+        Returns None while the segment is unavailable, {} if nothing changed since the
+        previous poll, or the full dict of current values after a change.
+        """
+        if self.segment is None:
+            try:
+                self.segment = ParamSegment.attach(self.name)
+            except (FileNotFoundError, ValueError):
+                return None
+        if self.segment.sequence() == self._last_sequence:
+            return {}
+        sequence, values = self.segment.read()
+        if sequence is None or sequence == 0:
+            return {}
+        self._last_sequence = sequence
+        self.values = values
+        return values
+
+    def sync(self, genesis_loader):
+        """
+        A daemon's per-pulse parameter refresh: reloads genesis_params.json if it changed
+        (one stat otherwise), for every parameter outside the segment, then hands the
+        subscribers the segment values that are new, plus any the reload just replaced
+        with the file's (possibly older) value. Nothing is overlaid when neither changed.
+        """
+        reloaded = genesis_loader.refresh()
+        previous = self.values
+        self.poll()
+        overlay = {key: value for key, value in self.values.items()
+                   if key in reloaded or previous.get(key) != value}
+        if overlay:
+            genesis_loader.overlay(overlay)
+
+    def close(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
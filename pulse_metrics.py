@@ -0,0 +1,315 @@
+# spiral_core/pulse_metrics.py
+"""
+Per-pulse metrics for every daemon.
+
+A daemon's pulse() is wrapped with @instrumented_pulse. Each pulse appends one
+fixed-size record (duration, pulse interval, files read/written/moved/deleted, bytes
+read/written, exceptions) to a ring buffer in shared memory named
+<pulse_metrics_prefix>_<daemon>. Appending costs a struct.pack_into and never blocks.
+The ring outlives the daemon, so a crashed or hot daemon can be inspected afterwards:
+
+    python -m spiral_core.pulse_metrics                 # summary of every daemon's ring
+    python -m spiral_core.pulse_metrics nyx --last 20   # recent records of one daemon
+    python -m spiral_core.pulse_metrics --json dump.json
+
+Code doing file I/O during a pulse reports it with file_read(), file_written(),
+file_moved() and file_deleted(). Outside an instrumented pulse these do nothing.
+"""
+
+import sys
+import json
+import time
+import struct
+import logging
+import argparse
+import functools
+import threading
+import collections
+from multiprocessing import shared_memory
+
+from spiral_core.param_segment import _untrack
+
+logger = logging.getLogger(__name__)
+
+RECORD_FIELDS = (
+    'pulse', 'started', 'duration', 'interval',
+    'files_read', 'files_written', 'files_moved', 'files_deleted',
+    'bytes_read', 'bytes_written', 'exceptions',
+)
+_RECORD = struct.Struct('<QdddIIIIQQI')
+_HEADER = struct.Struct('<QIIQ')  # magic, capacity, record size, records written
+_WRITTEN_OFFSET = 16
+_WRITTEN = struct.Struct('<Q')
+_PULSE = struct.Struct('<Q')
+RING_MAGIC = 0x5350495241000101  # "SPIRA" + metrics ring, layout version 1
+
+DAEMON_NAMES = ('apollo', 'kairos', 'aion', 'kronos', 'erebus', 'nyx', 'tartarus', 'lethe', 'hephaestus')
+
+_local = threading.local()
+
+
+class PulseCounters:
+    """What the running pulse has done so far. One per pulse, per thread."""
+
+    __slots__ = ('files_read', 'files_written', 'files_moved', 'files_deleted', 'bytes_read', 'bytes_written')
+
+    def __init__(self):
+        self.files_read = self.files_written = self.files_moved = self.files_deleted = 0
+        self.bytes_read = self.bytes_written = 0
+
+
+def file_read(nbytes=0):
+    counters = getattr(_local, 'counters', None)
+    if counters is not None:
+        counters.files_read += 1
+        counters.bytes_read += nbytes
+
+
+def file_written(nbytes=0):
+    counters = getattr(_local, 'counters', None)
+    if counters is not None:
+        counters.files_written += 1
+        counters.bytes_written += nbytes
+
+
+def file_moved(count=1):
+    counters = getattr(_local, 'counters', None)
+    if counters is not None:
+        counters.files_moved += count
+
+
+def file_deleted(count=1):
+    counters = getattr(_local, 'counters', None)
+    if counters is not None:
+        counters.files_deleted += count
+
+
+def segment_name(prefix, daemon_name):
+    return f"{prefix}_{daemon_name}"
+
+
+class MetricsRing:
+    """
+    Fixed-capacity ring of pulse records in shared memory, with a single writer.
+    The writer zeroes a slot's pulse number, fills the slot, then sets the pulse number;
+    a reader keeps a copied slot only if its pulse number is the one it expects and
+    didn't change while copying, so it never returns a torn record.
+    """
+
+    def __init__(self, shm):
+        self._shm = shm
+        self.name = shm.name
+        magic, self.capacity, record_size, _ = _HEADER.unpack_from(shm.buf, 0)
+        if magic != RING_MAGIC or record_size != _RECORD.size:
+            raise ValueError(f"Metrics ring '{self.name}' has an unknown layout ({magic:#x})")
+        if shm.size < _HEADER.size + self.capacity * _RECORD.size:
+            raise ValueError(f"Metrics ring '{self.name}' is too small ({shm.size} bytes)")
+
+    @classmethod
+    def create_or_attach(cls, name, capacity):
+        """Opens the named ring, creating it if needed. An existing ring keeps its records and capacity."""
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER.size + capacity * _RECORD.size)
+            _HEADER.pack_into(shm.buf, 0, RING_MAGIC, capacity, _RECORD.size, 0)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name):
+        """Opens an existing ring for reading. Raises FileNotFoundError if it doesn't exist."""
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        return cls(shm)
+
+    def written(self):
+        return _WRITTEN.unpack_from(self._shm.buf, _WRITTEN_OFFSET)[0]
+
+    def append(self, values):
+        """Stores one record (RECORD_FIELDS order, pulse number included)."""
+        buf = self._shm.buf
+        written = self.written()
+        offset = _HEADER.size + (written % self.capacity) * _RECORD.size
+        _PULSE.pack_into(buf, offset, 0)
+        _RECORD.pack_into(buf, offset, 0, *values[1:])
+        _PULSE.pack_into(buf, offset, values[0])
+        _WRITTEN.pack_into(buf, _WRITTEN_OFFSET, written + 1)
+
+    def records(self, last=None):
+        """The newest `last` records (all retained ones by default), oldest first, as dicts."""
+        buf = self._shm.buf
+        written = self.written()
+        count = min(written, self.capacity, last or self.capacity)
+        records = []
+        for index in range(written - count, written):
+            offset = _HEADER.size + (index % self.capacity) * _RECORD.size
+            values = _RECORD.unpack_from(buf, offset)
+            if values[0] == 0 or _PULSE.unpack_from(buf, offset)[0] != values[0]:
+                continue  # Being rewritten right now.
+            records.append(_as_record(values))
+        return records
+
+    def close(self):
+        self._shm.close()
+
+    def unlink(self):
+        shared_memory.SharedMemory(name=self.name).unlink()
+
+
+def _as_record(values):
+    record = dict(zip(RECORD_FIELDS, values))
+    record['overrun'] = max(0.0, record['duration'] - record['interval']) if record['interval'] else 0.0
+    return record
+
+
+class PulseMetrics:
+    """
+    One daemon's metrics. Records go to its shared-memory ring, or to an in-process
+    ring of the same capacity when shared memory isn't available.
+    """
+
+    def __init__(self, daemon_name, interval=None, capacity=1024, prefix='spiral_metrics'):
+        self.daemon_name = daemon_name
+        self.interval = interval or 0.0
+        self.capacity = capacity
+        self.ring = None
+        self._memory = None
+        self._pulse = 0
+        try:
+            self.ring = MetricsRing.create_or_attach(segment_name(prefix, daemon_name), capacity)
+            self._pulse = self.ring.written()
+        except (OSError, ValueError) as e:
+            logger.warning(f"PulseMetrics: Shared ring for {daemon_name} unavailable ({e}). Keeping metrics in-process.")
+            self._memory = collections.deque(maxlen=capacity)
+
+    @classmethod
+    def from_params(cls, params, daemon_name, interval=None):
+        """None when pulse_metrics_enabled is off."""
+        if not params.get('pulse_metrics_enabled', True):
+            return None
+        return cls(daemon_name,
+                   interval=interval or params.get(f"{daemon_name}_pulse_interval"),
+                   capacity=params.get('pulse_metrics_capacity', 1024),
+                   prefix=params.get('pulse_metrics_prefix', 'spiral_metrics'))
+
+    def record(self, counters, started, duration, exceptions=0, interval=None):
+        """`interval` is the one the pulse ran under, when the daemon's interval is adaptive."""
+        self._pulse += 1
+        interval = interval or self.interval
+        values = (self._pulse, started, duration, interval,
+                  counters.files_read, counters.files_written, counters.files_moved, counters.files_deleted,
+                  counters.bytes_read, counters.bytes_written, exceptions)
+        if self.ring is not None:
+            self.ring.append(values)
+        else:
+            self._memory.append(values)
+        if interval and duration > interval:
+            logger.debug(f"PulseMetrics: {self.daemon_name} pulse {self._pulse} overran its {interval}s interval ({duration:.3f}s).")
+
+    def recent(self, last=None):
+        if self.ring is not None:
+            return self.ring.records(last)
+        records = [_as_record(values) for values in self._memory]
+        return records[-last:] if last else records
+
+    def close(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+def instrumented_pulse(pulse):
+    """
+    Wraps a daemon's pulse() so every call is timed, its file I/O counted, and its
+    exceptions tallied (they still propagate). Metrics are set up on first use from
+    the daemon's params, under the daemon's class name.
+    """
+    @functools.wraps(pulse)
+    def wrapper(self, *args, **kwargs):
+        metrics = self.__dict__.get('pulse_metrics', False)
+        if metrics is False:
+            name = type(self).__name__.lower()
+            metrics = self.pulse_metrics = PulseMetrics.from_params(self.params, name, getattr(self, 'pulse_interval', None))
+        if metrics is None:
+            return pulse(self, *args, **kwargs)
+
+        interval = getattr(self, 'pulse_interval', None)
+        outer, _local.counters = getattr(_local, 'counters', None), PulseCounters()
+        started, start = time.time(), time.perf_counter()
+        exceptions = 0
+        try:
+            return pulse(self, *args, **kwargs)
+        except Exception:
+            exceptions = 1
+            raise
+        finally:
+            counters, _local.counters = _local.counters, outer
+            try:
+                metrics.record(counters, started, time.perf_counter() - start, exceptions, interval)
+            except Exception as e:
+                logger.error(f"PulseMetrics: Failed to record a {metrics.daemon_name} pulse: {e}")
+
+    return wrapper
+
+
+def summarize(records):
+    durations = sorted(record['duration'] for record in records)
+    if not durations:
+        return {'pulses': 0}
+    total = lambda field: sum(record[field] for record in records)
+    return {
+        'pulses': len(records),
+        'mean_ms': round(sum(durations) / len(durations) * 1000.0, 3),
+        'p99_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.99))] * 1000.0, 3),
+        'max_ms': round(durations[-1] * 1000.0, 3),
+        'overruns': sum(1 for record in records if record['overrun'] > 0),
+        'files_read': total('files_read'),
+        'files_written': total('files_written'),
+        'files_moved': total('files_moved'),
+        'files_deleted': total('files_deleted'),
+        'bytes_read': total('bytes_read'),
+        'bytes_written': total('bytes_written'),
+        'exceptions': total('exceptions'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('daemons', nargs='*', default=list(DAEMON_NAMES))
+    parser.add_argument('--prefix', default='spiral_metrics')
+    parser.add_argument('--last', type=int, help="Only the newest N pulses of each daemon, printed one per line")
+    parser.add_argument('--json', dest='json_path', help="Dump every retained record to this JSON file")
+    args = parser.parse_args()
+
+    dump = {}
+    for daemon_name in args.daemons:
+        try:
+            ring = MetricsRing.attach(segment_name(args.prefix, daemon_name))
+        except (FileNotFoundError, ValueError):
+            continue
+        try:
+            records = ring.records(args.last)
+        finally:
+            ring.close()
+        dump[daemon_name] = records
+        summary = summarize(records)
+        print(f"{daemon_name:<11}{summary['pulses']:6d} pulses" + (
+            f"  mean {summary['mean_ms']:9.3f} ms  p99 {summary['p99_ms']:9.3f} ms  max {summary['max_ms']:9.3f} ms"
+            f"  overruns {summary['overruns']}  files r/w/mv/rm {summary['files_read']}/{summary['files_written']}/"
+            f"{summary['files_moved']}/{summary['files_deleted']}  bytes r/w {summary['bytes_read']}/{summary['bytes_written']}"
+            f"  exceptions {summary['exceptions']}" if summary['pulses'] else ""))
+        if args.last:
+            for record in records:
+                print(f"    #{record['pulse']} {record['duration'] * 1000.0:9.3f} ms  overrun {record['overrun'] * 1000.0:8.3f} ms  "
+                      f"r/w/mv/rm {record['files_read']}/{record['files_written']}/{record['files_moved']}/{record['files_deleted']}  "
+                      f"exceptions {record['exceptions']}")
+    if not dump:
+        print("No pulse metrics rings found.", file=sys.stderr)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(dump, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# spiral_core/pulse_scheduler.py
+
+import logging
+import functools
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+PHI = 1.6180339887
+
+
+class AdaptiveInterval:
+    """
+    Retunes one daemon's pulse_interval after every pulse, within [min_interval, max_interval].
+
+    backlog  - items that piled up in the daemon's input over the last interval, taken as
+               the pulse starts. Work waiting shortens the interval in proportion to how
+               many target_backlog's worth arrived; nothing arriving stretches it by PHI
+               per idle pulse. None (no input queue) keeps the base interval.
+    pressure - for producers, items waiting downstream. Above pressure_high_watermark the
+               interval is stretched in proportion, so producers slow down before the
+               consumers fall behind for good.
+    cost     - the pulse's own duration. The interval never drops below cost / max_duty,
+               so a daemon can't be scheduled faster than it can pulse.
+    """
+
+    def __init__(self, base_interval, min_interval, max_interval, target_backlog=32,
+                 max_duty=0.5, pressure_high_watermark=500):
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, base_interval)
+        self.max_interval = max(max_interval, base_interval)
+        self.target_backlog = max(1, target_backlog)
+        self.max_duty = max_duty
+        self.pressure_high_watermark = max(1, pressure_high_watermark)
+        self.interval = base_interval
+
+    @classmethod
+    def from_params(cls, params, daemon_name, base_interval=None):
+        """
+        None when adaptive_pulse_enabled is off. Bounds come from <daemon>_pulse_interval_min
+        and _max when set, else from the base interval scaled by pulse_interval_min_factor
+        and pulse_interval_max_factor.
+        """
+        if not params.get('adaptive_pulse_enabled', True):
+            return None
+        base = base_interval or params.get(f"{daemon_name}_pulse_interval", 1.0)
+        return cls(base,
+                   params.get(f"{daemon_name}_pulse_interval_min", base * params.get('pulse_interval_min_factor', 0.382)),
+                   params.get(f"{daemon_name}_pulse_interval_max", base * params.get('pulse_interval_max_factor', 4.236)),
+                   target_backlog=params.get('adaptive_pulse_target_backlog', 32),
+                   max_duty=params.get('adaptive_pulse_max_duty', 0.5),
+                   pressure_high_watermark=params.get('backpressure_high_watermark', 500))
+
+    def next_interval(self, backlog, cost, pressure=None):
+        if backlog is None:
+            interval = self.base_interval
+        elif backlog > 0:
+            interval = self.base_interval / (1.0 + backlog / self.target_backlog)
+        else:
+            interval = max(self.interval, self.base_interval) * PHI
+
+        if pressure is not None and pressure > self.pressure_high_watermark:
+            interval = max(interval, self.base_interval * pressure / self.pressure_high_watermark)
+
+        if self.max_duty:
+            interval = max(interval, cost / self.max_duty)
+        self.interval = min(self.max_interval, max(self.min_interval, interval))
+        return self.interval
+
+
+def adaptive_pulse(pulse):
+    """
+    Wraps a daemon's pulse() so pulse_interval is retuned from the daemon's pulse_backlog()
+    (read before the pulse), pulse_pressure() (read after it; either may be absent) and the
+    pulse's measured cost. The run loop
+    sleeps whatever pulse_interval holds, so nothing else changes.
+    """
+    @functools.wraps(pulse)
+    def wrapper(self, *args, **kwargs):
+        scheduler = self.__dict__.get('pulse_scheduler', False)
+        if scheduler is False:
+            scheduler = self.pulse_scheduler = AdaptiveInterval.from_params(
+                self.params, type(self).__name__.lower(), getattr(self, 'pulse_interval', None))
+        if scheduler is None:
+            return pulse(self, *args, **kwargs)
+
+        backlog = None
+        try:
+            backlog = self.pulse_backlog() if hasattr(self, 'pulse_backlog') else None
+        except Exception as e:
+            logger.error(f"PulseScheduler: Could not read {type(self).__name__}'s backlog: {e}")
+        start = perf_counter()
+        try:
+            return pulse(self, *args, **kwargs)
+        finally:
+            cost = perf_counter() - start
+            try:
+                pressure = self.pulse_pressure() if hasattr(self, 'pulse_pressure') else None
+                self.pulse_interval = scheduler.next_interval(backlog, cost, pressure)
+            except Exception as e:
+                logger.error(f"PulseScheduler: Could not retune {type(self).__name__}'s interval: {e}")
+
+    return wrapper
@@ -0,0 +1,199 @@
+# spiral_core/result_aggregator.py
+
+import os
+import json
+import heapq
+import logging
+import collections
+
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.pulse_metrics import file_read
+
+logger = logging.getLogger(__name__)
+
+TRACKED_STATUSES = ("success", "syntax_error", "runtime_error")
+
+# A result file that still doesn't parse after this many pulses is skipped for good.
+MAX_READ_ATTEMPTS = 3
+
+
+class RollingWindow:
+    """
+    The last `size` outcomes with a running count per outcome, so adding a sample
+    and reading a rate are both O(1).
+    """
+
+    def __init__(self, size):
+        self.samples = collections.deque(maxlen=size)
+        self.counts = collections.Counter()
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, outcome):
+        if len(self.samples) == self.samples.maxlen:
+            evicted = self.samples[0]
+            self.counts[evicted] -= 1
+            if not self.counts[evicted]:
+                del self.counts[evicted]
+        self.samples.append(outcome)
+        self.counts[outcome] += 1
+
+    def rate(self, outcome):
+        return self.counts.get(outcome, 0) / len(self.samples) if self.samples else 0.0
+
+    def rates(self):
+        rates = {status: self.rate(status) for status in TRACKED_STATUSES}
+        rates['samples'] = len(self.samples)
+        return rates
+
+
+class ResultAggregator:
+    """
+    Rolling aggregate of Hephaestus experiment results (and Lethe chaos logs).
+    New files are picked up from directory watches and read exactly once; each result
+    feeds windowed success/syntax-error/runtime-error rates overall, per generation
+    and per daemon type, so Apollo never lists or sorts the ever-growing directories.
+    """
+
+    def __init__(self, results_path, chaos_logs_path=None, window=200, generations_tracked=16, backend='auto'):
+        self.window = window
+        self.generations_tracked = generations_tracked
+        self.overall = RollingWindow(window)
+        self.generations = collections.OrderedDict()
+        self.daemon_types = {}
+        self.chaos = RollingWindow(window)
+        self.latest_result = None
+        self.latest_chaos = None
+        self.results_ingested = 0
+        self.chaos_ingested = 0
+        self._read_attempts = {}
+
+        self.results_watcher = watch_directory(results_path, suffix='.json', backend=backend)
+        self.results_watch = self.results_watcher.subscribe()
+        self.chaos_watcher = None
+        self.chaos_watch = None
+        if chaos_logs_path is not None:
+            self.chaos_watcher = watch_directory(chaos_logs_path, suffix='.json', backend=backend)
+            self.chaos_watch = self.chaos_watcher.subscribe()
+        self._bootstrapped = False
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(params.get('hephaestus_experiment_results_path', 'hephaestus_experiment_results/'),
+                   params.get('lethe_chaos_logs_path', 'lethe_chaos_logs/'),
+                   window=params.get('apollo_results_window', 200),
+                   generations_tracked=params.get('apollo_generations_tracked', 16),
+                   backend=params.get('archive_watch_backend', 'auto'))
+
+    def _generation_window(self, generation):
+        window = self.generations.get(generation)
+        if window is None:
+            window = self.generations[generation] = RollingWindow(self.window)
+            while len(self.generations) > self.generations_tracked:
+                self.generations.popitem(last=False)
+        return window
+
+    def _read(self, watch, watcher, name):
+        """Returns the parsed JSON file, or None if it vanished or isn't complete yet."""
+        path = os.path.join(watcher.path, name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                file_read(f.tell())
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            attempts = self._read_attempts.get(path, 0) + 1
+            if attempts < MAX_READ_ATTEMPTS:
+                self._read_attempts[path] = attempts
+                watch.retry(name)
+            else:
+                self._read_attempts.pop(path, None)
+                logger.error(f"ResultAggregator: Giving up on unreadable file {path}.")
+            return None
+        self._read_attempts.pop(path, None)
+        return data
+
+    def _ordered(self, watcher, names):
+        """Names ordered oldest first, so 'latest' really is the newest file."""
+        return sorted(names, key=lambda name: watcher.files.get(name, 0.0))
+
+    def _initial_names(self, watcher, names):
+        """
+        On startup the watch reports every file already on disk. Only the newest `window`
+        of them can still affect a rate, so older history is skipped rather than read.
+        """
+        if len(names) <= self.window:
+            return self._ordered(watcher, names)
+        newest = heapq.nlargest(self.window, names, key=lambda name: watcher.files.get(name, 0.0))
+        return newest[::-1]
+
+    def add_result(self, report):
+        status = report.get('status', 'unknown')
+        self.overall.add(status)
+        self._generation_window(report.get('generation')).add(status)
+        daemon_type = report.get('daemon_type') or 'unknown'
+        window = self.daemon_types.get(daemon_type)
+        if window is None:
+            window = self.daemon_types[daemon_type] = RollingWindow(self.window)
+        window.add(status)
+        self.latest_result = report
+        self.results_ingested += 1
+
+    def add_chaos(self, chaos_data):
+        self.chaos.add(chaos_data.get('chaos_type', 'unknown'))
+        self.latest_chaos = chaos_data
+        self.chaos_ingested += 1
+
+    def ingest(self):
+        """
+        Reads the result and chaos files written since the previous call.
+        Returns (new_results, new_chaos_events).
+        """
+        select = self._initial_names if not self._bootstrapped else self._ordered
+        new_results = 0
+        changed, _ = self.results_watch.poll()
+        for name in select(self.results_watcher, changed):
+            report = self._read(self.results_watch, self.results_watcher, name)
+            if report is not None:
+                self.add_result(report)
+                new_results += 1
+
+        new_chaos = 0
+        if self.chaos_watch is not None:
+            changed, _ = self.chaos_watch.poll()
+            for name in select(self.chaos_watcher, changed):
+                chaos_data = self._read(self.chaos_watch, self.chaos_watcher, name)
+                if chaos_data is not None:
+                    self.add_chaos(chaos_data)
+                    new_chaos += 1
+
+        self._bootstrapped = True
+        return new_results, new_chaos
+
+    def rates(self):
+        return self.overall.rates()
+
+    def rates_for_generation(self, generation):
+        window = self.generations.get(generation)
+        return window.rates() if window is not None else RollingWindow(1).rates()
+
+    def rates_for_daemon_type(self, daemon_type):
+        window = self.daemon_types.get(daemon_type)
+        return window.rates() if window is not None else RollingWindow(1).rates()
+
+    def summary(self):
+        return {
+            'overall': self.overall.rates(),
+            'generations': {generation: window.rates() for generation, window in self.generations.items()},
+            'daemon_types': {daemon_type: window.rates() for daemon_type, window in self.daemon_types.items()},
+            'chaos_types': dict(self.chaos.counts),
+            'results_ingested': self.results_ingested,
+            'chaos_ingested': self.chaos_ingested,
+        }
+
+    def close(self):
+        self.results_watch.close()
+        if self.chaos_watch is not None:
+            self.chaos_watch.close()
@@ -0,0 +1,485 @@
+# spiral_core/segment_store.py
+
+import os
+import mmap
+import fcntl
+import random
+import struct
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = '.seg'
+INDEX_SUFFIX = '.idx'
+
+# One index entry per record: offset and length of the payload in the segment file.
+_INDEX_ENTRY = struct.Struct('<QI')
+
+
+def index_path(segment_path):
+    """The offset index lives next to its segment: foo.seg -> foo.seg.idx"""
+    return segment_path + INDEX_SUFFIX
+
+
+class SegmentWriter:
+    """
+    Appends bursts of payloads to a segment file: the payloads are concatenated into
+    `<prefix>_<timestamp>_<pid>.seg` with one write, and their (offset, length) pairs
+    go to the `.seg.idx` index with another. A new segment is started once the current
+    one passes `max_segment_bytes`, so thousands of small payloads cost a handful of
+    files and syscalls instead of one file each.
+    """
+
+    def __init__(self, directory, prefix='segment', max_segment_bytes=64 * 1024 * 1024, fsync=False):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segment_path = None
+        self._data = None
+        self._index = None
+        self._size = 0
+        self._sequence = 0
+
+    @property
+    def segment_path(self):
+        return self._segment_path
+
+    def _open_segment(self):
+        self._close_segment()
+        self._sequence += 1
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self._segment_path = os.path.join(self.directory, f"{self.prefix}_{timestamp}_{os.getpid()}_{self._sequence}{SEGMENT_SUFFIX}")
+        self._data = open(self._segment_path, 'ab')
+        self._index = open(index_path(self._segment_path), 'ab')
+        self._size = self._data.tell()
+        logger.debug(f"SegmentWriter: Started segment {self._segment_path}")
+
+    def _close_segment(self):
+        for f in (self._data, self._index):
+            if f is not None:
+                f.close()
+        self._data = self._index = None
+
+    def append_batch(self, payloads):
+        """
+        Appends `payloads` (bytes or str, str is UTF-8 encoded) as one burst.
+        Returns (segment_path, [(offset, length), ...]) in payload order.
+        """
+        encoded = [p.encode('utf-8') if isinstance(p, str) else bytes(p) for p in payloads]
+        with self._lock:
+            if self._data is None or (self._size and self._size >= self.max_segment_bytes):
+                self._open_segment()
+            locations = []
+            offset = self._size
+            for payload in encoded:
+                locations.append((offset, len(payload)))
+                offset += len(payload)
+
+            # Data first, then the index: an entry never points at bytes that aren't there.
+            self._data.write(b''.join(encoded))
+            self._data.flush()
+            self._index.write(b''.join(_INDEX_ENTRY.pack(o, n) for o, n in locations))
+            self._index.flush()
+            if self.fsync:
+                os.fsync(self._data.fileno())
+                os.fsync(self._index.fileno())
+            self._size = offset
+            return self._segment_path, locations
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+def read_record(segment_path, offset, length):
+    """Reads one payload back from a segment."""
+    with open(segment_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    if len(data) != length:
+        raise ValueError(f"Truncated record at {offset} in {segment_path}: wanted {length} bytes, got {len(data)}")
+    return data
+
+
+def read_index(segment_path):
+    """Returns every (offset, length) entry indexed for a segment, in append order."""
+    with open(index_path(segment_path), 'rb') as f:
+        raw = f.read()
+    usable = len(raw) - len(raw) % _INDEX_ENTRY.size
+    return [entry for entry in _INDEX_ENTRY.iter_unpack(raw[:usable])]
+
+
+def iter_segment(segment_path):
+    """Yields (offset, payload bytes) for every indexed record of a segment."""
+    with open(segment_path, 'rb') as f:
+        for offset, length in read_index(segment_path):
+            f.seek(offset)
+            yield offset, f.read(length)
+
+
+PACK_SUFFIX = '.pack'
+PACK_INDEX_SUFFIX = '.pidx'
+PACK_MAGIC = b'SPK1'
+FLAG_LIVE = 0
+FLAG_TOMBSTONE = 1
+
+# Pack record header: magic, flag, name length, payload length; then name, then payload.
+_PACK_RECORD = struct.Struct('<4sBHI')
+# Pack index entry: flag, name length, payload offset, payload length; then name.
+_PACK_INDEX_ENTRY = struct.Struct('<BHQI')
+
+
+class _Pack:
+    """One pack file and its header index, mapped read-only on demand."""
+
+    def __init__(self, directory, pack_id):
+        self.pack_id = pack_id
+        self.path = os.path.join(directory, f"archive_{pack_id:06d}{PACK_SUFFIX}")
+        self.index_path = self.path[:-len(PACK_SUFFIX)] + PACK_INDEX_SUFFIX
+        self.index_position = 0
+        self._map = None
+
+    def view(self, offset, length):
+        """Zero-copy memoryview of a payload, remapping if the pack grew since the last map."""
+        if self._map is None or offset + length > len(self._map):
+            self.unmap()
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._map)[offset:offset + length]
+
+    def unmap(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds a view; the mapping goes away with it.
+                pass
+            self._map = None
+
+
+class PackedArchive:
+    """
+    Archive backend that stores modules in append-only pack files instead of one
+    .py file (and one inode) each.
+
+    Each pack has a compact header index beside it (`.pidx`: flag, name, offset and
+    length per entry), so opening the archive reads only the small index files. Reads
+    are zero-copy views into a read-only mmap of the pack. Deleting a module appends a
+    tombstone; compact() rewrites the live entries into a fresh pack and drops the old
+    ones. materialize() writes a real .py file only when something needs to execute it.
+
+    Several processes may use one archive: appends and compaction hold an exclusive
+    flock on the archive's lock file, and refresh() picks up other processes' changes
+    by reading only the index bytes appended since the last refresh.
+    """
+
+    def __init__(self, directory, max_pack_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_pack_bytes = max_pack_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._lock_path = os.path.join(directory, 'archive.lock')
+        self._packs = {}
+        self._reset()
+        self.refresh()
+
+    @classmethod
+    def from_params(cls, params):
+        """Returns the packed archive when params select it, otherwise None (plain files)."""
+        if params.get('mnemo_archive_backend', 'files') != 'packed':
+            return None
+        mnemo_archive_path = params.get('mnemo_archive_path', 'mnemo_archive/')
+        return cls(params.get('mnemo_packed_archive_path', os.path.join(mnemo_archive_path, 'packed/')),
+                   max_pack_bytes=params.get('mnemo_pack_max_bytes', 64 * 1024 * 1024))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        return list(self._names)
+
+    def _reset(self):
+        for pack in self._packs.values():
+            pack.unmap()
+        self._packs = {}
+        self._entries = {}       # name -> (pack_id, offset, length)
+        self._names = []         # for O(1) random choice
+        self._positions = {}     # name -> index into _names
+        self.dead_bytes = 0
+        self.live_bytes = 0
+
+    def _pack_ids_on_disk(self):
+        ids = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith('archive_') and entry.name.endswith(PACK_INDEX_SUFFIX):
+                    try:
+                        ids.append(int(entry.name[len('archive_'):-len(PACK_INDEX_SUFFIX)]))
+                    except ValueError:
+                        continue
+        return sorted(ids)
+
+    def _set_entry(self, name, location):
+        previous = self._entries.get(name)
+        if previous is not None:
+            self.dead_bytes += previous[2]
+            self.live_bytes -= previous[2]
+        else:
+            self._positions[name] = len(self._names)
+            self._names.append(name)
+        self._entries[name] = location
+        self.live_bytes += location[2]
+
+    def _drop_entry(self, name):
+        previous = self._entries.pop(name, None)
+        if previous is None:
+            return False
+        self.dead_bytes += previous[2]
+        self.live_bytes -= previous[2]
+        position = self._positions.pop(name)
+        last = self._names.pop()
+        if last != name:
+            self._names[position] = last
+            self._positions[last] = position
+        return True
+
+    def _apply_index(self, pack):
+        """Applies the index entries appended to `pack` since it was last read."""
+        with open(pack.index_path, 'rb') as f:
+            f.seek(pack.index_position)
+            raw = f.read()
+        position = 0
+        while position + _PACK_INDEX_ENTRY.size <= len(raw):
+            flag, name_length, offset, length = _PACK_INDEX_ENTRY.unpack_from(raw, position)
+            end = position + _PACK_INDEX_ENTRY.size + name_length
+            if end > len(raw):
+                break  # the writer is mid-append; pick the rest up next refresh
+            name = raw[position + _PACK_INDEX_ENTRY.size:end].decode('utf-8')
+            if flag == FLAG_TOMBSTONE:
+                self._drop_entry(name)
+            else:
+                self._set_entry(name, (pack.pack_id, offset, length))
+            position = end
+        pack.index_position += position
+
+    def refresh(self):
+        """Brings the in-memory index up to date with every pack on disk."""
+        with self._lock:
+            on_disk = self._pack_ids_on_disk()
+            vanished = [pack_id for pack_id in self._packs if pack_id not in on_disk]
+            if vanished:
+                # Packs are only removed by compaction: rebuild from the survivors.
+                self._reset()
+            for pack_id in on_disk:
+                pack = self._packs.get(pack_id)
+                if pack is None:
+                    pack = self._packs[pack_id] = _Pack(self.directory, pack_id)
+                try:
+                    self._apply_index(pack)
+                except FileNotFoundError:
+                    self._packs.pop(pack_id, None)
+
+    def _locked(self):
+        return _FileLock(self._lock_path)
+
+    def _writable_pack(self):
+        """The newest pack, or a new one once it is full. Caller holds the file lock."""
+        pack_ids = sorted(self._packs)
+        if pack_ids:
+            pack = self._packs[pack_ids[-1]]
+            size = os.path.getsize(pack.path) if os.path.exists(pack.path) else 0
+            if size < self.max_pack_bytes:
+                return pack
+            next_id = pack_ids[-1] + 1
+        else:
+            next_id = 1
+        pack = self._packs[next_id] = _Pack(self.directory, next_id)
+        open(pack.path, 'ab').close()
+        open(pack.index_path, 'ab').close()
+        return pack
+
+    def _append(self, records):
+        """Appends (flag, name, payload bytes) records to the writable pack. Caller holds both locks."""
+        self.refresh()
+        pack = self._writable_pack()
+        with open(pack.path, 'ab') as data:
+            position = data.tell()
+            body, index = [], []
+            for flag, name, payload in records:
+                encoded_name = name.encode('utf-8')
+                body.append(_PACK_RECORD.pack(PACK_MAGIC, flag, len(encoded_name), len(payload)))
+                body.append(encoded_name)
+                body.append(payload)
+                offset = position + _PACK_RECORD.size + len(encoded_name)
+                index.append(_PACK_INDEX_ENTRY.pack(flag, len(encoded_name), offset, len(payload)) + encoded_name)
+                position = offset + len(payload)
+            # Pack first, then its index: an index entry never points at bytes that aren't there.
+            data.write(b''.join(body))
+        with open(pack.index_path, 'ab') as f:
+            f.write(b''.join(index))
+        self._apply_index(pack)
+
+    def put_many(self, modules):
+        """Stores (name, content) pairs; a name stored again replaces its earlier version."""
+        records = [(FLAG_LIVE, name, content.encode('utf-8') if isinstance(content, str) else bytes(content))
+                   for name, content in modules]
+        if not records:
+            return
+        with self._lock, self._locked():
+            self._append(records)
+
+    def put(self, name, content):
+        self.put_many([(name, content)])
+
+    def delete(self, name):
+        """Tombstones `name`. Returns False if it wasn't in the archive."""
+        with self._lock, self._locked():
+            self.refresh()
+            if name not in self._entries:
+                return False
+            self._append([(FLAG_TOMBSTONE, name, b'')])
+            return True
+
+    def read(self, name):
+        """Zero-copy memoryview of a module's bytes. Raises KeyError if it isn't archived."""
+        with self._lock:
+            pack_id, offset, length = self._entries[name]
+            return self._packs[pack_id].view(offset, length)
+
+    def read_text(self, name):
+        view = self.read(name)
+        try:
+            return str(view, 'utf-8')
+        finally:
+            view.release()
+
+    def random_name(self, rng=None):
+        with self._lock:
+            if not self._names:
+                return None
+            return (rng or random).choice(self._names)
+
+    def materialize(self, name, directory):
+        """
+        Writes `name` out as a real file under `directory` (unless the file there already
+        holds exactly the packed bytes) and returns its path, for code that must execute
+        or open a file. A reused file is touched, so prune_materialized() keeps it.
+        """
+        path = os.path.join(directory, name)
+        view = self.read(name)
+        try:
+            try:
+                if os.path.getsize(path) == len(view):
+                    with open(path, 'rb') as f:
+                        if f.read() == view:
+                            os.utime(path)
+                            return path
+            except FileNotFoundError:
+                pass
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(view)
+            os.replace(tmp_path, path)
+        finally:
+            view.release()
+        return path
+
+    def prune_materialized(self, directory, max_files):
+        """
+        Removes materialized files under `directory` whose module is no longer packed, then
+        the least recently materialized ones beyond `max_files`. Returns how many went.
+        """
+        try:
+            with os.scandir(directory) as it:
+                files = [entry for entry in it if entry.is_file() and not entry.name.endswith('.tmp')]
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            doomed = [entry for entry in files if entry.name not in self._entries]
+            kept = [entry for entry in files if entry.name in self._entries]
+        if len(kept) > max_files:
+            kept.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+            doomed.extend(kept[max_files:])
+        removed = 0
+        for entry in doomed:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def dead_ratio(self):
+        total = self.dead_bytes + self.live_bytes
+        return self.dead_bytes / total if total else 0.0
+
+    def compact(self):
+        """
+        Rewrites every live module into one new pack and removes the old packs, dropping
+        tombstones and superseded versions. Returns the number of payload bytes reclaimed.
+        """
+        with self._lock, self._locked():
+            self.refresh()
+            reclaimed = self.dead_bytes
+            old_ids = sorted(self._packs)
+            if not old_ids or not reclaimed:
+                return 0
+            live = []
+            for name in self._names:
+                view = self.read(name)
+                live.append((FLAG_LIVE, name, bytes(view)))
+                view.release()
+
+            new_pack = self._packs[old_ids[-1] + 1] = _Pack(self.directory, old_ids[-1] + 1)
+            open(new_pack.path, 'ab').close()
+            open(new_pack.index_path, 'ab').close()
+            max_pack_bytes, self.max_pack_bytes = self.max_pack_bytes, float('inf')
+            try:
+                if live:
+                    self._append(live)
+            finally:
+                self.max_pack_bytes = max_pack_bytes
+            for pack_id in old_ids:
+                pack = self._packs[pack_id]
+                pack.unmap()
+                for path in (pack.index_path, pack.path):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            self._reset()
+            self.refresh()
+            logger.info(f"PackedArchive: Compacted {len(old_ids)} packs in {self.directory}, reclaimed {reclaimed} bytes.")
+            return reclaimed
+
+    def close(self):
+        with self._lock:
+            for pack in self._packs.values():
+                pack.unmap()
+
+
+class _FileLock:
+    """Exclusive flock on a lock file, shared by every process using the archive."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
@@ -0,0 +1,372 @@
+# spiral_core/shard.py
+"""
+Sharded spiral: several nodes, each running its own Kairos -> Aion -> Kronos pipeline
+over a hash-partitioned slice of module names, plus one leader aggregating them.
+
+    python -m spiral_core.shard launch --shards 4 --root /dev/shm/spiral_shards --duration 120
+    python -m spiral_core.shard leader --socket /tmp/spiral_leader.sock
+
+A node is an ordinary spiral (Apollo and the daemons it supervises) with its own working
+directory, genesis_params.json, shared-memory names and these params:
+
+    shard_index / shard_count  - Kairos only forges names with shard_of(name) == shard_index
+    shard_leader_socket        - Unix socket of the leader; Apollo reports to it every pulse
+
+The leader speaks JSON lines over the socket. A node sends
+{"type": "report", "shard": i, ...} and gets back {"type": "ack", "cluster": {...}},
+the leader's current aggregate. The launcher runs a leader and N nodes on one box.
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import socket
+import signal
+import logging
+import argparse
+import threading
+import socketserver
+
+from spiral_core.genesis_loader import GenesisLoader, GENESIS_PARAMS_ENV
+from spiral_core.spiral_rng import derive_seed, fresh_master_seed
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 1
+_MAX_LINE = 1 << 20
+
+
+def shard_of(name, shard_count):
+    """Shard owning module `name` (with or without .py). Stable across processes and hosts."""
+    if name.endswith('.py'):
+        name = name[:-3]
+    return zlib.crc32(name.encode('utf-8')) % shard_count if shard_count > 1 else 0
+
+
+class ShardConfig:
+    """This node's place in the cluster. With shard_count 1 it owns every name."""
+
+    def __init__(self, index=0, count=1, leader_socket=None):
+        if not 0 <= index < max(1, count):
+            raise ValueError(f"shard_index {index} is outside shard_count {count}")
+        self.index = index
+        self.count = max(1, count)
+        self.leader_socket = leader_socket
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(params.get('shard_index', 0), params.get('shard_count', 1), params.get('shard_leader_socket'))
+
+    @property
+    def sharded(self):
+        return self.count > 1
+
+    def owns(self, name):
+        return shard_of(name, self.count) == self.index
+
+
+def _send_line(sock_file, message):
+    sock_file.write(json.dumps(message).encode('utf-8') + b'\n')
+    sock_file.flush()
+
+
+def _read_line(sock_file):
+    line = sock_file.readline(_MAX_LINE)
+    if not line:
+        raise ConnectionError("Connection closed")
+    return json.loads(line)
+
+
+class ShardReporter:
+    """
+    A node's connection to the leader. report() never raises and never waits longer than
+    `timeout`: when the leader is unreachable the report is dropped, and the connection is
+    retried on the next call.
+    """
+
+    def __init__(self, socket_path, shard_index, timeout=0.5):
+        self.socket_path = socket_path
+        self.shard_index = shard_index
+        self.timeout = timeout
+        self.cluster = None
+        self._sock = None
+        self._file = None
+        self._failing = False
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._file = sock.makefile('rwb')
+
+    def report(self, payload):
+        """Sends one report. Returns the leader's cluster aggregate, or None."""
+        message = dict(payload, type='report', shard=self.shard_index, version=PROTOCOL_VERSION)
+        try:
+            if self._sock is None:
+                self._connect()
+            _send_line(self._file, message)
+            reply = _read_line(self._file)
+        except (OSError, ValueError) as e:
+            if not self._failing:
+                logger.warning(f"ShardReporter: Leader at {self.socket_path} unreachable ({e}). Will keep retrying.")
+            self._failing = True
+            self.close()
+            return None
+        if self._failing:
+            logger.info(f"ShardReporter: Reconnected to the leader at {self.socket_path}.")
+            self._failing = False
+        self.cluster = reply.get('cluster')
+        return self.cluster
+
+    def close(self):
+        for resource in (self._file, self._sock):
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        self._sock = self._file = None
+
+
+class _LeaderHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        leader = self.server.leader
+        while True:
+            try:
+                message = _read_line(self.rfile)
+            except (ConnectionError, OSError):
+                return
+            except ValueError as e:
+                _send_line(self.wfile, {'type': 'error', 'error': f"Malformed message: {e}"})
+                continue
+            if message.get('type') == 'report':
+                leader.add_report(message)
+                _send_line(self.wfile, {'type': 'ack', 'cluster': leader.cluster()})
+            elif message.get('type') == 'cluster':
+                _send_line(self.wfile, {'type': 'cluster', 'cluster': leader.cluster()})
+            else:
+                _send_line(self.wfile, {'type': 'error', 'error': f"Unknown message type {message.get('type')!r}"})
+
+
+class _LeaderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ShardLeader:
+    """
+    Aggregates the nodes' reports. Each node reports cumulative counters (modules_through:
+    modules that left its pipeline consolidated or rejected); per-node rates
+    come from the difference between its last two reports, and cluster rates are the sums.
+    """
+
+    def __init__(self, socket_path, stats_path=None):
+        self.socket_path = socket_path
+        self.stats_path = stats_path
+        self.reports = {}
+        self.rates = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def add_report(self, report):
+        now = time.time()
+        shard = report.get('shard')
+        with self._lock:
+            previous = self.reports.get(shard)
+            # Counters restart with the node's Apollo; skip the rate across a restart.
+            if (previous is not None and now > previous['received_at']
+                    and report.get('modules_through', 0) >= previous.get('modules_through', 0)):
+                elapsed = now - previous['received_at']
+                self.rates[shard] = {
+                    'modules_per_second': (report.get('modules_through', 0) - previous.get('modules_through', 0)) / elapsed,
+                    'results_per_second': (report.get('results_ingested', 0) - previous.get('results_ingested', 0)) / elapsed,
+                }
+            self.reports[shard] = dict(report, received_at=now)
+
+    def cluster(self):
+        with self._lock:
+            reports = dict(self.reports)
+            rates = dict(self.rates)
+        generations = [report.get('generation', 0) for report in reports.values()]
+        results = sum(report.get('results_ingested', 0) for report in reports.values())
+        successes = sum(report.get('results_ingested', 0) * report.get('success_rate', 0.0) for report in reports.values())
+        return {
+            'shards': len(reports),
+            'generation_min': min(generations, default=0),
+            'generation_max': max(generations, default=0),
+            'modules_through': sum(report.get('modules_through', 0) for report in reports.values()),
+            'results_ingested': results,
+            'success_rate': successes / results if results else 0.0,
+            'modules_per_second': round(sum(rate['modules_per_second'] for rate in rates.values()), 3),
+            'results_per_second': round(sum(rate['results_per_second'] for rate in rates.values()), 3),
+        }
+
+    def snapshot(self):
+        with self._lock:
+            nodes = {str(shard): dict(report, **self.rates.get(shard, {})) for shard, report in self.reports.items()}
+        return {'cluster': self.cluster(), 'nodes': nodes}
+
+    def write_stats(self):
+        if not self.stats_path:
+            return
+        tmp_path = f"{self.stats_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=4)
+        os.replace(tmp_path, self.stats_path)
+
+    def start(self):
+        """Serves the socket from a background thread."""
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self._server = _LeaderServer(self.socket_path, _LeaderHandler)
+        self._server.leader = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name='shard-leader', daemon=True)
+        self._thread.start()
+        logger.info(f"ShardLeader: Listening on {self.socket_path}.")
+
+    def close(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def node_params(base_params, shard_index, shard_count, leader_socket, master_seed):
+    """genesis params for one node: the shared ones, its shard, and names no other node uses."""
+    params = dict(base_params)
+    params.update({
+        'shard_index': shard_index,
+        'shard_count': shard_count,
+        'shard_leader_socket': leader_socket,
+        'master_seed': derive_seed(master_seed, 'shard', shard_index),
+        'param_segment_name': f"{base_params.get('param_segment_name', 'spiral_params')}_shard{shard_index}",
+        'pulse_metrics_prefix': f"{base_params.get('pulse_metrics_prefix', 'spiral_metrics')}_shard{shard_index}",
+    })
+    return params
+
+
+def prepare_nodes(root, shard_count, leader_socket, master_seed, overrides=None):
+    """Creates root/shard<i>/genesis_params.json for every node. Returns their directories."""
+    base_params = dict(GenesisLoader().params)
+    base_params.update(overrides or {})
+    directories = []
+    for shard_index in range(shard_count):
+        directory = os.path.join(root, f"shard{shard_index}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'genesis_params.json'), 'w', encoding='utf-8') as f:
+            json.dump(node_params(base_params, shard_index, shard_count, leader_socket, master_seed), f, indent=4)
+        directories.append(directory)
+    return directories
+
+
+def launch(shard_count, root, duration=None, master_seed=None, overrides=None, report_every=5.0):
+    """
+    Runs a leader and `shard_count` nodes (each an Apollo in its own directory under
+    `root`) on this box until `duration` seconds pass or SIGINT/SIGTERM. Returns the
+    leader's final snapshot.
+    """
+    # Imported here so the node side (Apollo, Kairos) doesn't pull in the supervisor.
+    from spiral_core.supervisor_io import Supervisor
+
+    os.makedirs(root, exist_ok=True)
+    master_seed = fresh_master_seed() if master_seed is None else master_seed
+    leader = ShardLeader(os.path.join(root, 'leader.sock'), stats_path=os.path.join(root, 'leader_stats.json'))
+    directories = prepare_nodes(root, shard_count, leader.socket_path, master_seed, overrides)
+    leader.start()
+
+    apollo_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'apollo.py')
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    supervisors = []
+    for directory in directories:
+        env = os.environ.copy()
+        env['PYTHONPATH'] = project_root + os.pathsep + env.get('PYTHONPATH', '')
+        env[GENESIS_PARAMS_ENV] = os.path.join(directory, 'genesis_params.json')
+        supervisors.append((directory, Supervisor(env=env)))
+
+    stopping = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.set())
+    logger.info(f"Shard launcher: {shard_count} nodes under {root}, master_seed {master_seed}.")
+
+    started = time.monotonic()
+    next_report = started + report_every
+    try:
+        while not stopping.is_set() and (duration is None or time.monotonic() - started < duration):
+            for index, (directory, supervisor) in enumerate(supervisors):
+                for _, exit_code, _ in supervisor.reap():
+                    logger.warning(f"Shard launcher: Node {index} exited (Exit Code: {exit_code}).")
+                # Each node's Apollo runs from its own directory, where it resolves every relative path.
+                supervisor.start(f"shard{index}", ['python3', '-u', apollo_script], cwd=directory)
+            if time.monotonic() >= next_report:
+                next_report += report_every
+                leader.write_stats()
+                cluster = leader.cluster()
+                logger.info(f"Shard launcher: {cluster['shards']}/{shard_count} nodes reporting, generations "
+                            f"{cluster['generation_min']}-{cluster['generation_max']}, "
+                            f"{cluster['modules_per_second']:.1f} modules/s, {cluster['modules_through']} modules through.")
+            stopping.wait(0.5)
+    finally:
+        for _, supervisor in supervisors:
+            supervisor.stop_all()
+        leader.write_stats()
+        snapshot = leader.snapshot()
+        leader.close()
+    return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    leader_parser = commands.add_parser('leader', help="Run only the leader")
+    leader_parser.add_argument('--socket', required=True)
+    leader_parser.add_argument('--stats', help="Rewrite this JSON file with the aggregate every few seconds")
+    launch_parser = commands.add_parser('launch', help="Run a leader and N nodes on this box")
+    launch_parser.add_argument('--shards', type=int, required=True)
+    launch_parser.add_argument('--root', required=True, help="Directory for the nodes' working directories")
+    launch_parser.add_argument('--duration', type=float, help="Stop after this many seconds")
+    launch_parser.add_argument('--seed', type=int, help="Cluster master_seed; each node derives its own")
+    launch_parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='KEY=JSON',
+                               help="Override a genesis parameter on every node")
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+    if args.command == 'leader':
+        leader = ShardLeader(args.socket, stats_path=args.stats)
+        stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stopping.set())
+        leader.start()
+        try:
+            while not stopping.wait(5.0):
+                leader.write_stats()
+        finally:
+            leader.close()
+        return
+
+    overrides = {}
+    for override in args.overrides:
+        key, _, value = override.partition('=')
+        overrides[key] = json.loads(value)
+    snapshot = launch(args.shards, args.root, duration=args.duration, master_seed=args.seed, overrides=overrides)
+    json.dump(snapshot['cluster'], sys.stdout, indent=4)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,51 @@
 # spiral_core/shared_knowledge_queue.py
-from multiprocessing import Queue
+from multiprocessing import Queue, Lock
+import os
 import logging
 
+from spiral_core.shm_queue import ShmRingQueue
+
 logger = logging.getLogger(__name__)
 
 class SharedKnowledgeQueue:
     """
     A singleton-like class to provide a single instance of a multiprocessing Queue
     for inter-module communication (e.g., Apollo -> Kairos feedback).
+    The first instance picks the backend: 'multiprocessing' (a multiprocessing.Queue) or
+    'shm' (a ShmRingQueue: no pickling for bytes and str, put_many/get_many batches and
+    an exact size). Options such as slots, slot_size and blob_capacity go to the latter.
+    Later calls get the same instance; asking them for another backend or other options
+    raises ValueError (call with no arguments to just get the queue).
     """
     _instance = None
     _queue = None
+    backend = None
+    shm_options = None
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(SharedKnowledgeQueue, cls).__new__(cls)
-            cls._queue = Queue()
-            logger.info("SharedKnowledgeQueue initialized.")
+    def __new__(cls, backend=None, **shm_options):
+        if cls._instance is not None:
+            if (backend is not None and backend != cls.backend) or (shm_options and shm_options != cls.shm_options):
+                raise ValueError(f"SharedKnowledgeQueue already uses the {cls.backend!r} backend "
+                                 f"with {cls.shm_options or {}}; cannot switch to {backend or cls.backend!r} "
+                                 f"with {shm_options}")
+            return cls._instance
+        if backend is None:
+            backend = 'multiprocessing'
+        if backend != 'shm' and shm_options:
+            raise ValueError(f"Options {sorted(shm_options)} only apply to the 'shm' backend")
+        options = dict(shm_options)
+        if backend == 'shm':
+            name = shm_options.pop('name', f"spiral_knowledge_{os.getpid()}")
+            queue = ShmRingQueue.create(name, lock=Lock(), **shm_options)
+        elif backend == 'multiprocessing':
+            queue = Queue()
+        else:
+            raise ValueError(f"Unknown SharedKnowledgeQueue backend {backend!r}")
+        cls._instance = super(SharedKnowledgeQueue, cls).__new__(cls)
+        cls._queue = queue
+        cls.backend = backend
+        cls.shm_options = options
+        logger.info(f"SharedKnowledgeQueue initialized ({backend} backend).")
         return cls._instance
 
     def get_queue(self):
@@ -25,6 +54,8 @@ class SharedKnowledgeQueue:
 
     def get_size(self):
         """Returns the current size of the queue."""
+        if self.backend == 'shm':
+            return self._queue.qsize()  # Exact: counted in the segment header.
         try:
             return self._queue.qsize()
         except NotImplementedError:
@@ -37,6 +68,10 @@ class SharedKnowledgeQueue:
 
     def clear(self):
         """Clears all items from the queue."""
+        if self.backend == 'shm':
+            self._queue.clear()
+            logger.info("SharedKnowledgeQueue cleared.")
+            return
         while not self._queue.empty():
             try:
                 self._queue.get_nowait()
@@ -44,6 +79,18 @@ class SharedKnowledgeQueue:
                 logger.error(f"Error clearing queue item: {e}")
         logger.info("SharedKnowledgeQueue cleared.")
 
+    def close(self):
+        """Releases the queue (removing a shm segment) so the next instance starts afresh."""
+        cls = type(self)
+        if cls._queue is None:
+            return
+        if self.backend == 'shm':
+            cls._queue.close()
+            cls._queue.unlink()
+        else:
+            cls._queue.close()
+        cls._instance = cls._queue = cls.backend = cls.shm_options = None
+
 # Example Usage (for independent testing if needed, though primarily for import)
 if __name__ == "__main__":
     q_instance1 = SharedKnowledgeQueue()
@@ -0,0 +1,374 @@
+# spiral_core/shm_queue.py
+"""
+FIFO queue in shared memory, a drop-in for multiprocessing.Queue without the pickling,
+pipe and feeder thread.
+
+The segment holds a ring of fixed-size slots and a blob area. A payload that fits in
+a slot (slot_size - 8 bytes) is stored in it; a larger one (a big code module) is
+written once into the blob area and the slot only records where. bytes and str travel
+as they are; anything else is pickled. Producers write straight into the segment and
+consumers copy out once.
+
+    queue = ShmRingQueue.create('spiral_knowledge', slots=1024, slot_size=1024)
+    queue.put_many([b'...', 'module source', {'feedback': 1}])
+    items = queue.get_many(64)
+
+Counters in the header are exact: qsize() is what was put minus what was taken.
+Without a lock the queue is single-producer/single-consumer and lock-free. Pass a
+multiprocessing.Lock (shared with every process using the queue) for several
+producers or consumers. A queue pickles as its name, lock and doorbell, so it can be
+handed to child processes like a multiprocessing.Queue.
+
+The doorbell is a pipe each put rings, so a consumer can sleep until items arrive:
+wait_handle() goes to multiprocessing.connection.wait() alongside other queues, and a
+blocking get waits on it instead of polling. Only the queue create() returned and its
+pickled copies have it; a queue opened with attach() by name neither rings nor waits on
+it, so a consumer notices its puts only on a timeout (DOORBELL_RECHECK_SECONDS for a
+blocking get).
+"""
+
+import os
+import time
+import queue
+import pickle
+import struct
+import logging
+import multiprocessing
+import multiprocessing.queues
+from multiprocessing import shared_memory
+from multiprocessing import connection
+
+from spiral_core.param_segment import _untrack
+
+logger = logging.getLogger(__name__)
+
+QUEUE_MAGIC = 0x5350495241000201  # "SPIRA" + shm queue, layout version 1
+# magic, slots, slot size, blob capacity, then the counters: head and tail (slot sequence
+# numbers), blob head and tail (monotonic byte offsets), puts and gets.
+_HEADER = struct.Struct('<QIIQQQQQQQ')
+_HEAD, _TAIL, _BLOB_HEAD, _BLOB_TAIL, _PUTS, _GETS = 24, 32, 40, 48, 56, 64
+_U64 = struct.Struct('<Q')
+_SLOT = struct.Struct('<II')  # payload length, flags
+_BLOB_REF = struct.Struct('<Q')  # blob offset, after _SLOT
+
+FLAG_BLOB = 1
+FLAG_PICKLED = 2
+FLAG_STR = 4
+
+# Blocking put()/get() poll with a backoff growing up to this many seconds.
+MAX_WAIT_SLEEP = 0.001
+# A get waiting on the doorbell still looks at the queue this often, for puts from
+# queues opened by name, which don't ring.
+DOORBELL_RECHECK_SECONDS = 0.1
+
+
+def _encode(item):
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return item, 0
+    if isinstance(item, str):
+        return item.encode('utf-8'), FLAG_STR
+    return pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL), FLAG_PICKLED
+
+
+def _decode(data, flags):
+    if flags & FLAG_PICKLED:
+        return pickle.loads(data)
+    if flags & FLAG_STR:
+        return data.decode('utf-8')
+    return data
+
+
+class ShmRingQueue:
+    """Shared-memory FIFO of fixed-size slots with out-of-line blobs. See the module docstring."""
+
+    def __init__(self, shm, lock=None, doorbell=None):
+        self._shm = shm
+        self._buf = shm.buf
+        self.name = shm.name
+        self.lock = lock
+        # (reader, writer) Connections of the doorbell pipe, or None. Both ends never block.
+        self.doorbell = doorbell
+        if doorbell is not None:
+            for end in doorbell:
+                os.set_blocking(end.fileno(), False)
+        magic, self.slots, self.slot_size, self.blob_capacity = _HEADER.unpack_from(self._buf, 0)[:4]
+        if magic != QUEUE_MAGIC:
+            raise ValueError(f"Queue segment '{self.name}' has an unknown layout ({magic:#x})")
+        self._slots_offset = _HEADER.size
+        self._blob_offset = _HEADER.size + self.slots * self.slot_size
+        self.inline_capacity = self.slot_size - _SLOT.size
+        if shm.size < self._blob_offset + self.blob_capacity:
+            raise ValueError(f"Queue segment '{self.name}' is too small ({shm.size} bytes)")
+
+    @classmethod
+    def create(cls, name, slots=1024, slot_size=1024, blob_capacity=64 * 1024 * 1024, lock=None, doorbell=True):
+        """
+        Creates the named queue. slot_size is rounded up to a multiple of 8, at least 24.
+        doorbell=False leaves out the doorbell pipe, for consumers that only poll.
+        """
+        slot_size = max(24, (slot_size + 7) // 8 * 8)
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=_HEADER.size + slots * slot_size + blob_capacity)
+        _HEADER.pack_into(shm.buf, 0, QUEUE_MAGIC, slots, slot_size, blob_capacity, 0, 0, 0, 0, 0, 0)
+        _untrack(shm)
+        logger.info(f"ShmRingQueue: Created '{name}' ({slots} slots of {slot_size} bytes, {blob_capacity} blob bytes).")
+        return cls(shm, lock, multiprocessing.Pipe(duplex=False) if doorbell else None)
+
+    @classmethod
+    def attach(cls, name, lock=None, doorbell=None):
+        """Opens an existing queue. Raises FileNotFoundError if it doesn't exist."""
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        return cls(shm, lock, doorbell)
+
+    def __reduce__(self):
+        return (self.attach, (self.name, self.lock, self.doorbell))
+
+    def _get(self, offset):
+        return _U64.unpack_from(self._buf, offset)[0]
+
+    def _set(self, offset, value):
+        _U64.pack_into(self._buf, offset, value)
+
+    # --- Occupancy ---------------------------------------------------------------------
+
+    def qsize(self):
+        return self._get(_HEAD) - self._get(_TAIL)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def full(self):
+        return self.qsize() >= self.slots
+
+    def wait_handle(self):
+        """
+        The doorbell's read end, for multiprocessing.connection.wait(): it becomes ready
+        once items may have arrived. None without a doorbell.
+        """
+        return None if self.doorbell is None else self.doorbell[0]
+
+    def wait(self, timeout=None):
+        """Blocks until the queue has items or `timeout` passes. Returns whether it has items."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        sleep = 0.0
+        while self.empty():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            if self.doorbell is not None:
+                # Drain first: a ring after this either finds an item below or wakes the wait.
+                self._drain_doorbell()
+                if self.empty():
+                    connection.wait([self.doorbell[0]], DOORBELL_RECHECK_SECONDS if remaining is None
+                                    else min(remaining, DOORBELL_RECHECK_SECONDS))
+                continue
+            sleep = min(MAX_WAIT_SLEEP, sleep * 2 or 0.00001)
+            time.sleep(sleep if remaining is None else min(sleep, remaining))
+        return True
+
+    def _ring(self):
+        try:
+            os.write(self.doorbell[1].fileno(), b'\0')
+        except BlockingIOError:
+            pass  # The pipe is full of rings the consumer hasn't drained; it will wake anyway.
+
+    def _drain_doorbell(self):
+        """Empties the doorbell pipe. Returns whether it held any rings."""
+        rang = False
+        try:
+            while os.read(self.doorbell[0].fileno(), 4096):
+                rang = True
+        except BlockingIOError:
+            pass
+        return rang
+
+    def stats(self):
+        blob_used = self._get(_BLOB_HEAD) - self._get(_BLOB_TAIL)
+        return {
+            'size': self.qsize(),
+            'slots': self.slots,
+            'blob_bytes_used': blob_used,
+            'blob_capacity': self.blob_capacity,
+            'puts': self._get(_PUTS),
+            'gets': self._get(_GETS),
+        }
+
+    # --- Producer side -----------------------------------------------------------------
+
+    def _blob_start(self, blob_head, length):
+        """Where a blob of `length` bytes goes: at blob_head, or at the next wrap if it would straddle it."""
+        if blob_head % self.blob_capacity + length > self.blob_capacity:
+            return blob_head + self.blob_capacity - blob_head % self.blob_capacity
+        return blob_head
+
+    def _try_put_locked(self, encoded):
+        """Writes as many of `encoded` as fit. Returns how many were written."""
+        head, tail = self._get(_HEAD), self._get(_TAIL)
+        blob_head, blob_tail = self._get(_BLOB_HEAD), self._get(_BLOB_TAIL)
+        written = 0
+        for data, flags in encoded:
+            if head - tail >= self.slots:
+                break
+            slot = self._slots_offset + (head % self.slots) * self.slot_size
+            length = len(data)
+            if length <= self.inline_capacity:
+                self._buf[slot + _SLOT.size:slot + _SLOT.size + length] = data
+            else:
+                start = self._blob_start(blob_head, length)
+                # With no blob live (blob_head == blob_tail) the whole area is free, whatever
+                # the wrap wastes: without this an item over half the capacity could never
+                # be placed once blob_head sat past the middle.
+                if blob_head != blob_tail and start + length - blob_tail > self.blob_capacity:
+                    break
+                physical = self._blob_offset + start % self.blob_capacity
+                self._buf[physical:physical + length] = data
+                _BLOB_REF.pack_into(self._buf, slot + _SLOT.size, start)
+                flags |= FLAG_BLOB
+                blob_head = start + length
+            _SLOT.pack_into(self._buf, slot, length, flags)
+            head += 1
+            written += 1
+        if written:
+            # Publish the blobs before the slots that point at them.
+            self._set(_BLOB_HEAD, blob_head)
+            self._set(_HEAD, head)
+            self._set(_PUTS, self._get(_PUTS) + written)
+        return written
+
+    def _check_fits(self, data):
+        if len(data) > self.inline_capacity and len(data) > self.blob_capacity:
+            raise ValueError(f"Item of {len(data)} bytes exceeds the queue's blob capacity ({self.blob_capacity})")
+        if len(data) >= 1 << 32:
+            raise ValueError(f"Item of {len(data)} bytes is too large for one slot")
+
+    def put_many(self, items, block=True, timeout=None):
+        """
+        Enqueues every item of `items`, in order, waiting for room as needed. Raises
+        queue.Full if `block` is false or `timeout` passes first; the items put until
+        then stay queued.
+        """
+        encoded = [_encode(item) for item in items]
+        for data, _ in encoded:
+            self._check_fits(data)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        sleep = 0.0
+        while encoded:
+            if self.lock is not None:
+                with self.lock:
+                    written = self._try_put_locked(encoded)
+            else:
+                written = self._try_put_locked(encoded)
+            if written:
+                del encoded[:written]
+                sleep = 0.0
+                if self.doorbell is not None:
+                    self._ring()
+                continue
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise queue.Full
+            sleep = min(MAX_WAIT_SLEEP, sleep * 2 or 0.00001)
+            time.sleep(sleep)
+
+    def put(self, item, block=True, timeout=None):
+        self.put_many((item,), block, timeout)
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    # --- Consumer side -----------------------------------------------------------------
+
+    def _take_locked(self, max_items):
+        head, tail = self._get(_HEAD), self._get(_TAIL)
+        blob_tail = None
+        items = []
+        while tail < head and len(items) < max_items:
+            slot = self._slots_offset + (tail % self.slots) * self.slot_size
+            length, flags = _SLOT.unpack_from(self._buf, slot)
+            if flags & FLAG_BLOB:
+                start = _BLOB_REF.unpack_from(self._buf, slot + _SLOT.size)[0]
+                physical = self._blob_offset + start % self.blob_capacity
+                data = bytes(self._buf[physical:physical + length])
+                blob_tail = start + length
+            else:
+                data = bytes(self._buf[slot + _SLOT.size:slot + _SLOT.size + length])
+            items.append(_decode(data, flags))
+            tail += 1
+        if items:
+            if blob_tail is not None:
+                self._set(_BLOB_TAIL, blob_tail)
+            self._set(_TAIL, tail)
+            self._set(_GETS, self._get(_GETS) + len(items))
+        return items
+
+    def _take(self, max_items):
+        if self.lock is not None:
+            with self.lock:
+                return self._take_locked(max_items)
+        return self._take_locked(max_items)
+
+    def get_many(self, max_items, block=True, timeout=None):
+        """
+        Dequeues up to `max_items` items, oldest first. Waits for at least one unless
+        `block` is false; raises queue.Empty if none arrived in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            items = self._take(max_items)
+            # Rings are only drained once the queue looks empty, then it is checked again:
+            # an item published before a drained ring is always seen.
+            if not items and self.doorbell is not None and self._drain_doorbell():
+                items = self._take(max_items)
+            if items:
+                return items
+            if not block or not self.wait(None if deadline is None else deadline - time.monotonic()):
+                raise queue.Empty
+
+    def get(self, block=True, timeout=None):
+        return self.get_many(1, block, timeout)[0]
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def clear(self):
+        """Drops every queued item at once. Returns how many there were."""
+        if self.lock is not None:
+            with self.lock:
+                return self._clear_locked()
+        return self._clear_locked()
+
+    def _clear_locked(self):
+        # Blob head first: a producer publishes it before the slots, so every blob freed
+        # here belongs to a slot being dropped.
+        blob_head = self._get(_BLOB_HEAD)
+        head = self._get(_HEAD)
+        dropped = head - self._get(_TAIL)
+        self._set(_BLOB_TAIL, max(blob_head, self._get(_BLOB_TAIL)))
+        self._set(_TAIL, head)
+        return dropped
+
+    # --- Lifetime ----------------------------------------------------------------------
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self.doorbell is not None:
+            for end in self.doorbell:
+                end.close()
+            self.doorbell = None
+
+    def unlink(self):
+        shared_memory.SharedMemory(name=self.name).unlink()
+
+
+def wait_handle(inbound_q):
+    """
+    What multiprocessing.connection.wait() can wait on for `inbound_q`: a ShmRingQueue's
+    doorbell or a multiprocessing.Queue's pipe. None for anything else, which has to be
+    polled.
+    """
+    if isinstance(inbound_q, ShmRingQueue):
+        return inbound_q.wait_handle()
+    if isinstance(inbound_q, multiprocessing.queues.Queue):
+        return inbound_q._reader
+    return None
@@ -0,0 +1,348 @@
+# spiral_core/simulation.py
+"""
+Headless simulation: runs the whole spiral in one process on a virtual clock.
+
+    python -m spiral_core.simulation --generations 1000 --seed 42 --json sim.json
+
+Every daemon is instantiated once and its pulse() is scheduled at its configured
+pulse_interval of *virtual* time, so nothing ever sleeps. The run lives in a private
+working directory on tmpfs (/dev/shm when available) with its own copy of
+genesis_params.json, and Apollo's subprocess supervision is switched off.
+"""
+
+import os
+import sys
+import json
+import heapq
+import shutil
+import bisect
+import logging
+import argparse
+import tempfile
+import importlib
+import time as _time
+import datetime as _datetime
+from array import array
+from time import perf_counter
+
+from spiral_core import archive_watcher
+from spiral_core.archive_watcher import DirectoryWatcher
+from spiral_core.genesis_loader import GenesisLoader, GENESIS_PARAMS_ENV
+from spiral_core.param_segment import ParamSegment
+from spiral_core.daemon_registry import DAEMONS, DEFAULT_PULSE_INTERVAL, close_daemon_resources
+
+logger = logging.getLogger(__name__)
+
+_real_time = _time.time
+
+# Applied over genesis_params.json for every simulation; callers' overrides win.
+SIMULATION_PARAMS = {
+    'apollo_supervise_daemons': False,
+    'hephaestus_execution_mode': 'inline',
+    'hephaestus_pool_workers': 0,
+    'pulse_metrics_enabled': False,  # The simulation times pulses itself.
+}
+
+
+def in_memory_root():
+    """tmpfs when the platform has one, so the run's file traffic never touches a disk."""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+class VirtualClock:
+    """
+    Wall clock of a simulation. It starts at the real time and only moves when the
+    scheduler advances it. It also maps the real mtimes of files written during the run
+    onto the virtual time of the pulse that wrote them, so age checks (Nyx, Tartarus)
+    see files exactly as old as the simulated run says they are.
+    """
+
+    def __init__(self, start=None):
+        self.origin = _real_time() if start is None else start
+        self.now = self.origin
+        self._real = array('d')
+        self._virtual = array('d')
+
+    def time(self):
+        return self.now
+
+    def advance_to(self, virtual_time):
+        """Moves the clock forward (never back) and records where real time was at that moment."""
+        self.now = max(self.now, virtual_time)
+        self._real.append(_real_time())
+        self._virtual.append(self.now)
+
+    @property
+    def elapsed(self):
+        return self.now - self.origin
+
+    def virtual_mtime(self, real_mtime):
+        i = bisect.bisect_right(self._real, real_mtime) - 1
+        if i < 0:
+            return real_mtime  # Written before the simulation started.
+        mtime = self._virtual[i] + (real_mtime - self._real[i])
+        if i + 1 < len(self._virtual):
+            mtime = min(mtime, self._virtual[i + 1])
+        return mtime
+
+
+class _VirtualTimeModule:
+    """Stands in for the time module inside spiral_core: time() is virtual, the rest is real."""
+
+    def __init__(self, clock):
+        self.time = clock.time
+
+    def __getattr__(self, name):
+        return getattr(_time, name)
+
+
+def _virtual_datetime_class(clock):
+    class VirtualDatetime(_datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.fromtimestamp(clock.time(), tz)
+
+        @classmethod
+        def today(cls):
+            return cls.fromtimestamp(clock.time())
+
+    return VirtualDatetime
+
+
+class Simulation:
+    """
+    Runs the daemons in `daemons` (names from DAEMONS) in this process, each pulse
+    scheduled on a VirtualClock by a heap of (due time, start order, daemon name).
+
+        with Simulation(params={'master_seed': 42}) as sim:
+            summary = sim.run(generations=1000)
+
+    Pulse exceptions are logged and counted, as a daemon's own run loop would.
+    """
+
+    def __init__(self, params=None, daemons=None, workdir=None, keep_workdir=False):
+        self.overrides = dict(SIMULATION_PARAMS, **(params or {}))
+        self.daemon_names = tuple(daemons) if daemons else tuple(name for name, _, _ in DAEMONS)
+        unknown = set(self.daemon_names) - {name for name, _, _ in DAEMONS}
+        if unknown:
+            raise ValueError(f"Unknown daemons for simulation: {sorted(unknown)}")
+        self.workdir = workdir
+        self.keep_workdir = keep_workdir or workdir is not None
+        self.clock = VirtualClock()
+        self.daemons = {}
+        self.pulse_seconds = {}
+        self.pulse_errors = {}
+        self._schedule = []
+        self._prepared = False
+        self._started = False
+        self._restore = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _patch(self, target, name, value):
+        self._restore.append((target, name, getattr(target, name)))
+        setattr(target, name, value)
+
+    def _install_clock(self):
+        """
+        Routes time.time(), datetime.now() and watcher mtimes through the virtual clock.
+        Only the spiral_core modules' own `time` and `datetime` names are swapped, so
+        logging, SQLite and anything else in the process keep the real clock.
+        """
+        clock = self.clock
+        real_stat_mtime = DirectoryWatcher._stat_mtime
+
+        def virtual_stat_mtime(watcher, name):
+            mtime = real_stat_mtime(watcher, name)
+            return None if mtime is None else clock.virtual_mtime(mtime)
+
+        self._patch(DirectoryWatcher, '_stat_mtime', virtual_stat_mtime)
+        virtual_time = _VirtualTimeModule(clock)
+        virtual_datetime = _virtual_datetime_class(clock)
+        for name, module in list(sys.modules.items()):
+            if not name.startswith('spiral_core.'):
+                continue
+            if getattr(module, 'time', None) is _time:
+                self._patch(module, 'time', virtual_time)
+            if getattr(module, 'datetime', None) is _datetime.datetime:
+                self._patch(module, 'datetime', virtual_datetime)
+
+    def prepare(self):
+        """
+        Creates the working directory and its params file and moves into it. start() does
+        this first; call it earlier to put files in place before the daemons start watching.
+        """
+        if self._prepared:
+            return
+        if self.workdir is None:
+            self.workdir = tempfile.mkdtemp(prefix='spiral_sim_', dir=in_memory_root())
+        os.makedirs(self.workdir, exist_ok=True)
+        self._previous_cwd = os.getcwd()
+        self._previous_env = os.environ.get(GENESIS_PARAMS_ENV)
+
+        # A private params file, so the run never writes to the real genesis_params.json.
+        params = dict(GenesisLoader().params)
+        params.update(self.overrides)
+        if params.get('param_segment_name', 'spiral_params') == 'spiral_params':
+            # Never share the live spiral's segment.
+            params['param_segment_name'] = f"spiral_sim_{os.getpid()}"
+        self.params_path = os.path.join(self.workdir, 'genesis_params.json')
+        with open(self.params_path, 'w', encoding='utf-8') as f:
+            json.dump(params, f, indent=4)
+        self.params = params
+
+        os.environ[GENESIS_PARAMS_ENV] = self.params_path
+        os.chdir(self.workdir)
+        self._prepared = True
+
+    def start(self):
+        """Instantiates the daemons and schedules each one's first pulse at the current time."""
+        if self._started:
+            return
+        self.prepare()
+        self._started = True
+
+        modules = {name: importlib.import_module(module) for name, module, _ in DAEMONS if name in self.daemon_names}
+        self._install_clock()
+        for order, (name, _, class_name) in enumerate(DAEMONS):
+            if name not in self.daemon_names:
+                continue
+            daemon = getattr(modules[name], class_name)()
+            self.daemons[name] = daemon
+            self.pulse_seconds[name] = array('d')
+            self.pulse_errors[name] = 0
+            heapq.heappush(self._schedule, (self.clock.now, order, name))
+        logger.info(f"Simulation: {len(self.daemons)} daemons in {self.workdir}.")
+
+    def pulse_interval(self, name):
+        """The daemon's current interval (it may adapt it after each pulse), else the configured one."""
+        interval = getattr(self.daemons[name], 'pulse_interval', None)
+        if interval is None:
+            interval = self.params.get(f"{name}_pulse_interval", DEFAULT_PULSE_INTERVAL)
+        return interval
+
+    def generation(self):
+        apollo = self.daemons.get('apollo')
+        source = apollo.params if apollo is not None else self.params
+        return source.get('current_generation', 0)
+
+    def step(self):
+        """Runs the next due pulse. Returns the name of the daemon that pulsed."""
+        due, order, name = heapq.heappop(self._schedule)
+        self.clock.advance_to(due)
+        started = perf_counter()
+        try:
+            self.daemons[name].pulse()
+        except Exception as e:
+            self.pulse_errors[name] += 1
+            logger.error(f"Simulation: {name} pulse failed at t={self.clock.elapsed:.3f}s: {e}", exc_info=True)
+        self.pulse_seconds[name].append(perf_counter() - started)
+        heapq.heappush(self._schedule, (due + self.pulse_interval(name), order, name))
+        return name
+
+    def run(self, generations=None, duration=None, max_pulses=None):
+        """
+        Pulses until Apollo has advanced `generations` generations, `duration` virtual
+        seconds have passed, or `max_pulses` pulses ran (whichever comes first).
+        Returns summary().
+        """
+        if generations is None and duration is None and max_pulses is None:
+            raise ValueError("Simulation.run needs generations, duration or max_pulses")
+        if generations is not None and 'apollo' not in self.daemons:
+            raise ValueError("Counting generations needs Apollo in the simulation")
+        self.start()
+        target_generation = self.generation() + generations if generations is not None else None
+        end_time = self.clock.now + duration if duration is not None else None
+        pulses = 0
+        real_start = perf_counter()
+        while self._schedule:
+            if end_time is not None and self._schedule[0][0] > end_time:
+                break
+            if max_pulses is not None and pulses >= max_pulses:
+                break
+            if self.step() == 'apollo' and target_generation is not None and self.generation() >= target_generation:
+                break
+            pulses += 1
+        self.real_seconds = perf_counter() - real_start
+        return self.summary()
+
+    def summary(self):
+        pulses = {name: len(samples) for name, samples in self.pulse_seconds.items()}
+        return {
+            'generation': self.generation(),
+            'virtual_seconds': round(self.clock.elapsed, 3),
+            'real_seconds': round(getattr(self, 'real_seconds', 0.0), 3),
+            'pulses': pulses,
+            'pulse_errors': dict(self.pulse_errors),
+            'pulse_seconds_total': {name: round(sum(samples), 6) for name, samples in self.pulse_seconds.items()},
+            'workdir': self.workdir,
+        }
+
+    def close(self):
+        if not self._prepared:
+            return
+        for name, daemon in self.daemons.items():
+            close_daemon_resources(name, daemon, "Simulation")
+        archive_watcher.close_watchers()
+        try:
+            ParamSegment.attach(self.params['param_segment_name']).unlink()
+        except (FileNotFoundError, ValueError):
+            pass
+
+        while self._restore:
+            target, name, value = self._restore.pop()
+            setattr(target, name, value)
+        os.chdir(self._previous_cwd)
+        if self._previous_env is None:
+            os.environ.pop(GENESIS_PARAMS_ENV, None)
+        else:
+            os.environ[GENESIS_PARAMS_ENV] = self._previous_env
+        if not self.keep_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        self._prepared = self._started = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--generations', type=int, help="Stop after Apollo advanced this many generations")
+    parser.add_argument('--duration', type=float, help="Stop after this many virtual seconds")
+    parser.add_argument('--seed', type=int, help="master_seed for every daemon's random stream")
+    parser.add_argument('--daemons', help="Comma-separated subset of daemons to run")
+    parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='KEY=JSON',
+                        help="Override a genesis parameter, e.g. --set current_erebus_chaos_intensity=0.01")
+    parser.add_argument('--workdir', help="Run here and keep the files (default: a fresh tmpfs directory)")
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', dest='json_path', help="Also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+    params = {}
+    for override in args.overrides:
+        key, _, value = override.partition('=')
+        params[key] = json.loads(value)
+    if args.seed is not None:
+        params['master_seed'] = args.seed
+    if args.generations is None and args.duration is None:
+        args.generations = 100
+
+    with Simulation(params=params, daemons=args.daemons.split(',') if args.daemons else None,
+                    workdir=args.workdir) as sim:
+        summary = sim.run(generations=args.generations, duration=args.duration)
+
+    print(f"generation {summary['generation']}: {summary['virtual_seconds']} virtual s in {summary['real_seconds']} real s")
+    for name, count in summary['pulses'].items():
+        print(f"  {name:<11}{count:8d} pulses  {summary['pulse_seconds_total'][name]:9.3f} s  {summary['pulse_errors'][name]} errors")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+# spiral_core/spiral_messages.py
+"""
+Typed messages for the inter-daemon queues, with a compact binary encoding.
+
+Every message is a __slots__ record of one of these kinds:
+
+    Payload       data_type, pulse, content        Apollo -> Mnemo: a generated payload
+    StoredPayload data_type, pulse, path           Mnemo -> Lethe: a payload saved to a file
+    SegmentBatch  entries (SegmentEntry list)      Mnemo -> Lethe: payloads appended to segments
+    Feedback      source, status, error            Lethe -> Mnemo -> Apollo
+    LogLine       source, text                     Kronos/Lethe -> Mnemo activity log
+
+encode() turns one into bytes: a struct-packed header (version, kind, then the byte
+length of every field) followed by the UTF-8 fields. A SegmentBatch writes each
+distinct string (segment path, data type, pulse) once and its entries as packed
+columns of string indices, offsets and lengths. decode() checks the version, kind,
+every length and index and the total size, and raises MessageError for anything
+malformed, so a bad message is rejected where it enters a daemon rather than deep
+inside it. Constructors validate field types the same way.
+
+bytes travel through ShmRingQueue without pickling, and through multiprocessing.Queue
+as one bytes object instead of a pickled dict.
+"""
+
+import struct
+
+VERSION = 1
+
+KIND_PAYLOAD = 1
+KIND_STORED = 2
+KIND_SEGMENT_BATCH = 3
+KIND_FEEDBACK = 4
+KIND_LOG = 5
+
+_NONE = 0xFFFF  # Length (or string index) of an optional short field that is None.
+_LONG_NONE = 0xFFFFFFFF  # Same, for an optional long field.
+
+# version, kind, then the kind's field lengths (H: short field, I: long field).
+_PAYLOAD = struct.Struct('<BBHHI')
+_STORED = struct.Struct('<BBHHH')
+_FEEDBACK = struct.Struct('<BBHHI')
+_LOG = struct.Struct('<BBHI')
+# version, kind, strings in the table, entries. Then the table's lengths (H each), the
+# strings, and the entry columns: data type, pulse and segment indices (H), offsets (Q),
+# lengths (I).
+_BATCH = struct.Struct('<BBHI')
+
+# Long fields above this many bytes are decoded from a memoryview instead of a copy.
+_VIEW_THRESHOLD = 4096
+
+
+class MessageError(ValueError):
+    """A message that doesn't follow the schema."""
+
+
+def _check(name, value, optional=False):
+    if isinstance(value, str) or (optional and value is None):
+        return value
+    raise MessageError(f"{name} must be a str{' or None' if optional else ''}, not {type(value).__name__}")
+
+
+def _optional(value):
+    """UTF-8 bytes and header length of an optional short field."""
+    if value is None:
+        return b'', _NONE
+    data = value.encode()
+    if len(data) >= _NONE:
+        raise MessageError(f"Field of {len(data)} bytes is too long; the limit is {_NONE - 1}")
+    return data, len(data)
+
+
+def _text(data, start, end):
+    if end - start > _VIEW_THRESHOLD:
+        return str(memoryview(data)[start:end], 'utf-8')
+    return data[start:end].decode()
+
+
+def _size_error(data, end):
+    return MessageError(f"Message is {len(data)} bytes; its header describes {end}")
+
+
+class Payload:
+    """A generated payload (e.g. a python_script) on its way to be stored."""
+
+    __slots__ = ('data_type', 'pulse', 'content')
+    kind = KIND_PAYLOAD
+
+    def __init__(self, data_type, content, pulse=None):
+        self.data_type = _check('data_type', data_type)
+        self.content = _check('content', content)
+        self.pulse = _check('pulse', pulse, optional=True)
+
+    def encode(self):
+        data_type = self.data_type.encode()
+        pulse, pulse_len = _optional(self.pulse)
+        content = self.content.encode()
+        return b''.join((_PAYLOAD.pack(VERSION, KIND_PAYLOAD, len(data_type), pulse_len, len(content)),
+                         data_type, pulse, content))
+
+    @classmethod
+    def _decode(cls, data):
+        _, _, type_len, pulse_len, content_len = _PAYLOAD.unpack_from(data)
+        type_end = _PAYLOAD.size + type_len
+        pulse_end = type_end if pulse_len == _NONE else type_end + pulse_len
+        end = pulse_end + content_len
+        if end != len(data):
+            raise _size_error(data, end)
+        message = cls.__new__(cls)
+        message.data_type = data[_PAYLOAD.size:type_end].decode()
+        message.pulse = None if pulse_len == _NONE else data[type_end:pulse_end].decode()
+        message.content = _text(data, pulse_end, pulse_end + content_len)
+        return message
+
+    def __repr__(self):
+        return f"Payload({self.data_type!r}, {len(self.content)} chars, pulse={self.pulse!r})"
+
+
+class StoredPayload:
+    """A payload Mnemo saved to `path`."""
+
+    __slots__ = ('data_type', 'pulse', 'path')
+    kind = KIND_STORED
+
+    def __init__(self, data_type, path, pulse=None):
+        self.data_type = _check('data_type', data_type)
+        self.path = _check('path', path)
+        self.pulse = _check('pulse', pulse, optional=True)
+
+    def encode(self):
+        data_type = self.data_type.encode()
+        pulse, pulse_len = _optional(self.pulse)
+        path = self.path.encode()
+        return b''.join((_STORED.pack(VERSION, KIND_STORED, len(data_type), pulse_len, len(path)),
+                         data_type, pulse, path))
+
+    @classmethod
+    def _decode(cls, data):
+        _, _, type_len, pulse_len, path_len = _STORED.unpack_from(data)
+        type_end = _STORED.size + type_len
+        pulse_end = type_end if pulse_len == _NONE else type_end + pulse_len
+        end = pulse_end + path_len
+        if end != len(data):
+            raise _size_error(data, end)
+        message = cls.__new__(cls)
+        message.data_type = data[_STORED.size:type_end].decode()
+        message.pulse = None if pulse_len == _NONE else data[type_end:pulse_end].decode()
+        message.path = data[pulse_end:pulse_end + path_len].decode()
+        return message
+
+    def __repr__(self):
+        return f"StoredPayload({self.data_type!r}, {self.path!r}, pulse={self.pulse!r})"
+
+
+class SegmentEntry:
+    """Where one payload of a SegmentBatch lives (see segment_store.read_record)."""
+
+    __slots__ = ('data_type', 'pulse', 'segment', 'offset', 'length')
+
+    def __init__(self, data_type, segment, offset, length, pulse=None):
+        self.data_type = _check('data_type', data_type)
+        self.segment = _check('segment', segment)
+        self.pulse = _check('pulse', pulse, optional=True)
+        if not isinstance(offset, int) or not isinstance(length, int) or offset < 0 or length < 0:
+            raise MessageError(f"offset and length must be non-negative ints, not {offset!r} and {length!r}")
+        self.offset = offset
+        self.length = length
+
+    def __repr__(self):
+        return f"SegmentEntry({self.data_type!r}, {self.segment!r}, {self.offset}, {self.length}, pulse={self.pulse!r})"
+
+
+class SegmentBatch:
+    """Payloads Mnemo appended to segment files in one burst."""
+
+    __slots__ = ('entries',)
+    kind = KIND_SEGMENT_BATCH
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        for entry in self.entries:
+            if not isinstance(entry, SegmentEntry):
+                raise MessageError(f"SegmentBatch entries must be SegmentEntry, not {type(entry).__name__}")
+
+    def encode(self):
+        entries = self.entries
+        count = len(entries)
+        data_types = [entry.data_type for entry in entries]
+        pulses = [entry.pulse for entry in entries]
+        segments = [entry.segment for entry in entries]
+        index = {}
+        for value in (*dict.fromkeys(data_types), *dict.fromkeys(segments), *dict.fromkeys(pulses)):
+            if value is not None and value not in index:
+                index[value] = len(index)
+        if len(index) >= _NONE:
+            raise MessageError(f"SegmentBatch has {len(index)} distinct strings; the limit is {_NONE - 1}")
+        table = [value.encode() for value in index]
+        index[None] = _NONE
+        lookup = index.__getitem__
+        return b''.join((
+            _BATCH.pack(VERSION, KIND_SEGMENT_BATCH, len(table), count),
+            struct.pack(f'<{len(table)}H', *map(len, table)),
+            *table,
+            struct.pack(f'<{3 * count}H{count}Q{count}I', *map(lookup, data_types), *map(lookup, pulses),
+                        *map(lookup, segments), *[entry.offset for entry in entries],
+                        *[entry.length for entry in entries]),
+        ))
+
+    @classmethod
+    def _decode(cls, data):
+        _, _, string_count, count = _BATCH.unpack_from(data)
+        offset = _BATCH.size + 2 * string_count
+        table = []
+        for length in struct.unpack_from(f'<{string_count}H', data, _BATCH.size):
+            table.append(data[offset:offset + length].decode())
+            offset += length
+        columns = f'<{3 * count}H{count}Q{count}I'
+        end = offset + struct.calcsize(columns)
+        if end != len(data):
+            raise _size_error(data, end)
+        values = struct.unpack_from(columns, data, offset)
+        pulses = dict(enumerate(table))
+        pulses[_NONE] = None
+        new = SegmentEntry.__new__
+        entries = []
+        for type_index, pulse_index, segment_index, entry_offset, length in zip(
+                values[:count], values[count:2 * count], values[2 * count:3 * count],
+                values[3 * count:4 * count], values[4 * count:]):
+            entry = new(SegmentEntry)
+            entry.data_type = table[type_index]
+            entry.pulse = pulses[pulse_index]
+            entry.segment = table[segment_index]
+            entry.offset = entry_offset
+            entry.length = length
+            entries.append(entry)
+        message = cls.__new__(cls)
+        message.entries = entries
+        return message
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"SegmentBatch({len(self.entries)} entries)"
+
+
+class Feedback:
+    """A status report (e.g. from Lethe) relayed to Apollo."""
+
+    __slots__ = ('source', 'status', 'error')
+    kind = KIND_FEEDBACK
+
+    def __init__(self, source, status, error=None):
+        self.source = _check('source', source)
+        self.status = _check('status', status)
+        self.error = _check('error', error, optional=True)
+
+    def encode(self):
+        source = self.source.encode()
+        status = self.status.encode()
+        if self.error is None:
+            error, error_len = b'', _LONG_NONE
+        else:
+            error = self.error.encode()
+            error_len = len(error)
+            if error_len >= _LONG_NONE:
+                raise MessageError(f"error of {error_len} bytes is too long")
+        return b''.join((_FEEDBACK.pack(VERSION, KIND_FEEDBACK, len(source), len(status), error_len),
+                         source, status, error))
+
+    @classmethod
+    def _decode(cls, data):
+        _, _, source_len, status_len, error_len = _FEEDBACK.unpack_from(data)
+        source_end = _FEEDBACK.size + source_len
+        status_end = source_end + status_len
+        end = status_end if error_len == _LONG_NONE else status_end + error_len
+        if end != len(data):
+            raise _size_error(data, end)
+        message = cls.__new__(cls)
+        message.source = data[_FEEDBACK.size:source_end].decode()
+        message.status = data[source_end:status_end].decode()
+        message.error = None if error_len == _LONG_NONE else _text(data, status_end, status_end + error_len)
+        return message
+
+    def __repr__(self):
+        return f"Feedback({self.source!r}, {self.status!r}, error={self.error!r})"
+
+
+class LogLine:
+    """One line for a daemon's activity log."""
+
+    __slots__ = ('source', 'text')
+    kind = KIND_LOG
+
+    def __init__(self, source, text):
+        self.source = _check('source', source)
+        self.text = _check('text', text)
+
+    def encode(self):
+        source = self.source.encode()
+        text = self.text.encode()
+        return b''.join((_LOG.pack(VERSION, KIND_LOG, len(source), len(text)), source, text))
+
+    @classmethod
+    def _decode(cls, data):
+        _, _, source_len, text_len = _LOG.unpack_from(data)
+        source_end = _LOG.size + source_len
+        end = source_end + text_len
+        if end != len(data):
+            raise _size_error(data, end)
+        message = cls.__new__(cls)
+        message.source = data[_LOG.size:source_end].decode()
+        message.text = _text(data, source_end, source_end + text_len)
+        return message
+
+    def __repr__(self):
+        return f"LogLine({self.source!r}, {self.text!r})"
+
+
+MESSAGE_TYPES = (Payload, StoredPayload, SegmentBatch, Feedback, LogLine)
+_DECODERS = {record_class.kind: record_class._decode for record_class in MESSAGE_TYPES}
+
+
+def encode(message):
+    """bytes for one message record. Raises MessageError for anything else."""
+    if not isinstance(message, MESSAGE_TYPES):
+        raise MessageError(f"Cannot encode {type(message).__name__}; expected one of the spiral message types")
+    try:
+        return message.encode()
+    except (struct.error, UnicodeEncodeError) as e:
+        raise MessageError(f"Cannot encode {message!r}: {e}") from None
+
+
+def decode(data):
+    """The message record in `data` (bytes-like, copied once unless bytes). Raises MessageError if it is malformed."""
+    if type(data) is not bytes:
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise MessageError(f"Expected an encoded message (bytes), not {type(data).__name__}")
+        data = bytes(data)
+    if len(data) < 2:
+        raise MessageError(f"Message of {len(data)} bytes is shorter than its header")
+    version, kind = data[0], data[1]
+    if version != VERSION:
+        raise MessageError(f"Unsupported message version {version}")
+    try:
+        decoder = _DECODERS[kind]
+    except KeyError:
+        raise MessageError(f"Unknown message kind {kind!r}") from None
+    try:
+        return decoder(data)
+    except (struct.error, UnicodeDecodeError, IndexError, KeyError) as e:
+        raise MessageError(f"Malformed {decoder.__self__.__name__} message: {e}") from None
@@ -0,0 +1,87 @@
+# spiral_core/spiral_rng.py
+
+import os
+import random
+import hashlib
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; numpy_generator() then returns None.
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+def derive_seed(master_seed, daemon_name, generation, stream=""):
+    """
+    64-bit seed for one daemon's stream in one generation. Derived by hashing, so it is
+    stable across processes and Python versions (unlike hash()) and streams don't overlap.
+    """
+    key = f"{master_seed}|{daemon_name}|{generation}|{stream}".encode('utf-8')
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], 'big')
+
+
+def fresh_master_seed():
+    return int.from_bytes(os.urandom(8), 'big')
+
+
+class SpiralRNG(random.Random):
+    """
+    A daemon's private random stream. It is reseeded from (master_seed, daemon, generation)
+    whenever the daemon sees a new generation, so a run with the same master_seed makes
+    the same draws generation by generation, whatever the other daemons do.
+    Use it wherever the daemon would call the random module or os.urandom.
+    """
+
+    def __init__(self, master_seed, daemon_name, generation=0):
+        self.master_seed = master_seed
+        self.daemon_name = daemon_name
+        self.generation = generation
+        self._numpy_generator = None
+        super().__init__(derive_seed(master_seed, daemon_name, generation))
+
+    @classmethod
+    def from_params(cls, params, daemon_name):
+        """
+        Stream for `daemon_name` from the master_seed param. Without one (Apollo normally
+        fills it in at startup) a fresh seed is drawn and logged so the run can be replayed.
+        """
+        master_seed = params.get('master_seed')
+        if master_seed is None:
+            master_seed = fresh_master_seed()
+            logger.warning(f"SpiralRNG: No master_seed configured; {daemon_name} drew {master_seed}.")
+        return cls(master_seed, daemon_name, params.get('current_generation', 0))
+
+    def advance(self, generation):
+        """Switches to the stream of `generation`. Returns True if the stream changed."""
+        if generation == self.generation:
+            return False
+        self.generation = generation
+        self._numpy_generator = None
+        self.seed(derive_seed(self.master_seed, self.daemon_name, generation))
+        return True
+
+    def numpy_generator(self):
+        """A numpy Generator on its own stream for this generation, or None without numpy."""
+        if np is None:
+            return None
+        if self._numpy_generator is None:
+            self._numpy_generator = np.random.default_rng(
+                derive_seed(self.master_seed, self.daemon_name, self.generation, "numpy"))
+        return self._numpy_generator
+
+    def token_hex(self, nbytes=4):
+        """Deterministic stand-in for os.urandom(nbytes).hex()."""
+        return self.getrandbits(nbytes * 8).to_bytes(nbytes, 'big').hex()
+
+    def unused_token_hex(self, is_taken, nbytes=4):
+        """
+        token_hex() drawn until `is_taken(token)` is false. A daemon restarted within a
+        generation replays the generation's stream, so ids it already used (their files
+        exist) come up again and are skipped.
+        """
+        while True:
+            token = self.token_hex(nbytes)
+            if not is_taken(token):
+                return token
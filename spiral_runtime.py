@@ -0,0 +1,144 @@
+# spiral_core/spiral_runtime.py
+"""
+Pooled daemon runtime: hosts several daemons in one process.
+
+    python -m spiral_core.spiral_runtime kairos aion kronos nyx erebus tartarus lethe
+
+Each daemon is instantiated once and its pulse() runs on a shared thread pool whenever
+it falls due, every pulse_interval seconds (which @adaptive_pulse may retune). A daemon
+never overlaps with itself; a pulse that overruns just pushes the next one back.
+Apollo starts one of these for the lightweight daemons in its 'pooled' supervisor mode,
+instead of one Python process per daemon.
+"""
+
+import sys
+import time
+import heapq
+import signal
+import logging
+import argparse
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from spiral_core import archive_watcher
+from spiral_core.daemon_registry import DAEMONS, DEFAULT_PULSE_INTERVAL, close_daemon_resources
+
+logger = logging.getLogger(__name__)
+
+
+class DaemonRuntime:
+    """
+    Runs the daemons in `daemon_names` (names from daemon_registry.DAEMONS) on a pool of
+    `workers` threads, scheduled by a heap of (due time, start order, daemon name).
+
+        runtime = DaemonRuntime(['aion', 'kronos'])
+        runtime.run()   # until stop() is called, e.g. from a signal handler
+
+    Pulse exceptions are logged and counted, as a daemon's own run loop would.
+    """
+
+    def __init__(self, daemon_names, workers=None):
+        known = {name for name, _, _ in DAEMONS}
+        unknown = set(daemon_names) - known
+        if unknown:
+            raise ValueError(f"Unknown daemons for the runtime: {sorted(unknown)}")
+        self.daemon_names = tuple(name for name, _, _ in DAEMONS if name in daemon_names)
+        self.workers = workers or len(self.daemon_names)
+        self.daemons = {}
+        self.pulses = {}
+        self.pulse_errors = {}
+        self._order = {}
+        self._schedule = []
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._executor = None
+
+    def start(self):
+        """Instantiates the daemons and schedules each one's first pulse now."""
+        if self._executor is not None:
+            return
+        now = time.monotonic()
+        for order, (name, module, class_name) in enumerate(DAEMONS):
+            if name not in self.daemon_names:
+                continue
+            self.daemons[name] = getattr(importlib.import_module(module), class_name)()
+            self.pulses[name] = 0
+            self.pulse_errors[name] = 0
+            self._order[name] = order
+            heapq.heappush(self._schedule, (now, order, name))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='spiral_runtime')
+        logger.info(f"SpiralRuntime: Hosting {', '.join(self.daemon_names)} on {self.workers} threads.")
+
+    def pulse_interval(self, name):
+        interval = getattr(self.daemons[name], 'pulse_interval', None)
+        if interval is None:
+            interval = self.daemons[name].params.get(f"{name}_pulse_interval", DEFAULT_PULSE_INTERVAL)
+        return interval
+
+    def _pulse(self, name, due):
+        try:
+            self.daemons[name].pulse()
+        except Exception as e:
+            self.pulse_errors[name] += 1
+            logger.error(f"SpiralRuntime: {name} pulse failed: {e}", exc_info=True)
+        finally:
+            self.pulses[name] += 1
+            next_due = max(due + self.pulse_interval(name), time.monotonic())
+            with self._wakeup:
+                heapq.heappush(self._schedule, (next_due, self._order[name], name))
+                self._wakeup.notify()
+
+    def run(self):
+        """Dispatches due pulses to the pool until stop(). Pulses in flight finish first."""
+        self.start()
+        try:
+            with self._wakeup:
+                while not self._stopping:
+                    if not self._schedule:
+                        self._wakeup.wait()
+                        continue
+                    due, _, name = self._schedule[0]
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        self._wakeup.wait(delay)
+                        continue
+                    heapq.heappop(self._schedule)
+                    self._executor.submit(self._pulse, name, due)
+        finally:
+            self.close()
+
+    def stop(self):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+
+    def close(self):
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        for name, daemon in self.daemons.items():
+            close_daemon_resources(name, daemon, "SpiralRuntime")
+        archive_watcher.close_watchers()
+        logger.info(f"SpiralRuntime: Stopped after {sum(self.pulses.values())} pulses "
+                    f"({sum(self.pulse_errors.values())} failed).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('daemons', nargs='+', help="Daemons to host, e.g. aion kronos nyx")
+    parser.add_argument('--workers', type=int, help="Pool threads (default: one per daemon)")
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), stream=sys.stdout,
+                        format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+    runtime = DaemonRuntime([name.lower() for name in args.daemons], workers=args.workers)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: runtime.stop())
+    runtime.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+# spiral_core/supervisor_io.py
+"""
+Process supervision for Apollo: output pumping, restart backoff and resource samples.
+
+Every child's stdout and stderr are read by a single selector thread (OutputPump) as
+soon as anything arrives, so a chatty daemon never blocks on a full pipe. Lines go to
+a per-daemon ring buffer and, optionally, to a callback (Apollo logs them).
+
+Supervisor restarts a crashed daemon only after an exponential backoff, and stops
+restarting one that is crash-looping (too many crashes within a window) until the
+window has passed. It keeps per-daemon uptime, restart counts and psutil CPU/RSS
+samples; stats() returns them as a plain dict.
+"""
+
+import os
+import time
+import logging
+import selectors
+import threading
+import subprocess
+import collections
+
+try:
+    import psutil
+except ImportError:  # Resource samples are then not collected.
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+_READ_SIZE = 65536
+
+
+class _Stream:
+    """One pipe being pumped: where its lines go, and the partial line read so far."""
+
+    __slots__ = ('daemon_name', 'stream_name', 'fileobj', 'ring', 'partial', 'done')
+
+    def __init__(self, daemon_name, stream_name, fileobj, ring):
+        self.daemon_name = daemon_name
+        self.stream_name = stream_name
+        self.fileobj = fileobj
+        self.ring = ring
+        self.partial = b''
+        self.done = threading.Event()
+
+
+class OutputPump:
+    """
+    Reads any number of child pipes from one thread. Streams are added from any thread;
+    the pump thread alone touches the selector (additions are handed over through a
+    queue and a wake-up pipe). on_line(daemon_name, stream_name, line) is called from
+    the pump thread for every complete line.
+    """
+
+    def __init__(self, on_line=None):
+        self.on_line = on_line
+        self._selector = selectors.DefaultSelector()
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ, None)
+        self._lock = threading.Lock()
+        self._added = []
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name='supervisor-output-pump', daemon=True)
+        self._thread.start()
+
+    def add(self, daemon_name, stream_name, fileobj, ring):
+        """Starts pumping `fileobj` (a binary pipe). Returns an Event set once it hit EOF."""
+        stream = _Stream(daemon_name, stream_name, fileobj, ring)
+        os.set_blocking(fileobj.fileno(), False)
+        with self._lock:
+            self._added.append(stream)
+        self._wake()
+        return stream.done
+
+    def _wake(self):
+        try:
+            os.write(self._wake_write, b'\0')
+        except BlockingIOError:
+            pass  # Already awake.
+
+    def _run(self):
+        while not self._closing:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    self._take_added()
+                else:
+                    self._read(key.data)
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                self._finish(key.data)
+        self._selector.close()
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+
+    def _take_added(self):
+        try:
+            while os.read(self._wake_read, _READ_SIZE):
+                pass
+        except BlockingIOError:
+            pass
+        with self._lock:
+            added, self._added = self._added, []
+        for stream in added:
+            self._selector.register(stream.fileobj, selectors.EVENT_READ, stream)
+
+    def _read(self, stream):
+        try:
+            chunk = os.read(stream.fileobj.fileno(), _READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.warning(f"OutputPump: Reading {stream.daemon_name} {stream.stream_name} failed: {e}")
+            chunk = b''
+        if not chunk:
+            self._finish(stream)
+            return
+        *lines, stream.partial = (stream.partial + chunk).split(b'\n')
+        for line in lines:
+            self._emit(stream, line)
+
+    def _emit(self, stream, line):
+        text = line.decode('utf-8', errors='replace').rstrip('\r')
+        stream.ring.append((time.time(), stream.stream_name, text))
+        if self.on_line is not None:
+            try:
+                self.on_line(stream.daemon_name, stream.stream_name, text)
+            except Exception as e:
+                logger.error(f"OutputPump: Output callback failed: {e}")
+
+    def _finish(self, stream):
+        if stream.partial:
+            self._emit(stream, stream.partial)
+            stream.partial = b''
+        self._selector.unregister(stream.fileobj)
+        stream.fileobj.close()
+        stream.done.set()
+
+    def close(self):
+        self._closing = True
+        self._wake()
+        self._thread.join()
+
+
+class SupervisedDaemon:
+    """What the supervisor knows about one daemon, across restarts."""
+
+    def __init__(self, name, output_lines, samples):
+        self.name = name
+        self.args = None
+        self.process = None
+        self.started_at = None
+        self.starts = 0
+        self.crashes = collections.deque()
+        self.consecutive_crashes = 0
+        self.crash_looping = False
+        self.last_exit_code = None
+        self.next_start_at = 0.0
+        self.output = collections.deque(maxlen=output_lines)
+        self.samples = collections.deque(maxlen=samples)
+        self.eof = []
+        self._ps = None
+
+    @property
+    def restarts(self):
+        return max(0, self.starts - 1)
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def uptime(self, now=None):
+        if not self.running():
+            return 0.0
+        return (now or time.monotonic()) - self.started_at
+
+
+class Supervisor:
+    """
+    Starts, watches and restarts child processes.
+
+    A child that exits non-zero, or within stable_seconds of starting, counts as a crash.
+    After a crash the next start waits initial_backoff * backoff_factor**(n - 1) for the
+    n-th consecutive crash, capped at max_backoff. crash_loop_restarts crashes within
+    crash_loop_window seconds mark the daemon crash-looping: it isn't restarted until the
+    oldest of those crashes leaves the window. A run lasting stable_seconds resets the count.
+    """
+
+    def __init__(self, env=None, on_line=None, output_lines=500, samples=120, initial_backoff=1.0,
+                 max_backoff=60.0, backoff_factor=2.0, crash_loop_restarts=5, crash_loop_window=300.0,
+                 stable_seconds=30.0):
+        self.env = env
+        self.output_lines = output_lines
+        self.sample_count = samples
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.backoff_factor = backoff_factor
+        self.crash_loop_restarts = crash_loop_restarts
+        self.crash_loop_window = crash_loop_window
+        self.stable_seconds = stable_seconds
+        self.daemons = {}
+        self.pump = OutputPump(on_line)
+
+    @classmethod
+    def from_params(cls, params, env=None, on_line=None):
+        return cls(env=env, on_line=on_line,
+                   output_lines=params.get('supervisor_output_lines', 500),
+                   samples=params.get('supervisor_resource_samples', 120),
+                   initial_backoff=params.get('supervisor_initial_backoff_seconds', 1.0),
+                   max_backoff=params.get('supervisor_max_backoff_seconds', 60.0),
+                   backoff_factor=params.get('supervisor_backoff_factor', 2.0),
+                   crash_loop_restarts=params.get('supervisor_crash_loop_restarts', 5),
+                   crash_loop_window=params.get('supervisor_crash_loop_window_seconds', 300.0),
+                   stable_seconds=params.get('supervisor_stable_seconds', 30.0))
+
+    def _daemon(self, name):
+        daemon = self.daemons.get(name)
+        if daemon is None:
+            daemon = self.daemons[name] = SupervisedDaemon(name, self.output_lines, self.sample_count)
+        return daemon
+
+    def is_running(self, name):
+        daemon = self.daemons.get(name)
+        return daemon is not None and daemon.running()
+
+    def may_start(self, name):
+        """
+        False while the daemon runs (or exited but hasn't been reap()ed yet), backs off after
+        a crash, or is held for crash-looping.
+        """
+        daemon = self.daemons.get(name)
+        return daemon is None or (daemon.process is None and time.monotonic() >= daemon.next_start_at)
+
+    def start(self, name, args, cwd=None):
+        """
+        Starts `args` (in `cwd`) as daemon `name` unless may_start() says otherwise.
+        Returns the new Popen, or None. Raises OSError if the process can't be started.
+        """
+        if not self.may_start(name):
+            return None
+        daemon = self._daemon(name)
+        now = time.monotonic()
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.env, cwd=cwd)
+        daemon.args = args
+        daemon.process = process
+        daemon.started_at = now
+        daemon.starts += 1
+        daemon.eof = [self.pump.add(name, 'stdout', process.stdout, daemon.output),
+                      self.pump.add(name, 'stderr', process.stderr, daemon.output)]
+        daemon._ps = None
+        if psutil is not None:
+            try:
+                daemon._ps = psutil.Process(process.pid)
+                daemon._ps.cpu_percent(None)  # Primes the CPU counter for the next sample.
+            except psutil.Error:
+                pass
+        return process
+
+    def reap(self):
+        """
+        Collects every child that exited since the last call and schedules its restart.
+        Returns [(name, exit code, crashed)] for them.
+        """
+        exited = []
+        now = time.monotonic()
+        for daemon in self.daemons.values():
+            if daemon.process is None or daemon.process.poll() is None:
+                continue
+            for done in daemon.eof:
+                done.wait(timeout=1.0)  # Let the pump take the last lines it wrote.
+            code = daemon.process.returncode
+            crashed = code != 0 or now - daemon.started_at < self.stable_seconds
+            daemon.last_exit_code = code
+            daemon.process = daemon._ps = None
+            daemon.eof = []
+            if crashed:
+                self._record_crash(daemon, now)
+            else:
+                daemon.consecutive_crashes = 0
+                daemon.crash_looping = False
+                daemon.next_start_at = now
+            exited.append((daemon.name, code, crashed))
+        return exited
+
+    def _record_crash(self, daemon, now):
+        daemon.consecutive_crashes += 1
+        daemon.crashes.append(now)
+        while daemon.crashes and now - daemon.crashes[0] > self.crash_loop_window:
+            daemon.crashes.popleft()
+        backoff = min(self.max_backoff, self.initial_backoff * self.backoff_factor ** (daemon.consecutive_crashes - 1))
+        daemon.next_start_at = now + backoff
+        if len(daemon.crashes) >= self.crash_loop_restarts:
+            daemon.crash_looping = True
+            daemon.next_start_at = max(daemon.next_start_at, daemon.crashes[0] + self.crash_loop_window)
+            logger.error(f"Supervisor: {daemon.name} crashed {len(daemon.crashes)} times in "
+                         f"{self.crash_loop_window:.0f}s. Holding it for {daemon.next_start_at - now:.0f}s.")
+
+    def sample(self):
+        """Takes one CPU/RSS sample of every running child and resets crash counts of stable ones."""
+        now = time.monotonic()
+        for daemon in self.daemons.values():
+            if not daemon.running():
+                continue
+            if daemon.consecutive_crashes and daemon.uptime(now) >= self.stable_seconds:
+                daemon.consecutive_crashes = 0
+                daemon.crash_looping = False
+            if daemon._ps is None:
+                continue
+            try:
+                with daemon._ps.oneshot():
+                    daemon.samples.append((time.time(), daemon._ps.cpu_percent(None), daemon._ps.memory_info().rss))
+            except psutil.Error:
+                pass
+
+    def recent_output(self, name, last=None):
+        """The daemon's newest `last` output lines as (time, stream name, line), oldest first."""
+        daemon = self.daemons.get(name)
+        if daemon is None:
+            return []
+        lines = list(daemon.output)
+        return lines[-last:] if last else lines
+
+    def stats(self):
+        now = time.monotonic()
+        stats = {}
+        for name, daemon in self.daemons.items():
+            latest = daemon.samples[-1] if daemon.samples else None
+            stats[name] = {
+                'pid': daemon.process.pid if daemon.running() else None,
+                'running': daemon.running(),
+                'uptime_seconds': round(daemon.uptime(now), 3),
+                'restarts': daemon.restarts,
+                'recent_crashes': len(daemon.crashes),
+                'crash_looping': daemon.crash_looping,
+                'last_exit_code': daemon.last_exit_code,
+                'next_start_in_seconds': round(max(0.0, daemon.next_start_at - now), 3) if not daemon.running() else 0.0,
+                'cpu_percent': latest[1] if latest else None,
+                'rss_bytes': latest[2] if latest else None,
+                'samples': [list(sample) for sample in daemon.samples],
+            }
+        return stats
+
+    def stop_all(self, timeout=10.0):
+        """Terminates every child (killing those that outlast `timeout`) and stops the pump."""
+        running = [daemon.process for daemon in self.daemons.values() if daemon.running()]
+        for process in running:
+            process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in running:
+            try:
+                process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.reap()
+        self.pump.close()
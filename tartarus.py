@@ -9,6 +9,13 @@ import shutil
 
 # Changed to absolute import
 from spiral_core.daemon_templates import Chthonic, BaseDaemon 
+from spiral_core.archive_watcher import watch_directory
+from spiral_core.archive_index import ArchiveIndex
+from spiral_core.module_record import move_module
+from spiral_core.pulse_metrics import instrumented_pulse
+from spiral_core.pulse_scheduler import adaptive_pulse
+from spiral_core.genesis_loader import GenesisLoader
+from spiral_core.param_segment import ParamSegmentReader
 
 class Tartarus(Chthonic): 
     """
@@ -28,19 +35,40 @@ class Tartarus(Chthonic):
         
         os.makedirs(self.lethe_graveyard_path, exist_ok=True)
         os.makedirs(self.tartarus_abyss_path, exist_ok=True)
+        self.archive_index = ArchiveIndex.from_params(self.params)
+        self.graveyard_watcher = watch_directory(self.lethe_graveyard_path, backend=self.params.get('archive_watch_backend', 'auto'))
 
         self.decay_window_seconds = self.params.get('current_tartarus_decay_window_seconds', 3600.0)
 
+        # Apollo rescales the decay window.
+        self.genesis_loader = GenesisLoader()
+        self.genesis_loader.follow(self)
+        self.param_reader = ParamSegmentReader.from_params(self.params)
 
+    def _on_params_changed(self, params, changed):
+        self.decay_window_seconds = self.params.get('current_tartarus_decay_window_seconds', self.decay_window_seconds)
+
+
+    def pulse_backlog(self):
+        """
+        0 (idle, so the interval stretches) while the graveyard is empty. Files that are
+        still aging don't decay any sooner for being scanned more often, so they keep the
+        base interval.
+        """
+        return None if self.graveyard_watcher.files else 0
+
+    @instrumented_pulse
+    @adaptive_pulse
     def pulse(self):
         """
         Tartarus's main pulse function.
         Scans the Lethe Graveyard for files older than the decay window and moves them to the Abyss.
         """
+        self.param_reader.sync(self.genesis_loader)
         self.logger.info(f"Tartarus Pulse: Scanning Lethe Graveyard for decay (window: {self.decay_window_seconds}s).")
 
-        # Get a list of files. This list might become stale due to race conditions.
-        files_in_graveyard = [f for f in os.listdir(self.lethe_graveyard_path) if f.endswith('.py')]
+        # File name -> mtime, kept current by the watcher. It might become stale due to race conditions.
+        files_in_graveyard = self.graveyard_watcher.snapshot()
 
         if not files_in_graveyard:
             self.logger.info("Tartarus: No files found in Lethe Graveyard to decay.")
@@ -49,21 +77,16 @@ class Tartarus(Chthonic):
         decayed_count = 0
         now = datetime.now()
 
-        for filename in files_in_graveyard:
+        for filename, mod_timestamp in files_in_graveyard.items():
             filepath = os.path.join(self.lethe_graveyard_path, filename)
             
             try:
-                # Robustness: Check if file exists before getting mtime
-                if not os.path.exists(filepath):
-                    self.logger.debug(f"Tartarus: File disappeared before age check: {os.path.basename(filepath)}. Skipping.")
-                    continue
-
-                mod_timestamp = os.path.getmtime(filepath)
                 mod_datetime = datetime.fromtimestamp(mod_timestamp)
 
                 if (now - mod_datetime).total_seconds() > self.decay_window_seconds:
                     destination_filepath = os.path.join(self.tartarus_abyss_path, filename)
-                    shutil.move(filepath, destination_filepath)
+                    move_module(filepath, destination_filepath)
+                    self.archive_index.move(filename, destination_filepath)
                     self.logger.info(f"Tartarus: Decayed '{filename}' (moved to Abyss).")
                     decayed_count += 1
                 else:
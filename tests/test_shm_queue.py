@@ -0,0 +1,112 @@
+# spiral_core/tests/test_shm_queue.py
+import os
+import time
+import queue
+import unittest
+import threading
+import multiprocessing
+from multiprocessing import connection
+
+from spiral_core.shm_queue import ShmRingQueue, wait_handle
+
+
+def _put_later(shm_queue, item, delay):
+    time.sleep(delay)
+    shm_queue.put(item)
+
+
+class ShmRingQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = ShmRingQueue.create(f"spiral_test_queue_{os.getpid()}_{id(self)}", slots=8, slot_size=64,
+                                         blob_capacity=1000)
+
+    def tearDown(self):
+        self.queue.close()
+        self.queue.unlink()
+
+    def test_inline_and_blob_items_keep_fifo_order(self):
+        items = [b'small', b'x' * 300, 'text', {'feedback': 1}, b'y' * 500]
+        self.queue.put_many(items)
+        self.assertEqual(self.queue.get_many(10), items)
+        self.assertTrue(self.queue.empty())
+
+    def test_large_blob_fits_after_wrap_when_area_is_empty(self):
+        self.queue.put(b'a' * 400)
+        self.assertEqual(self.queue.get(), b'a' * 400)
+        # blob_head is now at 400: 700 bytes don't fit before the wrap, nor after it
+        # counting from blob_tail, but nothing is live so the whole area is free.
+        self.queue.put(b'b' * 700, timeout=1)
+        self.assertEqual(self.queue.get(timeout=1), b'b' * 700)
+        self.queue.put(b'c' * 900, timeout=1)
+        self.assertEqual(self.queue.get(timeout=1), b'c' * 900)
+
+    def test_blob_area_full_while_items_are_live(self):
+        self.queue.put(b'a' * 600)
+        with self.assertRaises(queue.Full):
+            self.queue.put(b'b' * 600, block=False)
+        self.assertEqual(self.queue.get(), b'a' * 600)
+        self.queue.put(b'b' * 600, block=False)
+        self.assertEqual(self.queue.get(), b'b' * 600)
+
+    def test_many_wraps_with_mixed_sizes(self):
+        sizes = [70, 450, 120, 999, 10, 333, 501, 64, 800]
+        for round_ in range(20):
+            items = [bytes([round_]) * size for size in sizes]
+            for item in items:
+                self.queue.put(item, block=False)
+                self.assertEqual(self.queue.get(block=False), item)
+        self.assertEqual(self.queue.stats()['blob_bytes_used'], 0)
+
+    def test_item_larger_than_blob_area_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.queue.put(b'z' * 1001)
+
+    def test_clear_frees_slots_and_blobs(self):
+        self.queue.put_many([b'a' * 500, b'small'])
+        self.assertEqual(self.queue.clear(), 2)
+        self.assertTrue(self.queue.empty())
+        self.queue.put(b'b' * 900, block=False)
+        self.assertEqual(self.queue.get(), b'b' * 900)
+
+    def test_doorbell_is_ready_only_while_items_may_be_waiting(self):
+        handle = wait_handle(self.queue)
+        self.assertIs(handle, self.queue.wait_handle())
+        self.assertEqual(connection.wait([handle], timeout=0), [])
+        self.queue.put(b'item')
+        self.assertEqual(connection.wait([handle], timeout=0), [handle])
+        self.assertEqual(self.queue.get(block=False), b'item')
+        # The empty take drains the rings, so an idle consumer sleeps again.
+        with self.assertRaises(queue.Empty):
+            self.queue.get(block=False)
+        self.assertEqual(connection.wait([handle], timeout=0), [])
+
+    def test_blocking_get_wakes_on_a_put_from_another_process(self):
+        producer = multiprocessing.get_context('fork').Process(target=_put_later, args=(self.queue, b'late', 0.2))
+        producer.start()
+        try:
+            start = time.monotonic()
+            self.assertEqual(self.queue.get(timeout=5), b'late')
+            self.assertLess(time.monotonic() - start, 2)
+        finally:
+            producer.join()
+
+    def test_wait_times_out_on_an_empty_queue(self):
+        start = time.monotonic()
+        self.assertFalse(self.queue.wait(timeout=0.05))
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        threading.Timer(0.05, self.queue.put, args=(b'x',)).start()
+        self.assertTrue(self.queue.wait(timeout=5))
+
+    def test_attached_queue_without_doorbell_still_delivers(self):
+        other = ShmRingQueue.attach(self.queue.name)
+        try:
+            self.assertIsNone(other.wait_handle())
+            other.put(b'by name')
+            self.assertEqual(self.queue.get(timeout=1), b'by name')
+        finally:
+            other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()